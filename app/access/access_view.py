@@ -1,3 +1,5 @@
+import os
+
 from django.shortcuts import render
 from django.views import View
 
@@ -6,8 +8,9 @@ from app.models import Acceso
 
 class AccessView(View):
     def get(self, request):
+        limit = int(os.getenv('ACCESS_VIEW_LIMIT', '500'))
         accesos = (
             Acceso.objects.select_related('usuario', 'vehiculo')
-            .order_by('-fecha')
+            .order_by('-fecha')[:limit]
         )
         return render(request, 'access.html', {'accesos': accesos})
@@ -2,15 +2,15 @@ from django.shortcuts import render, redirect
 from django.views import View
 from app.models import Area, Dispositivo, Espacio
 from django.contrib import messages
+from app.services.occupancy import areas_with_counters
 
 
 class AllocationView(View):
     def get(self, request):
-        areas = Area.objects.all().order_by('nombre')
+        areas = areas_with_counters(Area.objects.order_by('nombre'))
         for area in areas:
-            area.capacidad_total = area.espacios.count()
-            area.capacidad_disponible = area.espacios.filter(
-                estado=Espacio.Estado.LIBRE).count()
+            area.capacidad_total = area.ocupacion.total
+            area.capacidad_disponible = area.ocupacion.libres
             device = area.dispositivos.first()
             if device:
                 area.dispositivo_id = device.id
@@ -20,7 +20,10 @@ class AllocationView(View):
                 area.dispositivo_id = None
                 area.dispositivo_clave = ''
                 area.dispositivo_ruta = ''
-        return render(request, 'allocation.html', {'areas': areas})
+        return render(request, 'allocation.html', {
+            'areas': areas,
+            'motores': Area.MotorDeteccion.choices,
+        })
 
     def post(self, request):
         action = request.POST.get('action')
@@ -51,6 +54,9 @@ class AllocationView(View):
                 area = Area.objects.get(pk=area_id)
                 if nombre:
                     area.nombre = nombre
+                    motor = request.POST.get('motor_deteccion')
+                    if motor in Area.MotorDeteccion.values:
+                        area.motor_deteccion = motor
                     area.save()
                 else:
                     error = 'El nombre es requerido.'
@@ -99,9 +105,12 @@ class AllocationView(View):
             error = 'Acción no válida.'
             messages.error(request, error)
 
-        areas = Area.objects.all().order_by('nombre')
+        areas = areas_with_counters(Area.objects.order_by('nombre'))
         for area in areas:
-            area.capacidad_total = area.espacios.count()
-            area.capacidad_disponible = area.espacios.filter(
-                estado=Espacio.Estado.LIBRE).count()
-        return render(request, 'allocation.html', {'areas': areas, 'error': error})
+            area.capacidad_total = area.ocupacion.total
+            area.capacidad_disponible = area.ocupacion.libres
+        return render(request, 'allocation.html', {
+            'areas': areas,
+            'motores': Area.MotorDeteccion.choices,
+            'error': error,
+        })
@@ -4,13 +4,18 @@ from app.api_views.availability_view import (
     AvailabilityListView,
     AvailabilityDetailView,
     AvailabilityPredictView,
+    AvailabilityStreamView,
 )
+from app.api_views.presence_view import PresenceView
 
 urlpatterns = [
     path('chat/', ChatbotView.as_view(), name='chatbot'),
     path('availability/', AvailabilityListView.as_view(), name='availability_list'),
+    path('availability/stream/',
+         AvailabilityStreamView.as_view(), name='availability_stream'),
     path('availability/<int:area_id>/',
          AvailabilityDetailView.as_view(), name='availability_detail'),
     path('availability/<int:area_id>/predict/',
          AvailabilityPredictView.as_view(), name='availability_predict'),
+    path('presence/', PresenceView.as_view(), name='presence'),
 ]
@@ -1,11 +1,29 @@
 from datetime import datetime
+import queue
 
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.views import View
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from app.services.availability import get_area_status, predict_area_status
+from app.services.availability import predict_area_status
+from app.services.availability_snapshot import availability_snapshot
+from app.services.availability_stream import availability_stream
+
+
+def _snapshot_response(request, body: bytes, etag: str) -> HttpResponse:
+    # If-None-Match usa comparación débil: W/"x" coincide con "x".
+    tags = [tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))]
+    if etag in tags or "*" in tags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/json")
+    response["ETag"] = etag
+    response["Cache-Control"] = "no-cache"
+    return response
 
 
 class AvailabilityListView(APIView):
@@ -13,8 +31,8 @@ class AvailabilityListView(APIView):
     permission_classes = []
 
     def get(self, request):
-        data = get_area_status()
-        return Response(data, status=status.HTTP_200_OK)
+        snapshot = availability_snapshot.current()
+        return _snapshot_response(request, snapshot["body"], snapshot["etag"])
 
 
 class AvailabilityDetailView(APIView):
@@ -22,10 +40,10 @@ class AvailabilityDetailView(APIView):
     permission_classes = []
 
     def get(self, request, area_id: int):
-        data = get_area_status(area_id=area_id)
-        if not data:
+        area = availability_snapshot.area(area_id)
+        if area is None:
             return Response({"detail": "Área no encontrada"}, status=status.HTTP_404_NOT_FOUND)
-        return Response(data[0], status=status.HTTP_200_OK)
+        return _snapshot_response(request, area["body"], area["etag"])
 
 
 class AvailabilityPredictView(APIView):
@@ -42,3 +60,31 @@ class AvailabilityPredictView(APIView):
         except Exception:
             return Response({"detail": "Área no encontrada"}, status=status.HTTP_404_NOT_FOUND)
         return Response(result, status=status.HTTP_200_OK)
+
+
+class AvailabilityStreamView(View):
+
+    def get(self, request):
+        last_event_id = (request.headers.get('Last-Event-ID')
+                         or request.GET.get('last_event_id'))
+        subscriber, initial = availability_stream.subscribe(last_event_id)
+
+        def event_stream():
+            try:
+                yield b"retry: 3000\n\n"
+                yield from initial
+                while True:
+                    if subscriber.resync:
+                        yield availability_stream.resync(subscriber)
+                    try:
+                        yield subscriber.queue.get(timeout=15)
+                    except queue.Empty:
+                        yield b": keep-alive\n\n"
+            finally:
+                availability_stream.unsubscribe(subscriber)
+
+        response = StreamingHttpResponse(
+            event_stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
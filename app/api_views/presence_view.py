@@ -0,0 +1,13 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app.services.presence import presence_by_area
+
+
+class PresenceView(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response(presence_by_area(), status=status.HTTP_200_OK)
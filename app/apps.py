@@ -3,3 +3,10 @@ from django.apps import AppConfig
 
 class AppConfig(AppConfig):
     name = 'app'
+
+    def ready(self):
+        # Antes de que algo importe torch o el motor OCR: OpenMP lee el límite al cargarse.
+        from app.detection import thread_limits
+        thread_limits.configure()
+
+        from app import signals  # noqa: F401
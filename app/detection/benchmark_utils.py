@@ -0,0 +1,9 @@
+import os
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def label_from_filename(filename: str) -> str:
+    """Placa esperada a partir de un nombre ``<PLACA>[_n].ext``."""
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return stem.split('_')[0].upper()
@@ -0,0 +1,158 @@
+import random
+import threading
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class CameraState:
+    CONNECTING = 'CONNECTING'
+    STREAMING = 'STREAMING'
+    DEGRADED = 'DEGRADED'
+    OFFLINE = 'OFFLINE'
+
+
+class CameraConnection:
+
+    def __init__(
+        self,
+        source: str,
+        open_timeout_ms: int = 5000,
+        read_timeout_ms: int = 5000,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_read_failures: int = 5,
+        frame_size: Optional[tuple] = None,
+    ) -> None:
+        self.source = source
+        self.open_timeout_ms = open_timeout_ms
+        self.read_timeout_ms = read_timeout_ms
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_read_failures = max_read_failures
+        self.frame_size = frame_size
+
+        self.cap = None
+        self.state = CameraState.CONNECTING
+        self.state_since = time.time()
+        self.reconnect_attempts = 0
+        self.read_failures = 0
+        self.last_frame_at: Optional[float] = None
+        self.next_retry_at: Optional[float] = None
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+
+    def _set_state(self, state: str) -> None:
+        with self._lock:
+            if self.state == state:
+                return
+            previous = self.state
+            self.state = state
+            self.state_since = time.time()
+        print(f"Cámara {self.source}: {previous} -> {state}")
+
+    def _backoff_delay(self) -> float:
+        delay = min(self.backoff_max,
+                    self.backoff_base * (2 ** min(self.reconnect_attempts, 16)))
+        return random.uniform(delay / 2, delay)
+
+    def _wait(self, seconds: float) -> bool:
+        return not self._stop_event.wait(seconds)
+
+    def _open(self):
+        params = []
+        open_prop = getattr(cv2, 'CAP_PROP_OPEN_TIMEOUT_MSEC', None)
+        read_prop = getattr(cv2, 'CAP_PROP_READ_TIMEOUT_MSEC', None)
+        if open_prop is not None:
+            params += [open_prop, self.open_timeout_ms]
+        if read_prop is not None:
+            params += [read_prop, self.read_timeout_ms]
+
+        try:
+            cap = cv2.VideoCapture(self.source, cv2.CAP_ANY, params)
+        except (cv2.error, TypeError):
+            cap = cv2.VideoCapture(self.source)
+
+        if not cap.isOpened():
+            cap.release()
+            return None
+
+        if self.frame_size:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_size[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_size[1])
+        return cap
+
+    def _connect(self) -> bool:
+        if self.state != CameraState.OFFLINE:
+            self._set_state(CameraState.CONNECTING)
+        cap = self._open()
+        if cap is None:
+            delay = self._backoff_delay()
+            self.reconnect_attempts += 1
+            self.next_retry_at = time.time() + delay
+            self._set_state(CameraState.OFFLINE)
+            self._wait(delay)
+            return False
+
+        self.cap = cap
+        self.read_failures = 0
+        self.next_retry_at = None
+        return True
+
+    def _drop(self) -> None:
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def read(self) -> Optional[np.ndarray]:
+        if self._stop_event.is_set():
+            return None
+
+        if self.cap is None and not self._connect():
+            return None
+
+        ret, frame = self.cap.read()
+        if ret and frame is not None:
+            self.read_failures = 0
+            self.reconnect_attempts = 0
+            self.last_frame_at = time.time()
+            self._set_state(CameraState.STREAMING)
+            return frame
+
+        self.read_failures += 1
+        if self.read_failures >= self.max_read_failures:
+            self._drop()
+            delay = self._backoff_delay()
+            self.reconnect_attempts += 1
+            self.next_retry_at = time.time() + delay
+            self._set_state(CameraState.OFFLINE)
+            self._wait(delay)
+        else:
+            self._set_state(CameraState.DEGRADED)
+            self._wait(min(1.0, 0.1 * self.read_failures))
+        return None
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def release(self) -> None:
+        self._drop()
+
+    def status(self) -> dict:
+        with self._lock:
+            state = self.state
+            since = self.state_since
+        now = time.time()
+        return {
+            'state': state,
+            'state_since': since,
+            'state_seconds': round(now - since, 1),
+            'reconnect_attempts': self.reconnect_attempts,
+            'read_failures': self.read_failures,
+            'last_frame_at': self.last_frame_at,
+            'next_retry_in': round(max(0.0, self.next_retry_at - now), 1)
+            if self.next_retry_at and state == CameraState.OFFLINE else None,
+        }
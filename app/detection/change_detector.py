@@ -0,0 +1,78 @@
+import os
+import threading
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        force_every: Optional[float] = None,
+        size: tuple = (64, 48),
+    ) -> None:
+        self.threshold = threshold if threshold is not None else float(
+            os.getenv('FRAME_CHANGE_THRESHOLD', '4.0'))
+        self.force_every = force_every if force_every is not None else float(
+            os.getenv('FRAME_FORCE_SECONDS', '5.0'))
+        self.size = size
+
+        self.reference = None
+        self.cached = None
+        self.last_full_at = 0.0
+        self.last_score: Optional[float] = None
+
+        self.frames = 0
+        self.skipped = 0
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def lookup(self, frame: np.ndarray):
+        thumb = self._thumbnail(frame)
+        now = time.monotonic()
+
+        with self._lock:
+            self.frames += 1
+            if self.reference is not None and now - self.last_full_at < self.force_every:
+                self.last_score = float(np.mean(np.abs(thumb - self.reference)))
+                if self.last_score < self.threshold:
+                    self.skipped += 1
+                    if self.cached is not None:
+                        self.hits += 1
+                        return self.cached
+                    return None
+
+            self.reference = thumb
+            self.last_full_at = now
+            return None
+
+    def store(self, result) -> None:
+        self.cached = result
+
+    def reset(self) -> None:
+        with self._lock:
+            self.reference = None
+            self.cached = None
+            self.last_full_at = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            frames = self.frames
+            return {
+                'frames': frames,
+                'skipped': self.skipped,
+                'cache_hits': self.hits,
+                'skip_ratio': round(self.skipped / frames, 3) if frames else 0.0,
+                'cache_hit_rate': round(self.hits / frames, 3) if frames else 0.0,
+                'last_score': self.last_score,
+                'threshold': self.threshold,
+                'force_every': self.force_every,
+            }
@@ -71,6 +71,7 @@ class DetectorControlView(View):
         return JsonResponse({
             'area_id': area_id,
             'running': running,
+            'camera': detector.status()['camera'] if detector else None,
             'stream_url': f'/detection/stream/{area_id}/' if running else None
         })
 
@@ -95,9 +96,12 @@ class EspaciosStatusView(View):
                 1 for e in espacios_data if e['estado'] == 'OCUPADO')
             libres = total - ocupados
 
+            detector = get_detector(area_id)
+
             return JsonResponse({
                 'area_id': area_id,
                 'area_nombre': area.nombre,
+                'camera': detector.status()['camera'] if detector else None,
                 'total': total,
                 'ocupados': ocupados,
                 'libres': libres,
@@ -1,4 +1,11 @@
+from app.detection.camera_connection import CameraConnection, CameraState
+from app.detection.change_detector import FrameChangeDetector
+from app.detection.occupancy_smoother import OccupancySmoother
+from app.detection.resource_scheduler import get_resource_scheduler
+from app.detection.spot_classifier import SpotClassifier
 from app.models import Area, Espacio, Dispositivo
+from app.services import occupancy
+from app.services.space_allocator import space_allocator
 import django
 import os
 import sys
@@ -7,7 +14,8 @@ import time
 import cv2
 import numpy as np
 import torch
-from collections import defaultdict
+from django.db.models import Q
+from django.utils import timezone
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(
     os.path.dirname(os.path.abspath(__file__)))))
@@ -34,9 +42,11 @@ class ParkingDetector:
         self.running = False
         self.frame = None
         self.frame_lock = threading.Lock()
-        self.cap = None
+        self.camera = None
         self.model = None
         self.thread = None
+        self.resource_key = f"area:{area_id}"
+        self._resource_generation = None
 
         self.parking_spots = []
         self.spots_initialized = False
@@ -45,7 +55,10 @@ class ParkingDetector:
         self.candidate_spots = []
 
         self.espacios_map = {}
-        self.detection_counts = defaultdict(int)
+        self.smoother = OccupancySmoother()
+        self.engine = Area.MotorDeteccion.YOLO
+        self.classifier = SpotClassifier()
+        self.change_detector = FrameChangeDetector()
 
         self.COLOR_OCCUPIED = (0, 0, 255)
         self.COLOR_FREE = (0, 255, 0)
@@ -501,17 +514,49 @@ class ParkingDetector:
 
         return inside
 
-    def _update_espacio_estado(self, espacio_id: int, ocupado: bool):
-        try:
-            espacio = Espacio.objects.get(pk=espacio_id)
-            nuevo_estado = Espacio.Estado.OCUPADO if ocupado else Espacio.Estado.LIBRE
-
-            if espacio.estado != nuevo_estado:
-                espacio.estado = nuevo_estado
-                espacio.save()
-                print(f"Espacio {espacio.clave} -> {nuevo_estado}")
-        except Espacio.DoesNotExist:
-            pass
+    def _load_area_config(self):
+        area = Area.objects.filter(pk=self.area_id).first()
+        if area is None:
+            self.engine = Area.MotorDeteccion.YOLO
+            self.smoother = OccupancySmoother()
+            return
+        self.engine = area.motor_deteccion
+        self.smoother = OccupancySmoother(
+            enter_threshold=area.umbral_ocupado,
+            exit_threshold=area.umbral_libre,
+        )
+
+    def _flush_espacio_estados(self, indices):
+        ocupados = []
+        libres = []
+        for idx in indices.tolist():
+            espacio_id = self.espacios_map.get(idx)
+            if espacio_id is None:
+                continue
+            if self.smoother.state[idx]:
+                ocupados.append(espacio_id)
+            else:
+                libres.append(espacio_id)
+
+        now = timezone.now()
+        sin_reserva = {'reservado_hasta': None, 'reservado_para': None,
+                       'reserva_token': None, 'fecha_modificacion': now}
+        if ocupados:
+            occupancy.transition(ocupados, Espacio.Estado.OCUPADO, {
+                Espacio.Estado.LIBRE: None,
+                Espacio.Estado.RESERVADO: None,
+            }, **sin_reserva)
+        if libres:
+            occupancy.transition(libres, Espacio.Estado.LIBRE, {
+                Espacio.Estado.OCUPADO: None,
+                Espacio.Estado.RESERVADO: Q(reservado_hasta__lt=now) | Q(
+                    reservado_hasta__isnull=True),
+            }, **sin_reserva)
+
+        if ocupados or libres:
+            space_allocator.sync(ocupados + libres)
+            print(
+                f"Área {self.area_id}: {len(ocupados)} espacios -> OCUPADO, {len(libres)} -> LIBRE")
 
     def _draw_spots(self, frame, occupied_spots: set):
         for idx, spot in enumerate(self.parking_spots):
@@ -553,35 +598,22 @@ class ParkingDetector:
 
         return frame
 
-    def _process_frame(self, frame):
-        if frame is None:
-            return None
-
-        h, w = frame.shape[:2]
-        self._last_frame_shape = (h, w, 3)
-
-        if not self.spots_initialized:
-            self._calibrate_spots(frame)
-
-            progress = int((self.calibration_frames /
-                           self.calibration_needed) * 100)
-            cv2.rectangle(frame, (0, 0), (w, 60), (0, 0, 0), -1)
-            cv2.putText(frame, f"Calibrando deteccion de cajones... {progress}%",
-                        (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-            cv2.putText(frame, "Detectando lineas de estacionamiento",
-                        (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
-
-            lines, mask = self._detect_parking_lines(frame)
-            if lines is not None:
-                for line in lines:
-                    x1, y1, x2, y2 = line[0]
-                    cv2.line(frame, (x1, y1), (x2, y2), self.COLOR_SPOT, 2)
-
-            return frame
-
-        if not self.espacios_map and self.parking_spots:
-            self._init_espacios_from_spots()
-
+    def _best_spot_for_vehicle(self, vehicle_bbox, vehicle_center):
+        best_iou = 0
+        best_spot_idx = -1
+        for idx, spot in enumerate(self.parking_spots):
+            iou = self._calculate_iou(vehicle_bbox, spot['bbox'])
+            center_in_spot = self._point_in_polygon(
+                vehicle_center, spot['polygon'])
+            if iou > best_iou or (center_in_spot and iou > 0.1):
+                best_iou = iou
+                best_spot_idx = idx
+
+        if best_spot_idx >= 0 and best_iou > 0.12:
+            return best_spot_idx
+        return -1
+
+    def _detect_occupied_yolo(self, frame):
         results = self.model(frame, verbose=False, conf=0.45)
 
         fgmask = self.bg_subtractor.apply(frame)
@@ -628,32 +660,69 @@ class ParkingDetector:
                     if not contained:
                         new_spot = self._create_spot_from_vehicle(vehicle_bbox)
 
-                best_iou = 0
-                best_spot_idx = -1
-                for idx, spot in enumerate(self.parking_spots):
-                    iou = self._calculate_iou(vehicle_bbox, spot['bbox'])
-                    center_in_spot = self._point_in_polygon(
-                        vehicle_center, spot['polygon'])
-                    if iou > best_iou or (center_in_spot and iou > 0.1):
-                        best_iou = iou
-                        best_spot_idx = idx
-
-                if best_spot_idx >= 0 and best_iou > 0.12:
+                best_spot_idx = self._best_spot_for_vehicle(
+                    vehicle_bbox, vehicle_center)
+                if best_spot_idx >= 0:
                     current_occupied.add(best_spot_idx)
 
-        for idx in range(len(self.parking_spots)):
-            if idx in current_occupied:
-                self.detection_counts[idx] = min(
-                    self.detection_counts[idx] + 2, 10)
-            else:
-                self.detection_counts[idx] = max(
-                    self.detection_counts[idx] - 1, 0)
+        return current_occupied
+
+    def _detect_occupied_classifier(self, frame):
+        if self.classifier.n_spots != len(self.parking_spots):
+            self.classifier.set_spots(self.parking_spots, frame.shape)
+            self.classifier.seed_reference(
+                self.bg_subtractor.getBackgroundImage())
+
+        return set(self.classifier.classify(frame).tolist())
 
-        stable_occupied = {idx for idx,
-                           count in self.detection_counts.items() if count >= 3}
+    def _process_frame(self, frame):
+        if frame is None:
+            return None
+
+        h, w = frame.shape[:2]
+        self._last_frame_shape = (h, w, 3)
 
-        for idx, espacio_id in self.espacios_map.items():
-            self._update_espacio_estado(espacio_id, idx in stable_occupied)
+        if not self.spots_initialized:
+            self._calibrate_spots(frame)
+            if self.engine == Area.MotorDeteccion.CLASIFICADOR:
+                self.bg_subtractor.apply(frame)
+
+            progress = int((self.calibration_frames /
+                           self.calibration_needed) * 100)
+            cv2.rectangle(frame, (0, 0), (w, 60), (0, 0, 0), -1)
+            cv2.putText(frame, f"Calibrando deteccion de cajones... {progress}%",
+                        (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+            cv2.putText(frame, "Detectando lineas de estacionamiento",
+                        (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+            lines, mask = self._detect_parking_lines(frame)
+            if lines is not None:
+                for line in lines:
+                    x1, y1, x2, y2 = line[0]
+                    cv2.line(frame, (x1, y1), (x2, y2), self.COLOR_SPOT, 2)
+
+            return frame
+
+        if not self.espacios_map and self.parking_spots:
+            self._init_espacios_from_spots()
+            self.smoother.resize(len(self.parking_spots))
+            self._flush_espacio_estados(np.arange(len(self.smoother)))
+
+        cached = self.change_detector.lookup(frame)
+        if cached is not None:
+            return cached
+
+        if self.engine == Area.MotorDeteccion.CLASIFICADOR:
+            current_occupied = self._detect_occupied_classifier(frame)
+        else:
+            current_occupied = self._detect_occupied_yolo(frame)
+
+        self.smoother.resize(len(self.parking_spots))
+        changed = self.smoother.update(list(current_occupied))
+        if changed.size:
+            self._flush_espacio_estados(changed)
+
+        stable_occupied = set(self.smoother.occupied().tolist())
 
         frame = self._draw_spots(frame, stable_occupied)
 
@@ -669,30 +738,23 @@ class ParkingDetector:
         except Area.DoesNotExist:
             pass
 
+        self.change_detector.store(frame)
         return frame
 
     def _capture_loop(self):
         print(f"Iniciando captura de {self.source} para área {self.area_id}")
 
-        self.cap = cv2.VideoCapture(self.source)
-        if not self.cap.isOpened():
-            print(f"Error: No se pudo abrir {self.source}")
-            self.running = False
-            return
-
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 800)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 600)
-
         frame_count = 0
         process_every = 2
 
+        scheduler = get_resource_scheduler()
+
         while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Conexión perdida, reintentando...")
-                time.sleep(2)
-                self.cap.release()
-                self.cap = cv2.VideoCapture(self.source)
+            if self._resource_generation != scheduler.generation:
+                self._resource_generation = scheduler.apply(self.resource_key)
+
+            frame = self.camera.read()
+            if frame is None:
                 continue
 
             frame_count += 1
@@ -705,21 +767,26 @@ class ParkingDetector:
 
             time.sleep(0.033)
 
-        self.cap.release()
+        self.camera.release()
         print(f"Captura detenida para área {self.area_id}")
 
     def start(self):
         if self.running:
             return
 
-        self._load_model()
+        self._load_area_config()
+        if self.engine == Area.MotorDeteccion.YOLO:
+            self._load_model()
         self.running = True
         self.spots_initialized = False
         self.calibration_frames = 0
         self.candidate_spots = []
         self.parking_spots = []
         self.espacios_map = {}
-        self.detection_counts = defaultdict(int)
+        self.classifier = SpotClassifier()
+        self.change_detector = FrameChangeDetector()
+        self.camera = CameraConnection(self.source, frame_size=(800, 600))
+        get_resource_scheduler().register(self.resource_key)
 
         self.thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.thread.start()
@@ -727,15 +794,21 @@ class ParkingDetector:
 
     def stop(self):
         self.running = False
+        if self.camera:
+            self.camera.stop()
         if self.thread:
             self.thread.join(timeout=5)
+        get_resource_scheduler().unregister(self.resource_key)
         print(f"Detector detenido para área {self.area_id}")
 
     def get_frame_jpeg(self) -> bytes:
         with self.frame_lock:
             if self.frame is None:
                 placeholder = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(placeholder, "Iniciando detector...", (150, 240),
+                message = "Iniciando detector..."
+                if self.camera and self.camera.state == CameraState.OFFLINE:
+                    message = "Camara sin conexion"
+                cv2.putText(placeholder, message, (150, 240),
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
                 _, jpeg = cv2.imencode('.jpg', placeholder)
                 return jpeg.tobytes()
@@ -744,6 +817,16 @@ class ParkingDetector:
                                    cv2.IMWRITE_JPEG_QUALITY, 80])
             return jpeg.tobytes()
 
+    def status(self) -> dict:
+        return {
+            'area_id': self.area_id,
+            'running': self.running,
+            'engine': self.engine,
+            'camera': self.camera.status() if self.camera else None,
+            'resources': get_resource_scheduler().budget(self.resource_key),
+            'change_detector': self.change_detector.stats(),
+        }
+
 
 _active_detectors = {}
 _detectors_lock = threading.Lock()
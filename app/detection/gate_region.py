@@ -0,0 +1,90 @@
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class GateRegion:
+
+    def __init__(self, points, line_margin: float = 0.04, crop_padding: float = 0.1) -> None:
+        points = [(float(x), float(y)) for x, y in points]
+        if len(points) < 2:
+            raise ValueError("La zona de acceso requiere al menos 2 puntos")
+        self.points = points
+        self.is_line = len(points) == 2
+        self.normalized = all(0.0 <= v <= 1.0 for p in points for v in p)
+        self.line_margin = line_margin
+        self.crop_padding = crop_padding
+
+        self.shape = None
+        self.mask = None
+        self.integral = None
+        self.crop: Optional[Tuple[int, int, int, int]] = None
+
+    @classmethod
+    def from_config(cls, config) -> Optional['GateRegion']:
+        if not config:
+            return None
+        if isinstance(config, dict):
+            return cls(
+                config.get('puntos') or [],
+                line_margin=float(config.get('margen', 0.04)),
+            )
+        return cls(config)
+
+    def _pixels(self, width: int, height: int) -> np.ndarray:
+        if self.normalized:
+            pts = [(x * (width - 1), y * (height - 1)) for x, y in self.points]
+        else:
+            pts = self.points
+        return np.array(pts, dtype=np.int32)
+
+    def bind(self, frame_shape) -> None:
+        height, width = frame_shape[:2]
+        if self.shape == (height, width):
+            return
+
+        pts = self._pixels(width, height)
+        mask = np.zeros((height, width), dtype=np.uint8)
+        if self.is_line:
+            thickness = max(2, int(self.line_margin * max(width, height) * 2))
+            cv2.line(mask, tuple(pts[0]), tuple(pts[1]), 1, thickness)
+        else:
+            cv2.fillPoly(mask, [pts], 1)
+
+        self.mask = mask
+        self.integral = cv2.integral(mask)
+        self.shape = (height, width)
+
+        ys, xs = np.nonzero(mask)
+        if xs.size == 0:
+            self.crop = None
+            return
+        pad_x = int(self.crop_padding * width)
+        pad_y = int(self.crop_padding * height)
+        x1 = max(0, int(xs.min()) - pad_x)
+        y1 = max(0, int(ys.min()) - pad_y)
+        x2 = min(width, int(xs.max()) + 1 + pad_x)
+        y2 = min(height, int(ys.max()) + 1 + pad_y)
+        if (x2 - x1) * (y2 - y1) > 0.8 * width * height:
+            self.crop = None
+        else:
+            self.crop = (x1, y1, x2, y2)
+
+    def crosses(self, bbox) -> bool:
+        if self.integral is None:
+            return True
+        height, width = self.shape
+        x1, y1, x2, y2 = bbox
+        x1, x2 = max(0, min(x1, width)), max(0, min(x2, width))
+        y1, y2 = max(0, min(y1, height)), max(0, min(y2, height))
+        if x2 <= x1 or y2 <= y1:
+            return False
+        s = self.integral
+        return int(s[y2, x2] - s[y1, x2] - s[y2, x1] + s[y1, x1]) > 0
+
+    def draw(self, image: np.ndarray, color=(255, 128, 0)) -> None:
+        if self.shape is None:
+            return
+        pts = self._pixels(self.shape[1], self.shape[0])
+        cv2.polylines(image, [pts], not self.is_line, color, 2)
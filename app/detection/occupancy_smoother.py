@@ -0,0 +1,57 @@
+import numpy as np
+
+
+class OccupancySmoother:
+
+    def __init__(
+        self,
+        size: int = 0,
+        enter_threshold: int = 3,
+        exit_threshold: int = 2,
+        increment: int = 2,
+        decrement: int = 1,
+        max_count: int = 10,
+    ) -> None:
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = min(exit_threshold, enter_threshold - 1)
+        self.increment = increment
+        self.decrement = decrement
+        self.max_count = max_count
+
+        self.counts = np.zeros(size, dtype=np.int16)
+        self.state = np.zeros(size, dtype=bool)
+
+    def __len__(self) -> int:
+        return self.counts.size
+
+    def resize(self, size: int) -> None:
+        current = self.counts.size
+        if size == current:
+            return
+        if size < current:
+            self.counts = self.counts[:size].copy()
+            self.state = self.state[:size].copy()
+            return
+        self.counts = np.concatenate(
+            [self.counts, np.zeros(size - current, dtype=np.int16)])
+        self.state = np.concatenate(
+            [self.state, np.zeros(size - current, dtype=bool)])
+
+    def update(self, occupied_idx) -> np.ndarray:
+        hits = np.zeros(self.counts.size, dtype=bool)
+        idx = np.asarray(occupied_idx, dtype=np.intp)
+        hits[idx[(idx >= 0) & (idx < hits.size)]] = True
+
+        self.counts = np.clip(
+            self.counts + np.where(hits, self.increment, -self.decrement),
+            0, self.max_count).astype(np.int16)
+
+        new_state = np.where(self.state,
+                             self.counts > self.exit_threshold,
+                             self.counts >= self.enter_threshold)
+        changed = np.flatnonzero(new_state != self.state)
+        self.state = new_state
+        return changed
+
+    def occupied(self) -> np.ndarray:
+        return np.flatnonzero(self.state)
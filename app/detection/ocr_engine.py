@@ -0,0 +1,157 @@
+import os
+import shutil
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+
+PLATE_WHITELIST = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
+WINDOWS_TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+OcrResult = Tuple[Optional[str], float]
+
+
+def preprocess_plate(plate_img: np.ndarray) -> np.ndarray:
+    gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
+    gray = cv2.bilateralFilter(gray, 11, 17, 17)
+    _, thresh = cv2.threshold(
+        gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return thresh
+
+
+def clean_plate_text(text: str) -> Optional[str]:
+    cleaned = ''.join(ch for ch in text if ch.isalnum()).upper()
+    return cleaned or None
+
+
+class OcrEngine(ABC):
+    name = 'base'
+
+    @abstractmethod
+    def recognize_batch(self, images: List[np.ndarray]) -> List[OcrResult]:
+        ...
+
+    def recognize(self, image: np.ndarray) -> OcrResult:
+        return self.recognize_batch([image])[0]
+
+    def close(self) -> None:
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    name = 'pytesseract'
+    config = f'--psm 7 --oem 3 -c tessedit_char_whitelist={PLATE_WHITELIST}'
+
+    def __init__(self) -> None:
+        tesseract_cmd = os.getenv('TESSERACT_CMD') or shutil.which('tesseract')
+        if not tesseract_cmd and os.path.exists(WINDOWS_TESSERACT_CMD):
+            tesseract_cmd = WINDOWS_TESSERACT_CMD
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    def _recognize_one(self, image: np.ndarray) -> OcrResult:
+        if image.size == 0:
+            return None, 0.0
+
+        data = pytesseract.image_to_data(
+            preprocess_plate(image),
+            lang='eng',
+            config=self.config,
+            output_type=pytesseract.Output.DICT,
+        )
+        words = []
+        confs = []
+        for word, conf in zip(data['text'], data['conf']):
+            conf = float(conf)
+            if word.strip() and conf >= 0:
+                words.append(word)
+                confs.append(conf)
+
+        text = clean_plate_text(''.join(words))
+        confidence = float(np.mean(confs)) / 100 if confs else 0.0
+        return text, confidence
+
+    def recognize_batch(self, images: List[np.ndarray]) -> List[OcrResult]:
+        return [self._recognize_one(image) for image in images]
+
+
+class TesserocrEngine(OcrEngine):
+    name = 'tesserocr'
+
+    def __init__(self) -> None:
+        if tesserocr is None:
+            raise RuntimeError("tesserocr no está instalado")
+        self._local = threading.local()
+        self._apis = []
+        self._apis_lock = threading.Lock()
+
+    def _api(self):
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(
+                lang='eng', psm=tesserocr.PSM.SINGLE_LINE, oem=tesserocr.OEM.DEFAULT)
+            api.SetVariable('tessedit_char_whitelist', PLATE_WHITELIST)
+            self._local.api = api
+            with self._apis_lock:
+                self._apis.append(api)
+        return api
+
+    def recognize_batch(self, images: List[np.ndarray]) -> List[OcrResult]:
+        api = self._api()
+        results = []
+        for image in images:
+            if image.size == 0:
+                results.append((None, 0.0))
+                continue
+
+            thresh = np.ascontiguousarray(preprocess_plate(image))
+            h, w = thresh.shape[:2]
+            api.SetImageBytes(thresh.tobytes(), w, h, 1, w)
+            text = clean_plate_text(api.GetUTF8Text())
+            results.append((text, api.MeanTextConf() / 100))
+        return results
+
+    def close(self) -> None:
+        with self._apis_lock:
+            for api in self._apis:
+                api.End()
+            self._apis = []
+        self._local = threading.local()
+
+
+OCR_ENGINES = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+
+def available_ocr_engines() -> List[str]:
+    names = [PytesseractEngine.name]
+    if tesserocr is not None:
+        names.insert(0, TesserocrEngine.name)
+    return names
+
+
+def get_ocr_engine(name: Optional[str] = None) -> OcrEngine:
+    name = (name or os.getenv('OCR_BACKEND', 'auto')).lower()
+    if name == 'auto':
+        name = available_ocr_engines()[0]
+
+    engine_cls = OCR_ENGINES.get(name)
+    if engine_cls is None:
+        raise ValueError(f"Motor OCR desconocido: {name}")
+
+    try:
+        return engine_cls()
+    except RuntimeError as exc:
+        print(f"ADVERTENCIA: {exc}; usando {PytesseractEngine.name}")
+        return PytesseractEngine()
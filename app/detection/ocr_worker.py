@@ -0,0 +1,137 @@
+import os
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+
+class OcrWorkerPool:
+
+    def __init__(
+        self,
+        recognize: Callable[[List[np.ndarray]], List[Tuple[Optional[str], float]]],
+        on_result: Callable[[Optional[str], dict], None],
+        workers: int = 2,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_age: Optional[float] = None,
+        name: str = 'ocr',
+    ) -> None:
+        self.recognize = recognize
+        self.on_result = on_result
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size or int(
+            os.getenv('OCR_BATCH_SIZE', '4')))
+        self.max_age = max_age if max_age is not None else float(
+            os.getenv('OCR_MAX_AGE_SECONDS', '2.0'))
+        self.name = name
+
+        self._queue = queue.Queue(maxsize=queue_size or int(
+            os.getenv('OCR_QUEUE_SIZE', '8')))
+        self._threads = []
+        self._running = False
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'submitted': 0,
+            'processed': 0,
+            'batches': 0,
+            'dropped_overflow': 0,
+            'dropped_stale': 0,
+            'errors': 0,
+            'busy_ms_total': 0.0,
+        }
+
+    def _count(self, key: str, amount=1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._worker, name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._running = False
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def submit(self, crop: np.ndarray, meta: Optional[dict] = None) -> None:
+        item = (time.monotonic(), crop, meta or {})
+        self._count('submitted')
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._count('dropped_overflow')
+                except queue.Empty:
+                    pass
+
+    def _take_batch(self) -> list:
+        try:
+            items = [self._queue.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        while len(items) < self.batch_size:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        now = time.monotonic()
+        batch = []
+        for submitted_at, crop, meta in items:
+            waited = now - submitted_at
+            if waited > self.max_age:
+                self._count('dropped_stale')
+                continue
+            meta['queued_ms'] = waited * 1000
+            batch.append((crop, meta))
+        return batch
+
+    def _worker(self) -> None:
+        while self._running:
+            batch = self._take_batch()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            try:
+                results = self.recognize([crop for crop, _ in batch])
+            except Exception as exc:
+                self._count('errors')
+                print(f"Error de OCR en {self.name}: {exc}")
+                continue
+            self._count('busy_ms_total', (time.perf_counter() - started) * 1000)
+            self._count('processed', len(batch))
+            self._count('batches')
+
+            for (_, meta), (text, confidence) in zip(batch, results):
+                meta['confidence'] = confidence
+                try:
+                    self.on_result(text, meta)
+                except Exception as exc:
+                    self._count('errors')
+                    print(f"Error al entregar resultado OCR en {self.name}: {exc}")
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        busy_ms = stats.pop('busy_ms_total')
+        stats['avg_ms'] = round(busy_ms / stats['processed'], 1) \
+            if stats['processed'] else None
+        stats['avg_batch'] = round(stats['processed'] / stats['batches'], 2) \
+            if stats['batches'] else None
+        stats['queue_depth'] = self._queue.qsize()
+        stats['workers'] = self.workers
+        return stats
@@ -1,14 +1,22 @@
-from app.models import Dispositivo
+from app.detection.camera_connection import CameraConnection, CameraState
+from app.detection.change_detector import FrameChangeDetector
+from app.detection.gate_region import GateRegion
+from app.detection.ocr_engine import PytesseractEngine, get_ocr_engine
+from app.detection.ocr_worker import OcrWorkerPool
+from app.detection.plate_tracker import PlateTrackManager
+from app.detection.resource_scheduler import get_resource_scheduler
+from app.models import Acceso, Dispositivo
+from app.services.access_pipeline import get_access_pipeline
 import django
 import os
 import sys
 import time
 import threading
-from typing import Optional
+from collections import deque
+from typing import List, Optional, Tuple
 
 import cv2
 import numpy as np
-import pytesseract
 import torch
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(
@@ -36,6 +44,10 @@ class PlateDetector:
         plate_model_path: str = 'models/placa.pt',
         conf_vehicle: float = 0.35,
         conf_plate: float = 0.4,
+        plate_input_size: int = 320,
+        ocr_backend: Optional[str] = None,
+        access_tipo: Optional[str] = None,
+        gate_region: Optional[GateRegion] = None,
     ) -> None:
         self.identifier = str(identifier)
         self.source = source
@@ -43,6 +55,9 @@ class PlateDetector:
         self.plate_model_path = plate_model_path
         self.conf_vehicle = conf_vehicle
         self.conf_plate = conf_plate
+        self.plate_input_size = plate_input_size
+        self.access_tipo = access_tipo if access_tipo in Acceso.Tipo.values else None
+        self.gate_region = gate_region
 
         self.running = False
         self.frame = None
@@ -50,17 +65,30 @@ class PlateDetector:
 
         self.vehicle_model = None
         self.plate_model = None
-        self.cap = None
+        self.camera = None
         self.thread = None
+        self.resource_key = f"placas:{self.identifier}"
+        self._resource_generation = None
 
         self.last_plate_text: Optional[str] = None
         self.last_plate_at: Optional[float] = None
-
-        tesseract_cmd = os.getenv('TESSERACT_CMD')
-        if not tesseract_cmd:
-            tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-        if tesseract_cmd:
-            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.last_plates = deque(maxlen=10)
+        self.plates_lock = threading.Lock()
+        self.plate_events = deque(maxlen=50)
+        self.plate_tracks = PlateTrackManager(on_settled=self._on_plate_settled)
+        self.ocr_pool = None
+        self.plate_stats = {
+            'frames': 0,
+            'vehicles': 0,
+            'plates_detected': 0,
+            'plates_read': 0,
+            'batches': 0,
+            'batch_ms_total': 0.0,
+            'outside_gate': 0,
+        }
+        self.change_detector = FrameChangeDetector()
+        self.ocr_engine = get_ocr_engine(ocr_backend)
+        self._fallback_engine = None
 
     def _load_models(self) -> None:
         if YOLO is None:
@@ -95,98 +123,225 @@ class PlateDetector:
             return np.zeros((0, 0, 3), dtype=image.dtype)
         return image[y1:y2, x1:x2]
 
+    def _extract_plate_texts(self, plate_imgs: List[np.ndarray]) -> List[tuple]:
+        try:
+            return self.ocr_engine.recognize_batch(plate_imgs)
+        except Exception as exc:
+            if isinstance(self.ocr_engine, PytesseractEngine):
+                raise
+            print(
+                f"Motor OCR {self.ocr_engine.name} falló ({exc}); usando {PytesseractEngine.name}")
+            if self._fallback_engine is None:
+                self._fallback_engine = PytesseractEngine()
+            return self._fallback_engine.recognize_batch(plate_imgs)
+
     def _extract_plate_text(self, plate_img: np.ndarray) -> Optional[str]:
         if plate_img.size == 0:
             return None
+        text, _ = self._extract_plate_texts([plate_img])[0]
+        return text
 
-        gray = cv2.cvtColor(plate_img, cv2.COLOR_BGR2GRAY)
-        gray = cv2.bilateralFilter(gray, 11, 17, 17)
-        _, thresh = cv2.threshold(
-            gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    def _letterbox(self, image: np.ndarray, size: int):
+        h, w = image.shape[:2]
+        scale = min(size / w, size / h)
+        nw, nh = max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+        resized = cv2.resize(image, (nw, nh), interpolation=cv2.INTER_LINEAR)
+        canvas = np.full((size, size, 3), 114, dtype=image.dtype)
+        left, top = (size - nw) // 2, (size - nh) // 2
+        canvas[top:top + nh, left:left + nw] = resized
+        return canvas, scale, left, top
+
+    def _detect_plates(self, frame: np.ndarray, vehicles: List[tuple]) -> List[tuple]:
+        batch = []
+        transforms = []
+        for x1, y1, x2, y2 in vehicles:
+            crop = self._safe_crop(frame, x1, y1, x2, y2)
+            canvas, scale, left, top = self._letterbox(
+                crop, self.plate_input_size)
+            batch.append(canvas)
+            transforms.append((scale, left, top))
+
+        started = time.perf_counter()
+        results = self.plate_model(
+            batch, conf=self.conf_plate, agnostic_nms=True,
+            imgsz=self.plate_input_size, verbose=False)
+        self.plate_stats['batches'] += 1
+        self.plate_stats['batch_ms_total'] += (time.perf_counter() - started) * 1000
+
+        plates = []
+        for (x1, y1, x2, y2), (scale, left, top), result in zip(vehicles, transforms, results):
+            if result.boxes is None or len(result.boxes) == 0:
+                continue
 
-        text = pytesseract.image_to_string(
-            thresh,
-            lang='eng',
-            config='--psm 7 --oem 3 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',
-        )
+            best_idx = int(np.argmax(result.boxes.conf.cpu().numpy()))
+            px1, py1, px2, py2 = result.boxes[best_idx].xyxy[0].tolist()
 
-        cleaned = ''.join(ch for ch in text if ch.isalnum()).upper()
-        return cleaned or None
+            gx1 = x1 + int((px1 - left) / scale)
+            gy1 = y1 + int((py1 - top) / scale)
+            gx2 = x1 + int((px2 - left) / scale)
+            gy2 = y1 + int((py2 - top) / scale)
+            plates.append(((x1, y1, x2, y2), (gx1, gy1, gx2, gy2)))
 
-    def _process_frame(self, frame: np.ndarray) -> np.ndarray:
-        annotated = frame.copy()
+        return plates
+
+    def _on_plate_text(self, text: Optional[str], meta: dict) -> None:
+        if not text:
+            return
+
+        with self.plates_lock:
+            self.plate_stats['plates_read'] += 1
+            self.last_plates.append({
+                'text': text,
+                'confidence': meta.get('confidence'),
+                'plate_bbox': meta.get('plate_bbox'),
+                'vehicle_bbox': meta.get('vehicle_bbox'),
+                'captured_at': meta.get('captured_at'),
+                'read_at': time.time(),
+            })
+
+        if meta.get('track_id') is not None:
+            self.plate_tracks.add_read(
+                meta['track_id'], text, meta.get('confidence') or 0.0)
+
+    def _on_plate_settled(self, track) -> None:
+        event = {
+            'placa': track.plate_text,
+            'confidence': track.confidence,
+            'track_id': track.id,
+            'reads': len(track.reads),
+            'first_seen': track.first_seen,
+            'settled_at': track.settled_at,
+        }
+        if self.access_tipo:
+            event['queued'] = get_access_pipeline().submit(
+                dict(event, tipo=self.access_tipo, source=self.identifier))
+
+        with self.plates_lock:
+            self.plate_events.append(event)
+            self.last_plate_text = track.plate_text
+            self.last_plate_at = track.settled_at
+        print(
+            f"Placa {track.plate_text} confirmada en detector {self.identifier} ({len(track.reads)} lecturas)")
+
+    def _recent_plates(self, max_age: float = 3.0) -> List[dict]:
+        limit = time.time() - max_age
+        with self.plates_lock:
+            return [p for p in self.last_plates if p['read_at'] >= limit]
+
+    def _draw_recent_plates(self, annotated: np.ndarray) -> None:
+        for plate in self._recent_plates():
+            gx1, gy1 = plate['plate_bbox'][:2]
+            cv2.putText(
+                annotated,
+                plate['text'],
+                (gx1, max(gy1 - 10, 20)),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                0.9,
+                (255, 255, 255),
+                2,
+            )
+
+    def _detect_vehicles(self, frame: np.ndarray) -> Tuple[List[tuple], List[tuple]]:
+        region = self.gate_region
+        offset_x, offset_y = 0, 0
+        source = frame
+        if region is not None:
+            region.bind(frame.shape)
+            if region.crop is not None:
+                offset_x, offset_y, cx2, cy2 = region.crop
+                source = frame[offset_y:cy2, offset_x:cx2]
 
         results_vehicle = self.vehicle_model(
-            annotated, conf=self.conf_vehicle, verbose=False)[0]
+            source, conf=self.conf_vehicle, verbose=False)[0]
         if results_vehicle.boxes is None or len(results_vehicle.boxes) == 0:
-            return annotated
+            return [], []
 
+        vehicles = []
+        outside = []
         for box in results_vehicle.boxes:
             cls_id = int(box.cls[0])
             if cls_id not in self.VEHICLE_CLASSES:
                 continue
 
             x1, y1, x2, y2 = map(int, box.xyxy[0])
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 255), 2)
+            bbox = (x1 + offset_x, y1 + offset_y, x2 + offset_x, y2 + offset_y)
+            if region is not None and not region.crosses(bbox):
+                outside.append(bbox)
+            elif self._safe_crop(frame, *bbox).size > 0:
+                vehicles.append(bbox)
+        return vehicles, outside
 
-            vehicle_crop = self._safe_crop(frame, x1, y1, x2, y2)
-            if vehicle_crop.size == 0:
-                continue
+    def _process_frame(self, frame: np.ndarray) -> np.ndarray:
+        # Mientras algún track espera lecturas no se reutiliza el resultado: un auto
+        # detenido frente a la pluma debe seguir llegando al OCR hasta confirmarse.
+        if not self.plate_tracks.has_pending():
+            cached = self.change_detector.lookup(frame)
+            if cached is not None:
+                return cached
 
-            results_plate = self.plate_model(
-                vehicle_crop, conf=self.conf_plate, agnostic_nms=True, verbose=False
-            )[0]
-            if results_plate.boxes is None or len(results_plate.boxes) == 0:
-                continue
+        annotated = frame.copy()
+        self.change_detector.store(annotated)
+        self.plate_stats['frames'] += 1
+
+        if self.gate_region is not None:
+            self.gate_region.bind(frame.shape)
+            self.gate_region.draw(annotated)
+
+        vehicles, outside = self._detect_vehicles(frame)
+        self.plate_stats['outside_gate'] += len(outside)
+        for x1, y1, x2, y2 in outside:
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (128, 128, 128), 1)
+        for x1, y1, x2, y2 in vehicles:
+            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 255), 2)
 
-            best_idx = int(np.argmax(results_plate.boxes.conf.cpu().numpy()))
-            plate_box = results_plate.boxes[best_idx]
-            px1, py1, px2, py2 = map(int, plate_box.xyxy[0])
+        captured_at = time.time()
+        pending = {}
+        for track, bbox in self.plate_tracks.update(vehicles, captured_at):
+            if self.plate_tracks.needs_read(track):
+                pending[bbox] = track.id
+            elif track.settled:
+                cv2.putText(annotated, track.plate_text, (bbox[0], max(bbox[1] - 10, 20)),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
 
-            gx1, gy1 = x1 + px1, y1 + py1
-            gx2, gy2 = x1 + px2, y1 + py2
+        if not pending:
+            return annotated
 
+        vehicles = list(pending)
+        self.plate_stats['vehicles'] += len(vehicles)
+        plates = self._detect_plates(frame, vehicles)
+        self.plate_stats['plates_detected'] += len(plates)
+
+        for vehicle_bbox, (gx1, gy1, gx2, gy2) in plates:
             cv2.rectangle(annotated, (gx1, gy1), (gx2, gy2), (0, 255, 0), 2)
 
             plate_crop = self._safe_crop(frame, gx1, gy1, gx2, gy2)
-            text = self._extract_plate_text(plate_crop)
-            if text:
-                self.last_plate_text = text
-                self.last_plate_at = time.time()
-                cv2.putText(
-                    annotated,
-                    text,
-                    (gx1, max(gy1 - 10, 20)),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.9,
-                    (255, 255, 255),
-                    2,
-                )
-
-            break
-
+            if plate_crop.size == 0:
+                continue
+            self.ocr_pool.submit(plate_crop.copy(), {
+                'track_id': pending[vehicle_bbox],
+                'vehicle_bbox': vehicle_bbox,
+                'plate_bbox': (gx1, gy1, gx2, gy2),
+                'captured_at': captured_at,
+            })
+
+        self._draw_recent_plates(annotated)
         return annotated
 
     def _capture_loop(self) -> None:
         print(
             f"Iniciando captura de {self.source} para detector {self.identifier}")
-        self.cap = cv2.VideoCapture(self.source)
-
-        if not self.cap.isOpened():
-            print(f"Error: No se pudo abrir la fuente {self.source}")
-            self.running = False
-            return
 
         frame_count = 0
         process_every = 2
 
+        scheduler = get_resource_scheduler()
+
         while self.running:
-            ret, frame = self.cap.read()
-            if not ret:
-                print("Conexión de cámara perdida, reintentando en 2s...")
-                time.sleep(2)
-                self.cap.release()
-                self.cap = cv2.VideoCapture(self.source)
+            if self._resource_generation != scheduler.generation:
+                self._resource_generation = scheduler.apply(self.resource_key)
+
+            frame = self.camera.read()
+            if frame is None:
                 continue
 
             frame_count += 1
@@ -197,7 +352,7 @@ class PlateDetector:
             with self.frame_lock:
                 self.frame = processed
 
-        self.cap.release()
+        self.camera.release()
         print(f"Captura detenida para detector {self.identifier}")
 
     def start(self) -> None:
@@ -206,21 +361,44 @@ class PlateDetector:
 
         self._load_models()
         self.running = True
+        self.change_detector.reset()
+        self.camera = CameraConnection(self.source)
+        scheduler = get_resource_scheduler()
+        scheduler.register(self.resource_key)
+        budget = scheduler.budget(self.resource_key)
+        self.ocr_pool = OcrWorkerPool(
+            self._extract_plate_texts,
+            self._on_plate_text,
+            workers=budget['ocr_workers'] if budget else 2,
+            name=f"ocr-{self.identifier}",
+        )
+        self.ocr_pool.start()
+        if self.access_tipo:
+            get_access_pipeline().start()
         self.thread = threading.Thread(target=self._capture_loop, daemon=True)
         self.thread.start()
         print(f"Detector de placas iniciado para detector {self.identifier}")
 
     def stop(self) -> None:
         self.running = False
+        if self.camera:
+            self.camera.stop()
         if self.thread:
             self.thread.join(timeout=5)
+        if self.ocr_pool:
+            self.ocr_pool.stop()
+        self.ocr_engine.close()
+        get_resource_scheduler().unregister(self.resource_key)
         print(f"Detector de placas detenido para detector {self.identifier}")
 
     def get_frame_jpeg(self) -> bytes:
         with self.frame_lock:
             if self.frame is None:
                 placeholder = np.zeros((480, 640, 3), dtype=np.uint8)
-                cv2.putText(placeholder, "Iniciando detector...", (120, 240),
+                message = "Iniciando detector..."
+                if self.camera and self.camera.state == CameraState.OFFLINE:
+                    message = "Camara sin conexion"
+                cv2.putText(placeholder, message, (120, 240),
                             cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
                 _, jpeg = cv2.imencode('.jpg', placeholder)
                 return jpeg.tobytes()
@@ -229,12 +407,46 @@ class PlateDetector:
                                    cv2.IMWRITE_JPEG_QUALITY, 80])
             return jpeg.tobytes()
 
+    def recent_plate_events(self, limit: int = 10) -> List[dict]:
+        with self.plates_lock:
+            return list(self.plate_events)[-limit:]
+
+    def _plate_throughput(self) -> dict:
+        stats = self.plate_stats
+        frames = stats['frames'] or 1
+        batches = stats['batches']
+        return {
+            'frames': stats['frames'],
+            'vehicles': stats['vehicles'],
+            'plates_detected': stats['plates_detected'],
+            'plates_read': stats['plates_read'],
+            'plates_per_frame': round(stats['plates_read'] / frames, 3),
+            'vehicles_per_frame': round(stats['vehicles'] / frames, 3),
+            'outside_gate': stats['outside_gate'],
+            'batch_ms_avg': round(stats['batch_ms_total'] / batches, 2) if batches else None,
+        }
+
     def status(self) -> dict:
         return {
             'identifier': self.identifier,
             'running': self.running,
             'last_plate': self.last_plate_text,
             'last_plate_at': self.last_plate_at,
+            'last_plates': [p['text'] for p in self._recent_plates()],
+            'plates': self._plate_throughput(),
+            'ocr': self.ocr_pool.stats() if self.ocr_pool else None,
+            'ocr_backend': self.ocr_engine.name,
+            'tracks': self.plate_tracks.stats(),
+            'plate_events': self.recent_plate_events(),
+            'auto_log': self.access_tipo,
+            'gate_region': {
+                'points': self.gate_region.points,
+                'crop': self.gate_region.crop,
+            } if self.gate_region else None,
+            'access': get_access_pipeline().stats() if self.access_tipo else None,
+            'camera': self.camera.status() if self.camera else None,
+            'resources': get_resource_scheduler().budget(self.resource_key),
+            'change_detector': self.change_detector.stats(),
             'stream_url': None,
         }
 
@@ -248,7 +460,7 @@ def get_plate_detector(identifier: str) -> Optional[PlateDetector]:
         return _plate_detectors.get(str(identifier))
 
 
-def start_plate_detector(device_id: int) -> PlateDetector:
+def start_plate_detector(device_id: int, access_tipo: Optional[str] = None) -> PlateDetector:
     with _plate_lock:
         identifier = str(device_id)
         if identifier in _plate_detectors:
@@ -259,19 +471,21 @@ def start_plate_detector(device_id: int) -> PlateDetector:
         except Dispositivo.DoesNotExist:
             raise ValueError(f"Dispositivo {device_id} no encontrado")
 
-        detector = PlateDetector(identifier, device.ruta)
+        detector = PlateDetector(
+            identifier, device.ruta, access_tipo=access_tipo,
+            gate_region=GateRegion.from_config(device.zona_acceso))
         detector.start()
         _plate_detectors[identifier] = detector
         return detector
 
 
-def start_plate_detector_by_source(source: str) -> PlateDetector:
+def start_plate_detector_by_source(source: str, access_tipo: Optional[str] = None) -> PlateDetector:
     with _plate_lock:
         identifier = source
         if identifier in _plate_detectors:
             _plate_detectors[identifier].stop()
 
-        detector = PlateDetector(identifier, source)
+        detector = PlateDetector(identifier, source, access_tipo=access_tipo)
         detector.start()
         _plate_detectors[identifier] = detector
         return detector
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, List, Optional, Tuple
+
+
+def vote_plate(reads: List[Tuple[str, float]]) -> Tuple[Optional[str], float]:
+    reads = [(text, max(conf or 0.0, 0.01)) for text, conf in reads if text]
+    if not reads:
+        return None, 0.0
+
+    length_weights = defaultdict(float)
+    for text, conf in reads:
+        length_weights[len(text)] += conf
+    length = max(length_weights.items(), key=lambda kv: kv[1])[0]
+    candidates = [(text, conf) for text, conf in reads if len(text) == length]
+
+    chars = []
+    agreement = 1.0
+    for i in range(length):
+        weights = defaultdict(float)
+        for text, conf in candidates:
+            weights[text[i]] += conf
+        char, weight = max(weights.items(), key=lambda kv: kv[1])
+        chars.append(char)
+        agreement = min(agreement, weight / sum(weights.values()))
+
+    return ''.join(chars), agreement
+
+
+def _iou(box1, box2) -> float:
+    x1 = max(box1[0], box2[0])
+    y1 = max(box1[1], box2[1])
+    x2 = min(box1[2], box2[2])
+    y2 = min(box1[3], box2[3])
+    intersection = max(0, x2 - x1) * max(0, y2 - y1)
+    area1 = (box1[2] - box1[0]) * (box1[3] - box1[1])
+    area2 = (box2[2] - box2[0]) * (box2[3] - box2[1])
+    union = area1 + area2 - intersection
+    return intersection / union if union > 0 else 0
+
+
+class PlateTrack:
+
+    def __init__(self, track_id: int, bbox: tuple, now: float) -> None:
+        self.id = track_id
+        self.bbox = bbox
+        self.first_seen = now
+        self.last_seen = now
+        self.missed = 0
+        self.reads: List[Tuple[str, float]] = []
+        self.plate_text: Optional[str] = None
+        self.confidence = 0.0
+        self.settled_at: Optional[float] = None
+
+    @property
+    def settled(self) -> bool:
+        return self.plate_text is not None
+
+
+class PlateTrackManager:
+
+    def __init__(
+        self,
+        on_settled: Optional[Callable[[PlateTrack], None]] = None,
+        min_reads: int = 3,
+        max_reads: int = 7,
+        settle_agreement: float = 0.6,
+        iou_threshold: float = 0.3,
+        ttl: float = 10.0,
+        max_missed: int = 5,
+    ) -> None:
+        self.on_settled = on_settled
+        self.min_reads = min_reads
+        self.max_reads = max_reads
+        self.settle_agreement = settle_agreement
+        self.iou_threshold = iou_threshold
+        self.ttl = ttl
+        self.max_missed = max_missed
+
+        self.tracks = {}
+        self.next_id = 1
+        self.skipped_reads = 0
+        self._lock = threading.Lock()
+
+    def update(self, bboxes: List[tuple], now: Optional[float] = None) -> List[Tuple[PlateTrack, tuple]]:
+        now = now or time.time()
+        matched = []
+        with self._lock:
+            for track_id in [tid for tid, t in self.tracks.items() if now - t.last_seen > self.ttl]:
+                del self.tracks[track_id]
+
+            free = dict(self.tracks)
+            for bbox in bboxes:
+                best, best_iou = None, self.iou_threshold
+                for track in free.values():
+                    iou = _iou(bbox, track.bbox)
+                    if iou >= best_iou:
+                        best, best_iou = track, iou
+
+                if best is None:
+                    best = PlateTrack(self.next_id, bbox, now)
+                    self.tracks[best.id] = best
+                    self.next_id += 1
+                else:
+                    del free[best.id]
+                    best.bbox = bbox
+                    best.last_seen = now
+                    best.missed = 0
+
+                if best.settled or len(best.reads) >= self.max_reads:
+                    self.skipped_reads += 1
+                matched.append((best, bbox))
+
+            # Un track que deja de verse unos cuadros seguidos es un vehículo que ya
+            # se fue: si se conservara, el siguiente que se detenga en la misma
+            # posición heredaría su placa confirmada y nunca se leería.
+            for track in free.values():
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track.id]
+        return matched
+
+    def needs_read(self, track: PlateTrack) -> bool:
+        return not track.settled and len(track.reads) < self.max_reads
+
+    def has_pending(self) -> bool:
+        with self._lock:
+            return any(self.needs_read(track) for track in self.tracks.values())
+
+    def add_read(self, track_id: int, text: Optional[str], confidence: float) -> None:
+        settled = None
+        with self._lock:
+            track = self.tracks.get(track_id)
+            if track is None or track.settled or not text:
+                return
+            track.reads.append((text, confidence))
+            if len(track.reads) < self.min_reads:
+                return
+
+            plate, agreement = vote_plate(track.reads)
+            if plate and (agreement >= self.settle_agreement or len(track.reads) >= self.max_reads):
+                confs = [c for t, c in track.reads if t == plate] or [
+                    c for _, c in track.reads]
+                track.plate_text = plate
+                track.confidence = round(
+                    agreement * sum(confs) / len(confs), 3)
+                track.settled_at = time.time()
+                settled = track
+
+        if settled and self.on_settled:
+            self.on_settled(settled)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'active_tracks': len(self.tracks),
+                'settled_tracks': sum(1 for t in self.tracks.values() if t.settled),
+                'skipped_reads': self.skipped_reads,
+            }
@@ -1,38 +1,77 @@
 import json
-from app.notification.notification_broker import broadcast
 from django.http import JsonResponse, StreamingHttpResponse
-from django.utils import timezone
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 
-from django.db import transaction
-
 from app.detection.plate_detector_service import (
     get_plate_detector,
     start_plate_detector,
     start_plate_detector_by_source,
     stop_plate_detector,
 )
-from app.models import Vehiculo, Acceso, Espacio, Notificacion
+from app.detection.gate_region import GateRegion
+from app.models import Acceso, Dispositivo
+from app.services.access_dedup import IdempotencyConflict, access_dedup
+from app.services.access_ingest import AccessQueueFull, access_ingestor
+from app.services.access_pipeline import (
+    get_access_pipeline,
+    record_access,
+)
+from app.services.plate_cache import plate_cache
+from app.services.plate_index import MAX_INDEX_DISTANCE, plate_index
+from app.services.sanction_watchlist import sanction_watchlist
+from app.services.space_allocator import space_allocator
+from app.services.space_reservation import suggest_space
+
+
+def _is_true(value) -> bool:
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'si')
 
 
-def _assign_space_for_user(usuario):
-    if not usuario:
+def _parse_max_distance(value) -> int:
+    try:
+        return min(max(int(value), 0), MAX_INDEX_DISTANCE)
+    except (TypeError, ValueError):
+        return 1
+
+
+def _auto_log_tipo(body: dict):
+    if not _is_true(body.get('auto_log', False)):
         return None
+    tipo = body.get('tipo', Acceso.Tipo.ENTRADA)
+    return tipo if tipo in Acceso.Tipo.values else Acceso.Tipo.ENTRADA
 
-    qs = Espacio.objects
 
-    if usuario.area_id:
-        espacio = (
-            qs.filter(area_id=usuario.area_id, estado=Espacio.Estado.LIBRE)
-            .order_by('clave')
-            .first()
-        )
-        if espacio:
-            return espacio
+def _set_gate_region(device_id, zona_acceso):
+    try:
+        region = GateRegion.from_config(zona_acceso)
+    except (TypeError, ValueError) as exc:
+        return JsonResponse({'error': f'Zona de acceso inválida: {exc}'}, status=400)
+
+    updated = Dispositivo.objects.filter(pk=device_id).update(
+        zona_acceso=zona_acceso or None)
+    if not updated:
+        raise ValueError(f"Dispositivo {device_id} no encontrado")
 
-    return qs.filter(estado=Espacio.Estado.LIBRE).order_by('clave').first()
+    detector = get_plate_detector(device_id)
+    if detector:
+        detector.gate_region = region
+        detector.change_detector.reset()
+    return JsonResponse({'device_id': device_id, 'zona_acceso': zona_acceso or None})
+
+
+def _find_vehicle(placa, fuzzy=False, max_distance=1):
+    vehiculo = plate_cache.get(placa)
+    if vehiculo is not None or not fuzzy:
+        return vehiculo, None, []
+
+    best, candidates = plate_index.best_match(placa, max_distance)
+    ranked = [{'placa': c['placa'], 'distance': c['distance']} for c in candidates]
+    if best is None:
+        return None, None, ranked
+
+    return plate_cache.get(best['placa']), best, ranked
 
 
 def _generate_mjpeg(detector):
@@ -86,13 +125,16 @@ class PlateControlView(View):
 
         try:
             if action == 'start':
-                detector = start_plate_detector(device_id)
+                detector = start_plate_detector(
+                    device_id, access_tipo=_auto_log_tipo(body))
                 status = detector.status()
                 status['stream_url'] = f"/plates/stream/{device_id}/"
                 return JsonResponse(status)
             if action == 'stop':
                 stop_plate_detector(device_id)
                 return JsonResponse({'device_id': device_id, 'running': False})
+            if action == 'gate':
+                return _set_gate_region(device_id, body.get('zona_acceso'))
         except ValueError as exc:
             return JsonResponse({'error': str(exc)}, status=400)
         except Exception as exc: 
@@ -122,7 +164,8 @@ class PlateControlByIpView(View):
 
         try:
             if action == 'start':
-                detector = start_plate_detector_by_source(source)
+                detector = start_plate_detector_by_source(
+                    source, access_tipo=_auto_log_tipo(body))
                 status = detector.status()
                 status['stream_url'] = f"/plates/stream_by_ip/?ip={source}"
                 return JsonResponse(status)
@@ -180,30 +223,35 @@ class PlateLookupView(View):
         if not placa:
             return JsonResponse({'error': 'Parámetro placa requerido'}, status=400)
 
-        try:
-            veh = Vehiculo.objects.select_related('usuario').get(placa=placa)
-            usuario = veh.usuario
-            espacio = _assign_space_for_user(usuario)
-            return JsonResponse({
-                'found': True,
-                'placa': veh.placa,
-                'marca': veh.marca,
-                'modelo': veh.modelo,
-                'color': veh.color,
-                'espacio': {
-                    'id': espacio.id,
-                    'clave': espacio.clave,
-                    'area_id': espacio.area_id,
-                    'area_nombre': espacio.area.nombre if espacio and espacio.area else None,
-                } if espacio else None,
-                'usuario': {
-                    'nombre': getattr(usuario, 'nombre', ''),
-                    'apellidos': getattr(usuario, 'apellidos', ''),
-                    'matricula': getattr(usuario, 'matricula', '')
-                } if usuario else None
-            })
-        except Vehiculo.DoesNotExist:
-            return JsonResponse({'found': False, 'placa': placa})
+        fuzzy = _is_true(request.GET.get('fuzzy', ''))
+        veh, match, candidates = _find_vehicle(
+            placa, fuzzy, _parse_max_distance(request.GET.get('max_distance', 1)))
+        if veh is None:
+            response = {'found': False, 'placa': placa}
+            if fuzzy:
+                response['candidates'] = candidates
+            return JsonResponse(response)
+
+        usuario = veh.usuario
+        espacio = suggest_space(usuario)
+        response = {
+            'found': True,
+            'placa': veh.placa,
+            'marca': veh.marca,
+            'modelo': veh.modelo,
+            'color': veh.color,
+            'espacio': espacio,
+            'usuario': {
+                'nombre': getattr(usuario, 'nombre', ''),
+                'apellidos': getattr(usuario, 'apellidos', ''),
+                'matricula': getattr(usuario, 'matricula', '')
+            } if usuario else None
+        }
+        if fuzzy:
+            response['placa_leida'] = placa
+            response['distance'] = match['distance'] if match else 0
+            response['candidates'] = candidates
+        return JsonResponse(response)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -224,56 +272,47 @@ class PlateLogAccessView(View):
         if tipo not in Acceso.Tipo.values:
             tipo = Acceso.Tipo.ENTRADA
 
+        fuzzy = _is_true(body.get('fuzzy', False))
+        max_distance = _parse_max_distance(body.get('max_distance', 1))
+        vehiculo, _, candidates = _find_vehicle(placa, fuzzy, max_distance)
+        if vehiculo is None:
+            response = {'error': 'Vehículo no encontrado', 'placa': placa}
+            if fuzzy:
+                response['candidates'] = candidates
+            return JsonResponse(response, status=404)
+
+        idempotency_key = request.headers.get('Idempotency-Key', '').strip() or None
         try:
-            vehiculo = Vehiculo.objects.select_related(
-                'usuario').get(placa=placa)
-        except Vehiculo.DoesNotExist:
-            return JsonResponse({'error': 'Vehículo no encontrado', 'placa': placa}, status=404)
-
-        with transaction.atomic():
-            espacio = None
-            if vehiculo.usuario:
-                espacio = _assign_space_for_user(vehiculo.usuario)
-
-            Acceso.objects.create(
-                fecha=timezone.now(),
-                tipo=tipo,
-                usuario=vehiculo.usuario,
-                vehiculo=vehiculo,
-            )
-
-            notif_payload = None
-            if vehiculo.usuario:
-                notif = Notificacion.objects.create(
-                    usuario=vehiculo.usuario,
-                    tipo=Notificacion.Tipo.ACCESO_AUTORIZADO,
-                    cuerpo=f"Acceso autorizado: {placa}",
-                    descripcion=f"Vehículo {vehiculo.marca} {vehiculo.modelo} ({placa})" + (
-                        f" | Cajón: {espacio.clave}" if espacio else "")
-                )
-                notif_payload = {
-                    'id': notif.id,
-                    'usuario_id': notif.usuario_id,
-                    'tipo': notif.tipo,
-                    'cuerpo': notif.cuerpo,
-                    'descripcion': notif.descripcion,
-                    'leido': notif.leido,
-                    'fecha_creacion': notif.fecha_creacion.isoformat(),
-                }
-                transaction.on_commit(lambda payload=notif_payload, uid=vehiculo.usuario.id: broadcast(
-                    {'event': 'notificacion', 'data': payload},
-                    target_user_id=uid
-                ))
+            result, duplicate = access_dedup.run(
+                placa, tipo, lambda: record_access(vehiculo, tipo), idempotency_key,
+                vehiculo_id=vehiculo.id)
+        except IdempotencyConflict:
+            return JsonResponse(
+                {'error': 'Idempotency-Key ya usada con otra placa o tipo'}, status=422)
+        except (AccessQueueFull, TimeoutError):
+            # El acceso no se guardó (y su cajón ya se liberó): el cliente reintenta
+            # con la misma Idempotency-Key en lugar de esperar a que venza el socket.
+            response = JsonResponse(
+                {'error': 'Registro de accesos saturado, intente de nuevo'}, status=503)
+            response['Retry-After'] = '1'
+            return response
+
+        if duplicate:
+            response = JsonResponse(dict(result, duplicate=True), status=200)
+            response['Idempotent-Replayed'] = 'true'
+            return response
+        return JsonResponse(result, status=201)
+
+
+class PlateMetricsView(View):
 
+    def get(self, request):
         return JsonResponse({
-            'logged': True,
-            'placa': placa,
-            'tipo': tipo,
-            'espacio': {
-                'id': espacio.id,
-                'clave': espacio.clave,
-                'area_id': espacio.area_id,
-                'area_nombre': espacio.area.nombre if espacio and espacio.area else None,
-            } if espacio else None,
-            'notification': notif_payload,
-        }, status=201)
+            'cache': plate_cache.stats(),
+            'index': plate_index.stats(),
+            'access': get_access_pipeline().stats(),
+            'ingest': access_ingestor.stats(),
+            'dedup': access_dedup.stats(),
+            'watchlist': sanction_watchlist.stats(),
+            'spaces': space_allocator.stats(),
+        })
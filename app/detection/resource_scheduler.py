@@ -0,0 +1,144 @@
+import os
+import threading
+from typing import Dict, List, Optional
+
+import cv2
+import torch
+
+from app.detection.thread_limits import detector_cores, user_defined
+
+
+class ResourceScheduler:
+    """Reparte los núcleos entre los detectores activos.
+
+    El presupuesto es por proceso: torch y OpenCV tienen un solo pool de hilos, que
+    se fija a la mayor porción asignada. La porción de cada detector solo limita su
+    afinidad de núcleos (DETECTOR_PIN_CORES) y el tamaño de su pool de OCR. Para
+    aislar detectores de verdad hay que correrlos en procesos separados.
+    """
+
+    MODE_EVEN = 'even'
+    MODE_FIXED = 'fixed'
+    MODE_OFF = 'off'
+
+    def __init__(
+        self,
+        mode: Optional[str] = None,
+        threads: Optional[int] = None,
+        cores: Optional[List[int]] = None,
+        pin_cores: Optional[bool] = None,
+    ) -> None:
+        self.mode = (mode or os.getenv(
+            'DETECTOR_THREAD_MODE', self.MODE_EVEN)).lower()
+        self.fixed_threads = threads or int(os.getenv('DETECTOR_THREADS', '0') or 0)
+        self.cores = cores or detector_cores()
+        if pin_cores is None:
+            pin_cores = os.getenv('DETECTOR_PIN_CORES', '0') == '1'
+        self.pin_cores = pin_cores and hasattr(os, 'sched_setaffinity')
+
+        self.generation = 0
+        self.process_threads = 0
+        self._applied_generation = None
+        self._omp_from_env = user_defined()
+        self._lock = threading.Lock()
+        self._keys: List[str] = []
+        self._budgets: Dict[str, dict] = {}
+
+    def _rebalance(self) -> None:
+        budgets = {}
+        n = len(self._keys)
+        n_cores = len(self.cores)
+
+        for i, key in enumerate(self._keys):
+            if self.mode == self.MODE_FIXED:
+                threads = self.fixed_threads or max(1, n_cores // max(n, 1))
+                cores = None
+            else:
+                if n <= n_cores:
+                    chunk = n_cores // n
+                    extra = n_cores % n
+                    start = i * chunk + min(i, extra)
+                    cores = self.cores[start:start + chunk + (1 if i < extra else 0)]
+                else:
+                    cores = [self.cores[i % n_cores]]
+                threads = len(cores)
+
+            budgets[key] = {
+                'threads': threads,
+                'cores': cores if self.pin_cores else None,
+                'ocr_workers': max(1, threads // 2),
+            }
+
+        self._budgets = budgets
+        # torch y OpenCV usan un solo pool de hilos por proceso: cada detector
+        # ejecuta sus operaciones con ese pool, así que el tope del proceso es la
+        # mayor porción asignada y no la suma.
+        self.process_threads = max((b['threads'] for b in budgets.values()), default=0)
+        if self.mode != self.MODE_OFF and self.process_threads and not self._omp_from_env:
+            os.environ['OMP_THREAD_LIMIT'] = str(self.process_threads)
+        self.generation += 1
+
+    def register(self, key: str) -> None:
+        with self._lock:
+            if key not in self._keys:
+                self._keys.append(key)
+            self._rebalance()
+
+    def unregister(self, key: str) -> None:
+        with self._lock:
+            if key in self._keys:
+                self._keys.remove(key)
+            self._rebalance()
+
+    def budget(self, key: str) -> Optional[dict]:
+        with self._lock:
+            budget = self._budgets.get(key)
+            return dict(budget) if budget else None
+
+    def apply(self, key: str) -> int:
+        with self._lock:
+            generation = self.generation
+            budget = self._budgets.get(key)
+            process_threads = self.process_threads
+            if budget is None or self.mode == self.MODE_OFF:
+                return generation
+            apply_global = self._applied_generation != generation
+            self._applied_generation = generation
+
+        if apply_global:
+            torch.set_num_threads(process_threads)
+            cv2.setNumThreads(process_threads)
+
+        if budget['cores']:
+            try:
+                os.sched_setaffinity(
+                    threading.get_native_id(), budget['cores'])
+            except OSError as exc:
+                print(f"No se pudo fijar afinidad para {key}: {exc}")
+
+        print(
+            f"Recursos para {key}: {budget['threads']} hilos (proceso {process_threads}), "
+            f"núcleos {budget['cores'] or 'todos'}")
+        return generation
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'cores': list(self.cores),
+                'pin_cores': self.pin_cores,
+                'process_threads': self.process_threads,
+                'budgets': {k: dict(v) for k, v in self._budgets.items()},
+            }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_resource_scheduler() -> ResourceScheduler:
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ResourceScheduler()
+        return _scheduler
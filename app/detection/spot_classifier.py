@@ -0,0 +1,117 @@
+import os
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+
+def _parse_weights(spec: Optional[str]) -> Optional[np.ndarray]:
+    if not spec:
+        return None
+    values = [float(v) for v in spec.split(',') if v.strip()]
+    if len(values) != 4:
+        raise ValueError(
+            "SPOT_CLASSIFIER_WEIGHTS requiere 4 valores: bordes,color,diferencia,sesgo")
+    return np.array(values, dtype=np.float32)
+
+
+class SpotClassifier:
+    FEATURES = ('edge_density', 'color_std', 'reference_diff')
+    DEFAULT_WEIGHTS = np.array([25.0, 6.0, 20.0, -4.0], dtype=np.float32)
+
+    def __init__(
+        self,
+        scale: float = 0.5,
+        threshold: float = 0.5,
+        weights: Optional[np.ndarray] = None,
+        reference_alpha: float = 0.02,
+    ) -> None:
+        self.scale = scale
+        self.threshold = threshold
+        if weights is None:
+            weights = _parse_weights(os.getenv('SPOT_CLASSIFIER_WEIGHTS'))
+        self.weights = weights if weights is not None else self.DEFAULT_WEIGHTS
+        self.reference_alpha = reference_alpha
+
+        self.labels = None
+        self.pixel_counts = None
+        self.n_spots = 0
+        self.small_size = None
+        self.reference = None
+
+    def set_spots(self, spots: List[dict], frame_shape) -> None:
+        h, w = frame_shape[:2]
+        sw, sh = max(1, int(w * self.scale)), max(1, int(h * self.scale))
+        labels = np.zeros((sh, sw), dtype=np.int32)
+        for idx, spot in enumerate(spots):
+            polygon = (np.array(spot['polygon'], dtype=np.float32)
+                       * self.scale).astype(np.int32)
+            cv2.fillPoly(labels, [polygon], idx + 1)
+
+        self.n_spots = len(spots)
+        self.small_size = (sw, sh)
+        self.labels = labels.ravel()
+        self.pixel_counts = np.maximum(np.bincount(
+            self.labels, minlength=self.n_spots + 1)[1:], 1).astype(np.float32)
+
+    def _shrink(self, frame: np.ndarray) -> np.ndarray:
+        return cv2.resize(frame, self.small_size, interpolation=cv2.INTER_AREA)
+
+    def _per_spot_mean(self, values: np.ndarray) -> np.ndarray:
+        sums = np.bincount(self.labels, weights=values,
+                           minlength=self.n_spots + 1)[1:]
+        return sums / self.pixel_counts
+
+    def seed_reference(self, background: Optional[np.ndarray]) -> None:
+        if background is None or self.small_size is None:
+            return
+        self.reference = self._shrink(background).astype(np.float32)
+
+    def features(self, frame: np.ndarray) -> np.ndarray:
+        return self._features(self._shrink(frame))
+
+    def _features(self, small: np.ndarray) -> np.ndarray:
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        edges = (cv2.Canny(gray, 60, 160) > 0).ravel().astype(np.float32)
+        edge_density = self._per_spot_mean(edges)
+
+        pixels = small.reshape(-1, 3).astype(np.float32) / 255.0
+        color_var = np.zeros(self.n_spots, dtype=np.float64)
+        for c in range(3):
+            mean = self._per_spot_mean(pixels[:, c])
+            sq = self._per_spot_mean(pixels[:, c] * pixels[:, c])
+            color_var += np.maximum(sq - mean * mean, 0)
+        color_std = np.sqrt(color_var / 3)
+
+        if self.reference is not None:
+            diff = np.abs(small.astype(np.float32) -
+                          self.reference).mean(axis=2).ravel() / 255.0
+            reference_diff = self._per_spot_mean(diff)
+        else:
+            reference_diff = np.zeros(self.n_spots)
+
+        return np.column_stack([edge_density, color_std, reference_diff]).astype(np.float32)
+
+    def scores(self, features: np.ndarray) -> np.ndarray:
+        z = features @ self.weights[:-1] + self.weights[-1]
+        return 1.0 / (1.0 + np.exp(-z))
+
+    def classify(self, frame: np.ndarray) -> np.ndarray:
+        if self.labels is None or self.n_spots == 0:
+            return np.zeros(0, dtype=np.intp)
+
+        small = self._shrink(frame)
+        occupied = self.scores(self._features(small)) >= self.threshold
+        self._update_reference(small, occupied)
+        return np.flatnonzero(occupied)
+
+    def _update_reference(self, small: np.ndarray, occupied: np.ndarray) -> None:
+        if self.reference is None:
+            self.reference = small.astype(np.float32)
+            return
+        free_labels = np.concatenate([[False], ~occupied])
+        mask = free_labels[self.labels].reshape(
+            small.shape[:2]).astype(np.uint8)
+        cv2.accumulateWeighted(small, self.reference,
+                               self.reference_alpha, mask=mask)
@@ -0,0 +1,64 @@
+"""Límite de hilos OpenMP del proceso.
+
+OpenMP (torch, tesserocr) lee ``OMP_THREAD_LIMIT`` una sola vez, al cargarse la
+biblioteca. Por eso el valor se fija desde ``AppConfig.ready()``, antes de que una
+vista o un comando importe torch, OpenCV o el motor OCR. Este módulo no importa
+ninguno de ellos.
+"""
+import os
+from typing import List, Optional
+
+# None hasta configure(); después indica si el usuario definió OMP_THREAD_LIMIT.
+_user_defined: Optional[bool] = None
+
+
+def parse_cores(spec: Optional[str]) -> List[int]:
+    if not spec:
+        return []
+    cores = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cores.update(range(int(start), int(end) + 1))
+        else:
+            cores.add(int(part))
+    return sorted(cores)
+
+
+def available_cores() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def detector_cores() -> List[int]:
+    return parse_cores(os.getenv('DETECTOR_CORES')) or available_cores()
+
+
+def user_defined() -> bool:
+    if _user_defined is None:
+        return 'OMP_THREAD_LIMIT' in os.environ
+    return _user_defined
+
+
+def configure() -> Optional[int]:
+    """Fija OMP_THREAD_LIMIT al mayor presupuesto posible de un detector.
+
+    Es el techo del proceso: ningún reparto posterior de ResourceScheduler asigna
+    más hilos. Devuelve el límite aplicado o None si no se tocó.
+    """
+    global _user_defined
+    if _user_defined is None:
+        _user_defined = 'OMP_THREAD_LIMIT' in os.environ
+    mode = os.getenv('DETECTOR_THREAD_MODE', 'even').lower()
+    if _user_defined or mode == 'off':
+        return None
+
+    limit = len(detector_cores())
+    if mode == 'fixed':
+        limit = int(os.getenv('DETECTOR_THREADS', '0') or 0) or limit
+    os.environ['OMP_THREAD_LIMIT'] = str(limit)
+    return limit
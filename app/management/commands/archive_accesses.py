@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from app.services.access_archive import archive_accesses, archive_dir, retention_days
+
+
+class Command(BaseCommand):
+    help = ("Mueve los accesos más viejos que la retención a archivos JSONL comprimidos "
+            "por mes y los registra en el manifiesto AccesoArchivo.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Días de retención en la tabla activa "
+                                 "(defecto ACCESS_RETENTION_DAYS o 180)")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Filas leídas y borradas por bloque")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Solo contar los accesos que se archivarían")
+
+    def handle(self, *args, **options):
+        days = options['days'] if options['days'] is not None else retention_days()
+        results = archive_accesses(
+            days=days, chunk_size=max(1, options['chunk_size']), dry_run=options['dry_run'])
+
+        if not results:
+            self.stdout.write(f"No hay accesos con más de {days} días")
+            return
+        for row in results:
+            destino = row['archivo'] or '(simulación)'
+            self.stdout.write(f"{row['periodo']:%Y-%m}: {row['registros']} accesos -> {destino}")
+        if not options['dry_run']:
+            total = sum(row['registros'] for row in results)
+            self.stdout.write(f"{total} accesos archivados en {archive_dir()}")
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+import cv2
+from django.core.management.base import BaseCommand, CommandError
+
+from app.detection.benchmark_utils import IMAGE_EXTENSIONS, label_from_filename
+from app.detection.ocr_engine import available_ocr_engines, get_ocr_engine
+from app.services.plate_index import edit_distance
+
+
+class Command(BaseCommand):
+    help = "Compara motores OCR (lecturas/s y exactitud) sobre recortes de placa etiquetados."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', help="Directorio con recortes nombrados <PLACA>[_n].jpg")
+        parser.add_argument('--backends', default=','.join(available_ocr_engines()),
+                            help="Motores separados por coma")
+        parser.add_argument('--batch-size', type=int, default=8)
+        parser.add_argument('--repeat', type=int, default=1)
+        parser.add_argument('--json', action='store_true',
+                            help="Imprimir resultados en JSON")
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f"No existe el directorio {directory}")
+
+        samples = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            image = cv2.imread(os.path.join(directory, filename))
+            if image is not None:
+                samples.append((label_from_filename(filename), image))
+        if not samples:
+            raise CommandError("No se encontraron imágenes etiquetadas")
+
+        report = []
+        for name in [b.strip() for b in options['backends'].split(',') if b.strip()]:
+            engine = get_ocr_engine(name)
+            if engine.name != name:
+                self.stderr.write(f"Motor {name} no disponible, se omite")
+                continue
+            report.append(self._run(engine, samples, options))
+            engine.close()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for row in report:
+            self.stdout.write(
+                f"{row['backend']:<12} {row['reads_per_second']:>8.1f} lecturas/s | "
+                f"exactas {row['exact_accuracy']:.3f} | caracteres {row['char_accuracy']:.3f}")
+
+    def _run(self, engine, samples, options):
+        batch_size = max(1, options['batch_size'])
+        images = [image for _, image in samples]
+        predictions = []
+
+        engine.recognize_batch(images[:1])
+        started = time.perf_counter()
+        for _ in range(max(1, options['repeat'])):
+            predictions = []
+            for i in range(0, len(images), batch_size):
+                predictions.extend(
+                    engine.recognize_batch(images[i:i + batch_size]))
+        elapsed = time.perf_counter() - started
+        reads = len(images) * max(1, options['repeat'])
+
+        exact = 0
+        char_hits = 0.0
+        for (label, _), (text, _) in zip(samples, predictions):
+            text = text or ''
+            exact += int(text == label)
+            longest = max(len(label), len(text), 1)
+            char_hits += 1 - edit_distance(label, text) / longest
+
+        return {
+            'backend': engine.name,
+            'samples': len(samples),
+            'reads_per_second': reads / elapsed if elapsed else 0.0,
+            'ms_per_read': elapsed / reads * 1000,
+            'exact_accuracy': exact / len(samples),
+            'char_accuracy': char_hits / len(samples),
+        }
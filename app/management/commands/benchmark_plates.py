@@ -0,0 +1,195 @@
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from app.detection.benchmark_utils import IMAGE_EXTENSIONS, label_from_filename
+from app.detection.ocr_engine import available_ocr_engines, get_ocr_engine
+from app.detection.plate_tracker import vote_plate
+from app.services.plate_index import edit_distance
+
+CLIP_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+STAGES = ('vehicle', 'plate', 'ocr', 'total')
+
+
+def _latency(samples) -> dict:
+    if not samples:
+        return {'avg_ms': None, 'p95_ms': None}
+    values = np.array(samples)
+    return {
+        'avg_ms': round(float(values.mean()), 2),
+        'p95_ms': round(float(np.percentile(values, 95)), 2),
+    }
+
+
+def _load_frames(path: str, frame_step: int, max_frames: int) -> list:
+    if path.lower().endswith(IMAGE_EXTENSIONS):
+        image = cv2.imread(path)
+        return [image] if image is not None else []
+
+    frames = []
+    cap = cv2.VideoCapture(path)
+    index = 0
+    while len(frames) < max_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if index % frame_step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+class Command(BaseCommand):
+    help = ("Mide la cadena completa vehículo -> placa -> OCR sobre imágenes o clips "
+            "etiquetados: placas/s, latencia por etapa y exactitud.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'directory', help="Directorio con imágenes o clips nombrados <PLACA>[_n].ext")
+        parser.add_argument('--backends', default=','.join(available_ocr_engines()),
+                            help="Motores OCR separados por coma")
+        parser.add_argument('--vehicle-model', default='models/yolov10n.pt')
+        parser.add_argument('--plate-model', default='models/placa.pt')
+        parser.add_argument('--frame-step', type=int, default=5,
+                            help="Procesar uno de cada N cuadros en clips")
+        parser.add_argument('--max-frames', type=int, default=60,
+                            help="Cuadros máximos por clip")
+        parser.add_argument('--json', action='store_true',
+                            help="Imprimir resultados en JSON")
+        parser.add_argument('--output', help="Escribir el reporte JSON en este archivo")
+
+    def handle(self, *args, **options):
+        from app.detection.plate_detector_service import PlateDetector
+
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f"No existe el directorio {directory}")
+
+        samples = []
+        for filename in sorted(os.listdir(directory)):
+            if not filename.lower().endswith(IMAGE_EXTENSIONS + CLIP_EXTENSIONS):
+                continue
+            frames = _load_frames(os.path.join(directory, filename),
+                                  max(1, options['frame_step']), options['max_frames'])
+            if frames:
+                samples.append((filename, label_from_filename(filename), frames))
+        if not samples:
+            raise CommandError("No se encontraron imágenes o clips etiquetados")
+
+        detector = PlateDetector(
+            'benchmark', '',
+            vehicle_model_path=options['vehicle_model'],
+            plate_model_path=options['plate_model'],
+        )
+        default_engine = detector.ocr_engine
+        try:
+            report = self._benchmark(detector, samples, options['backends'])
+        finally:
+            default_engine.close()
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                json.dump(report, fh, indent=2)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        for row in report:
+            lat = row['latency']
+            self.stdout.write(
+                f"{row['backend']:<12} {row['plates_per_second']:>7.2f} placas/s | "
+                f"vehículo {lat['vehicle']['avg_ms']} ms | placa {lat['plate']['avg_ms']} ms | "
+                f"ocr {lat['ocr']['avg_ms']} ms | exactas {row['exact_accuracy']:.3f} | "
+                f"caracteres {row['char_accuracy']:.3f}")
+
+    def _benchmark(self, detector, samples, backends: str) -> list:
+        try:
+            detector._load_models()
+        except Exception as exc:
+            # Modelo inexistente, corrupto o ultralytics sin instalar.
+            raise CommandError(f"No se pudieron cargar los modelos: {exc}")
+
+        report = []
+        for name in [b.strip() for b in backends.split(',') if b.strip()]:
+            try:
+                engine = get_ocr_engine(name)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            try:
+                if engine.name != name:
+                    self.stderr.write(f"Motor {name} no disponible, se omite")
+                    continue
+                detector.ocr_engine = engine
+                report.append(self._run(detector, samples))
+            finally:
+                engine.close()
+        return report
+
+    def _run_frame(self, detector, frame, timings) -> list:
+        started = time.perf_counter()
+        vehicles, _ = detector._detect_vehicles(frame)
+        after_vehicle = time.perf_counter()
+
+        plates = detector._detect_plates(frame, vehicles) if vehicles else []
+        after_plate = time.perf_counter()
+
+        crops = [detector._safe_crop(frame, *plate_bbox) for _, plate_bbox in plates]
+        crops = [crop for crop in crops if crop.size > 0]
+        reads = detector._extract_plate_texts(crops) if crops else []
+        done = time.perf_counter()
+
+        timings['vehicle'].append((after_vehicle - started) * 1000)
+        timings['plate'].append((after_plate - after_vehicle) * 1000)
+        if crops:
+            timings['ocr'].append((done - after_plate) * 1000)
+        timings['total'].append((done - started) * 1000)
+        return [(text, conf) for text, conf in reads if text]
+
+    def _run(self, detector, samples) -> dict:
+        # El primer cuadro calienta modelos y motor OCR, no cuenta en la medición.
+        self._run_frame(detector, samples[0][2][0], {stage: [] for stage in STAGES})
+
+        timings = {stage: [] for stage in STAGES}
+        frames = 0
+        plates_read = 0
+        exact = 0
+        char_hits = 0.0
+        detected = 0
+        errors = []
+
+        started = time.perf_counter()
+        for filename, label, sample_frames in samples:
+            reads = []
+            for frame in sample_frames:
+                reads.extend(self._run_frame(detector, frame, timings))
+            frames += len(sample_frames)
+            plates_read += len(reads)
+
+            text, _ = vote_plate(reads)
+            text = text or ''
+            detected += int(bool(text))
+            exact += int(text == label)
+            char_hits += 1 - edit_distance(label, text) / max(len(label), len(text), 1)
+            if text != label:
+                errors.append({'sample': filename, 'label': label, 'read': text})
+        elapsed = time.perf_counter() - started
+
+        return {
+            'backend': detector.ocr_engine.name,
+            'samples': len(samples),
+            'frames': frames,
+            'plates_read': plates_read,
+            'plates_per_second': round(plates_read / elapsed, 3) if elapsed else 0.0,
+            'frames_per_second': round(frames / elapsed, 3) if elapsed else 0.0,
+            'latency': {stage: _latency(timings[stage]) for stage in STAGES},
+            'detection_rate': round(detected / len(samples), 4),
+            'exact_accuracy': round(exact / len(samples), 4),
+            'char_accuracy': round(char_hits / len(samples), 4),
+            'errors': errors,
+        }
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from app.models import OcupacionArea
+from app.services.occupancy import expire_due, reconcile
+
+
+class Command(BaseCommand):
+    help = ("Recalcula los contadores de ocupación por área desde Espacio y corrige "
+            "las diferencias; libera también las reservas vencidas.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=float, default=0,
+                            help="Repetir cada N segundos (0 = una sola vez)")
+
+    def handle(self, *args, **options):
+        every = options['every']
+        while True:
+            self._run_once()
+            if every <= 0:
+                return
+            close_old_connections()
+            time.sleep(every)
+
+    def _run_once(self):
+        expired = expire_due(OcupacionArea.objects.values_list('area_id', flat=True))
+        drift = reconcile()
+        if expired:
+            self.stdout.write(f"{len(expired)} reservas vencidas liberadas")
+        if not drift:
+            self.stdout.write("Contadores sin diferencias")
+            return
+        for row in drift:
+            self.stdout.write(f"Área {row['area_id']}: {row['antes']} -> {row['despues']}")
@@ -0,0 +1,129 @@
+import time
+
+import cv2
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+from app.detection.detector_service import ParkingDetector
+from app.detection.spot_classifier import SpotClassifier
+
+
+class Command(BaseCommand):
+    help = "Compara el clasificador por cajón contra YOLO sobre un video grabado."
+
+    def add_arguments(self, parser):
+        parser.add_argument('video', help="Ruta del video grabado")
+        parser.add_argument('--model', default='yolov10s.pt')
+        parser.add_argument('--every', type=int, default=5,
+                            help="Evaluar un cuadro de cada N")
+        parser.add_argument('--max-frames', type=int, default=0,
+                            help="Límite de cuadros evaluados (0 = sin límite)")
+        parser.add_argument('--fit', action='store_true',
+                            help="Ajustar pesos del clasificador usando YOLO como referencia")
+
+    def handle(self, *args, **options):
+        cap = cv2.VideoCapture(options['video'])
+        if not cap.isOpened():
+            raise CommandError(f"No se pudo abrir {options['video']}")
+
+        detector = ParkingDetector(0, options['video'], options['model'])
+        detector._load_model()
+        classifier = SpotClassifier()
+
+        while not detector.spots_initialized:
+            ret, frame = cap.read()
+            if not ret:
+                raise CommandError("El video terminó antes de calibrar los cajones")
+            detector._last_frame_shape = frame.shape
+            detector._calibrate_spots(frame)
+            detector.bg_subtractor.apply(frame)
+
+        spots = detector.parking_spots
+        if not spots:
+            raise CommandError("No se detectaron cajones en el video")
+
+        classifier.set_spots(spots, detector._last_frame_shape)
+        classifier.seed_reference(detector.bg_subtractor.getBackgroundImage())
+
+        y_true, y_pred, features = [], [], []
+        yolo_time = classifier_time = 0.0
+        frame_idx = evaluated = 0
+
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_idx += 1
+            if frame_idx % options['every'] != 0:
+                continue
+
+            t0 = time.perf_counter()
+            truth = np.zeros(len(spots), dtype=bool)
+            results = detector.model(frame, verbose=False, conf=0.45)
+            for result in results:
+                for box in result.boxes:
+                    if int(box.cls[0]) not in detector.VEHICLE_CLASSES:
+                        continue
+                    x1, y1, x2, y2 = map(int, box.xyxy[0])
+                    idx = detector._best_spot_for_vehicle(
+                        (x1, y1, x2, y2), ((x1 + x2) // 2, (y1 + y2) // 2))
+                    if idx >= 0:
+                        truth[idx] = True
+            yolo_time += time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            frame_features = classifier.features(frame)
+            predicted = classifier.scores(frame_features) >= classifier.threshold
+            classifier._update_reference(predicted)
+            classifier_time += time.perf_counter() - t0
+
+            y_true.append(truth)
+            y_pred.append(predicted)
+            features.append(frame_features)
+            evaluated += 1
+            if options['max_frames'] and evaluated >= options['max_frames']:
+                break
+
+        cap.release()
+        if not evaluated:
+            raise CommandError("No hubo cuadros para evaluar")
+
+        y_true = np.concatenate(y_true)
+        y_pred = np.concatenate(y_pred)
+        self._report(y_true, y_pred, evaluated, len(spots),
+                     yolo_time, classifier_time)
+
+        if options['fit']:
+            from sklearn.linear_model import LogisticRegression
+
+            X = np.concatenate(features)
+            if len(np.unique(y_true)) < 2:
+                raise CommandError("YOLO no observó ambas clases; no se puede ajustar")
+            model = LogisticRegression().fit(X, y_true)
+            weights = list(model.coef_[0]) + [model.intercept_[0]]
+            fitted = model.predict(X).astype(bool)
+            self.stdout.write(
+                f"Exactitud con pesos ajustados: {np.mean(fitted == y_true):.3f}")
+            self.stdout.write(
+                "SPOT_CLASSIFIER_WEIGHTS=" + ",".join(f"{w:.4f}" for w in weights))
+
+    def _report(self, y_true, y_pred, frames, n_spots, yolo_time, classifier_time):
+        tp = int(np.sum(y_true & y_pred))
+        fp = int(np.sum(~y_true & y_pred))
+        fn = int(np.sum(y_true & ~y_pred))
+        accuracy = float(np.mean(y_true == y_pred))
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        f1 = 2 * precision * recall / \
+            (precision + recall) if precision + recall else 0.0
+
+        yolo_ms = yolo_time / frames * 1000
+        classifier_ms = classifier_time / frames * 1000
+
+        self.stdout.write(f"Cuadros evaluados: {frames} | Cajones: {n_spots}")
+        self.stdout.write(
+            f"Exactitud: {accuracy:.3f} | Precisión: {precision:.3f} | "
+            f"Exhaustividad: {recall:.3f} | F1: {f1:.3f}")
+        self.stdout.write(
+            f"YOLO: {yolo_ms:.1f} ms/cuadro | Clasificador: {classifier_ms:.2f} ms/cuadro | "
+            f"Aceleración: {yolo_ms / classifier_ms if classifier_ms else 0:.0f}x")
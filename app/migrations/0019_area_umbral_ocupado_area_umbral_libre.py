@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0018_notificacion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='umbral_libre',
+            field=models.PositiveSmallIntegerField(default=2, verbose_name='Umbral para marcar libre'),
+        ),
+        migrations.AddField(
+            model_name='area',
+            name='umbral_ocupado',
+            field=models.PositiveSmallIntegerField(default=3, verbose_name='Umbral para marcar ocupado'),
+        ),
+    ]
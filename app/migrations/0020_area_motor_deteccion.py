@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0019_area_umbral_ocupado_area_umbral_libre'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='area',
+            name='motor_deteccion',
+            field=models.CharField(choices=[('YOLO', 'YOLO'), ('CLASIFICADOR', 'Clasificador por cajón')], default='YOLO', max_length=20, verbose_name='Motor de detección'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 11:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0020_area_motor_deteccion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dispositivo',
+            name='zona_acceso',
+            field=models.JSONField(blank=True, null=True, verbose_name='Zona de acceso'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0021_dispositivo_zona_acceso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='espacio',
+            name='reserva_token',
+            field=models.CharField(blank=True, db_index=True, max_length=32, null=True, verbose_name='Token de reserva'),
+        ),
+        migrations.AddField(
+            model_name='espacio',
+            name='reservado_hasta',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reservado hasta'),
+        ),
+        migrations.AddField(
+            model_name='espacio',
+            name='reservado_para',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas', to='app.vehiculo', verbose_name='Reservado para'),
+        ),
+        migrations.AlterField(
+            model_name='espacio',
+            name='estado',
+            field=models.CharField(choices=[('OCUPADO', 'Ocupado'), ('LIBRE', 'Libre'), ('RESERVADO', 'Reservado')], default='LIBRE', max_length=10, verbose_name='Estado'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 11:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0022_espacio_reservas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='espacio',
+            name='distancia_entrada',
+            field=models.FloatField(blank=True, null=True, verbose_name='Distancia a la entrada (m)'),
+        ),
+        migrations.AddField(
+            model_name='usuario',
+            name='discapacitado',
+            field=models.BooleanField(default=False, verbose_name='Discapacitado'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-19 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0023_espacio_distancia_usuario_discapacitado'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='acceso',
+            index=models.Index(fields=['-fecha'], name='acceso_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=models.Index(fields=['conversation', '-fecha'], name='chatmsg_conv_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='espacio',
+            index=models.Index(fields=['area', 'estado', 'clave'], name='espacio_area_estado_clave_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='espacio',
+            index=models.Index(fields=['estado', 'clave'], name='espacio_estado_clave_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['fecha_fin', 'fecha_inicio'], name='evento_fecha_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='evento',
+            index=models.Index(fields=['area', 'fecha_fin'], name='evento_area_fecha_fin_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['usuario', '-fecha_creacion'], name='notif_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['-fecha_creacion'], name='notif_fecha_idx'),
+        ),
+    ]
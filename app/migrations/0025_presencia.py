@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-19 13:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0024_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Presencia',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_entrada', models.DateTimeField(verbose_name='Fecha de entrada')),
+            ],
+            options={
+                'verbose_name': 'Presencia',
+                'verbose_name_plural': 'Presencias',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='acceso',
+            index=models.Index(fields=['vehiculo', 'fecha'], name='acceso_vehiculo_fecha_idx'),
+        ),
+        migrations.AddField(
+            model_name='presencia',
+            name='acceso',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='app.acceso', verbose_name='Acceso de entrada'),
+        ),
+        migrations.AddField(
+            model_name='presencia',
+            name='area',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='presencias', to='app.area', verbose_name='Área'),
+        ),
+        migrations.AddField(
+            model_name='presencia',
+            name='espacio',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='presencias', to='app.espacio', verbose_name='Cajón'),
+        ),
+        migrations.AddField(
+            model_name='presencia',
+            name='usuario',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='presencias', to='app.usuario', verbose_name='Usuario'),
+        ),
+        migrations.AddField(
+            model_name='presencia',
+            name='vehiculo',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='presencia', to='app.vehiculo', verbose_name='Vehículo'),
+        ),
+    ]
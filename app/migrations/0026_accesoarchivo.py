@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0025_presencia'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccesoArchivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('periodo', models.DateField(db_index=True, verbose_name='Periodo (mes)')),
+                ('archivo', models.CharField(max_length=255, unique=True, verbose_name='Archivo')),
+                ('registros', models.PositiveIntegerField(verbose_name='Registros')),
+                ('fecha_min', models.DateTimeField(verbose_name='Primer acceso')),
+                ('fecha_max', models.DateTimeField(verbose_name='Último acceso')),
+                ('id_min', models.BigIntegerField(verbose_name='Id mínimo')),
+                ('id_max', models.BigIntegerField(verbose_name='Id máximo')),
+                ('tamano_bytes', models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')),
+                ('sha256', models.CharField(max_length=64, verbose_name='SHA-256')),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')),
+            ],
+            options={
+                'verbose_name': 'Archivo de accesos',
+                'verbose_name_plural': 'Archivos de accesos',
+                'indexes': [models.Index(fields=['fecha_max', 'fecha_min'], name='acceso_archivo_rango_idx')],
+            },
+        ),
+    ]
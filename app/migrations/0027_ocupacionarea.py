@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0026_accesoarchivo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OcupacionArea',
+            fields=[
+                ('area', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ocupacion', serialize=False, to='app.area', verbose_name='Área')),
+                ('total', models.IntegerField(default=0, verbose_name='Total')),
+                ('libres', models.IntegerField(default=0, verbose_name='Libres')),
+                ('ocupados', models.IntegerField(default=0, verbose_name='Ocupados')),
+                ('reservados', models.IntegerField(default=0, verbose_name='Reservados')),
+                ('proxima_expiracion', models.DateTimeField(blank=True, null=True, verbose_name='Próxima expiración de reserva')),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True, verbose_name='Fecha de modificación')),
+            ],
+            options={
+                'verbose_name': 'Ocupación por área',
+                'verbose_name_plural': 'Ocupación por área',
+            },
+        ),
+    ]
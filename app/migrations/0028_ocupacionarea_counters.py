@@ -0,0 +1,38 @@
+# Generated by Django 6.0 on 2026-10-19 16:00
+
+from django.db import migrations
+from django.db.models import Count, Min, Q
+
+
+def crear_contadores(apps, schema_editor):
+    Area = apps.get_model('app', 'Area')
+    Espacio = apps.get_model('app', 'Espacio')
+    OcupacionArea = apps.get_model('app', 'OcupacionArea')
+
+    counts = {
+        row.pop('area_id'): row
+        for row in Espacio.objects.filter(area__isnull=False).values('area_id').annotate(
+            total=Count('id'),
+            libres=Count('id', filter=Q(estado='LIBRE')),
+            ocupados=Count('id', filter=Q(estado='OCUPADO')),
+            reservados=Count('id', filter=Q(estado='RESERVADO')),
+            proxima_expiracion=Min('reservado_hasta', filter=Q(estado='RESERVADO')),
+        ).order_by()
+    }
+    existentes = set(OcupacionArea.objects.values_list('area_id', flat=True))
+    OcupacionArea.objects.bulk_create([
+        OcupacionArea(area_id=area_id, **counts.get(area_id, {}))
+        for area_id in Area.objects.values_list('id', flat=True)
+        if area_id not in existentes
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0027_ocupacionarea'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_contadores, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.hashers import make_password, identify_hasher
 
 # Create your models here.
@@ -7,6 +7,19 @@ from django.contrib.auth.hashers import make_password, identify_hasher
 class Area(models.Model):
     nombre = models.CharField(max_length=100, verbose_name="Nombre")
 
+    umbral_ocupado = models.PositiveSmallIntegerField(
+        default=3, verbose_name="Umbral para marcar ocupado")
+    umbral_libre = models.PositiveSmallIntegerField(
+        default=2, verbose_name="Umbral para marcar libre")
+
+    class MotorDeteccion(models.TextChoices):
+        YOLO = 'YOLO', 'YOLO'
+        CLASIFICADOR = 'CLASIFICADOR', 'Clasificador por cajón'
+
+    motor_deteccion = models.CharField(
+        max_length=20, choices=MotorDeteccion.choices,
+        default=MotorDeteccion.YOLO, verbose_name="Motor de detección")
+
     fecha_creacion = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
     fecha_modificacion = models.DateTimeField(
@@ -31,6 +44,8 @@ class Dispositivo(models.Model):
         related_name='dispositivos',
         verbose_name='Área'
     )
+    zona_acceso = models.JSONField(
+        null=True, blank=True, verbose_name="Zona de acceso")
 
     fecha_creacion = models.DateTimeField(
         auto_now_add=True, verbose_name="Fecha de creación")
@@ -51,12 +66,28 @@ class Espacio(models.Model):
     class Estado(models.TextChoices):
         OCUPADO = 'OCUPADO', 'Ocupado'
         LIBRE = 'LIBRE', 'Libre'
+        RESERVADO = 'RESERVADO', 'Reservado'
 
     estado = models.CharField(max_length=10, choices=Estado.choices,
                               default=Estado.LIBRE, verbose_name="Estado")
 
+    reservado_hasta = models.DateTimeField(
+        null=True, blank=True, verbose_name="Reservado hasta")
+    reservado_para = models.ForeignKey(
+        'Vehiculo',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='reservas',
+        verbose_name='Reservado para'
+    )
+    reserva_token = models.CharField(
+        max_length=32, null=True, blank=True, db_index=True, verbose_name="Token de reserva")
+
     discapacitado = models.BooleanField(
         default=False, verbose_name="Discapacitado")
+    distancia_entrada = models.FloatField(
+        null=True, blank=True, verbose_name="Distancia a la entrada (m)")
 
     area = models.ForeignKey(
         'Area',
@@ -75,9 +106,46 @@ class Espacio(models.Model):
     def __str__(self):
         return f"{self.clave} ({self.get_estado_display()})"
 
+    def save(self, *args, **kwargs):
+        # El cambio de estado y el ajuste de OcupacionArea (señales pre/post_save)
+        # se confirman juntos o no se confirman.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     class Meta:
         verbose_name = "Espacio"
         verbose_name_plural = "Espacios"
+        indexes = [
+            models.Index(fields=['area', 'estado', 'clave'],
+                         name='espacio_area_estado_clave_idx'),
+            models.Index(fields=['estado', 'clave'],
+                         name='espacio_estado_clave_idx'),
+        ]
+
+
+class OcupacionArea(models.Model):
+    area = models.OneToOneField(
+        'Area',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='ocupacion',
+        verbose_name='Área'
+    )
+    total = models.IntegerField(default=0, verbose_name='Total')
+    libres = models.IntegerField(default=0, verbose_name='Libres')
+    ocupados = models.IntegerField(default=0, verbose_name='Ocupados')
+    reservados = models.IntegerField(default=0, verbose_name='Reservados')
+    proxima_expiracion = models.DateTimeField(
+        null=True, blank=True, verbose_name='Próxima expiración de reserva')
+    fecha_modificacion = models.DateTimeField(
+        auto_now=True, verbose_name='Fecha de modificación')
+
+    def __str__(self):
+        return f"{self.area_id}: {self.libres}/{self.total} libres"
+
+    class Meta:
+        verbose_name = "Ocupación por área"
+        verbose_name_plural = "Ocupación por área"
 
 
 class Empleado(models.Model):
@@ -129,6 +197,8 @@ class Usuario(models.Model):
     telefono = models.CharField(
         max_length=30, blank=True, null=True, verbose_name="Teléfono")
     contraseña = models.CharField(max_length=128, verbose_name="Contraseña")
+    discapacitado = models.BooleanField(
+        default=False, verbose_name="Discapacitado")
 
     area = models.ForeignKey(
         'Area',
@@ -281,6 +351,12 @@ class Evento(models.Model):
     class Meta:
         verbose_name = "Evento"
         verbose_name_plural = "Eventos"
+        indexes = [
+            models.Index(fields=['fecha_fin', 'fecha_inicio'],
+                         name='evento_fecha_fin_idx'),
+            models.Index(fields=['area', 'fecha_fin'],
+                         name='evento_area_fecha_fin_idx'),
+        ]
 
 
 class Acceso(models.Model):
@@ -324,6 +400,83 @@ class Acceso(models.Model):
     class Meta:
         verbose_name = "Acceso"
         verbose_name_plural = "Accesos"
+        indexes = [
+            models.Index(fields=['-fecha'], name='acceso_fecha_idx'),
+            models.Index(fields=['vehiculo', 'fecha'], name='acceso_vehiculo_fecha_idx'),
+        ]
+
+
+class AccesoArchivo(models.Model):
+    periodo = models.DateField(db_index=True, verbose_name='Periodo (mes)')
+    archivo = models.CharField(max_length=255, unique=True, verbose_name='Archivo')
+    registros = models.PositiveIntegerField(verbose_name='Registros')
+    fecha_min = models.DateTimeField(verbose_name='Primer acceso')
+    fecha_max = models.DateTimeField(verbose_name='Último acceso')
+    id_min = models.BigIntegerField(verbose_name='Id mínimo')
+    id_max = models.BigIntegerField(verbose_name='Id máximo')
+    tamano_bytes = models.PositiveBigIntegerField(verbose_name='Tamaño (bytes)')
+    sha256 = models.CharField(max_length=64, verbose_name='SHA-256')
+    fecha_creacion = models.DateTimeField(
+        auto_now_add=True, verbose_name='Fecha de creación')
+
+    def __str__(self):
+        return f"{self.archivo} ({self.registros} accesos)"
+
+    class Meta:
+        verbose_name = "Archivo de accesos"
+        verbose_name_plural = "Archivos de accesos"
+        indexes = [
+            models.Index(fields=['fecha_max', 'fecha_min'], name='acceso_archivo_rango_idx'),
+        ]
+
+
+class Presencia(models.Model):
+    vehiculo = models.OneToOneField(
+        'Vehiculo',
+        on_delete=models.CASCADE,
+        related_name='presencia',
+        verbose_name='Vehículo'
+    )
+    usuario = models.ForeignKey(
+        'Usuario',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='presencias',
+        verbose_name='Usuario'
+    )
+    area = models.ForeignKey(
+        'Area',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='presencias',
+        verbose_name='Área'
+    )
+    espacio = models.ForeignKey(
+        'Espacio',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='presencias',
+        verbose_name='Cajón'
+    )
+    acceso = models.ForeignKey(
+        'Acceso',
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Acceso de entrada'
+    )
+    fecha_entrada = models.DateTimeField(verbose_name='Fecha de entrada')
+
+    def __str__(self):
+        return f"{self.vehiculo} dentro desde {self.fecha_entrada}"
+
+    class Meta:
+        verbose_name = "Presencia"
+        verbose_name_plural = "Presencias"
 
 
 class Notificacion(models.Model):
@@ -360,6 +513,12 @@ class Notificacion(models.Model):
     class Meta:
         verbose_name = "Notificación"
         verbose_name_plural = "Notificaciones"
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_creacion'],
+                         name='notif_usuario_fecha_idx'),
+            models.Index(fields=['-fecha_creacion'],
+                         name='notif_fecha_idx'),
+        ]
 
 
 class ChatConversation(models.Model):
@@ -412,3 +571,7 @@ class ChatMessage(models.Model):
     class Meta:
         verbose_name = "Mensaje de chat"
         verbose_name_plural = "Mensajes de chat"
+        indexes = [
+            models.Index(fields=['conversation', '-fecha'],
+                         name='chatmsg_conv_fecha_idx'),
+        ]
@@ -94,7 +94,7 @@ class NotificationStreamView(View):
         except ValueError:
             uid_int = None
 
-        q = subscribe(uid_int)
+        q = subscribe(uid_int, staff=bool(request.session.get('empleado_id')))
 
         def event_stream():
             try:
@@ -4,13 +4,13 @@ import queue
 from typing import Optional, Set, Tuple
 
 _broker_lock = threading.Lock()
-_subscribers: Set[Tuple[queue.Queue, Optional[int]]] = set()
+_subscribers: Set[Tuple[queue.Queue, Optional[int], bool]] = set()
 
 
-def subscribe(user_id: Optional[int] = None):
+def subscribe(user_id: Optional[int] = None, staff: bool = False):
     q = queue.Queue()
     with _broker_lock:
-        _subscribers.add((q, user_id))
+        _subscribers.add((q, user_id, staff))
     return q
 
 
@@ -27,10 +27,22 @@ def broadcast(event: dict, target_user_id: Optional[int] = None):
     payload = json.dumps(event)
     with _broker_lock:
         targets = list(_subscribers)
-    for q, uid in targets:
+    for q, uid, _ in targets:
         if target_user_id is not None and uid != target_user_id:
             continue
         try:
             q.put_nowait(payload)
         except Exception:
             pass
+
+
+def broadcast_staff(event: dict):
+    """Envía el evento solo a los flujos abiertos por empleados con sesión."""
+    payload = json.dumps(event)
+    with _broker_lock:
+        targets = [q for q, _, staff in _subscribers if staff]
+    for q in targets:
+        try:
+            q.put_nowait(payload)
+        except Exception:
+            pass
@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app.models import Acceso, AccesoArchivo
+
+ARCHIVE_PREFIX = 'accesos-'
+ARCHIVE_SUFFIX = '.jsonl.gz'
+_FIELDS = ('id', 'fecha', 'tipo', 'usuario_id', 'vehiculo_id',
+           'usuario__matricula', 'vehiculo__placa')
+
+
+def retention_days() -> int:
+    return int(os.getenv('ACCESS_RETENTION_DAYS', '180'))
+
+
+def archive_dir() -> Path:
+    return Path(settings.ACCESS_ARCHIVE_DIR)
+
+
+def _next_month(start: datetime) -> datetime:
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+def _record(row: dict) -> dict:
+    return {
+        'id': row['id'],
+        'fecha': row['fecha'].isoformat(),
+        'tipo': row['tipo'],
+        'usuario_id': row['usuario_id'],
+        'vehiculo_id': row['vehiculo_id'],
+        'matricula': row['usuario__matricula'],
+        'placa': row['vehiculo__placa'],
+    }
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def remove_orphans() -> List[str]:
+    """Borra archivos de una corrida interrumpida que no llegaron al manifiesto."""
+    directory = archive_dir()
+    if not directory.is_dir():
+        return []
+    known = set(AccesoArchivo.objects.values_list('archivo', flat=True))
+    removed = []
+    for path in directory.iterdir():
+        name = path.name
+        if not name.startswith(ARCHIVE_PREFIX) or name in known:
+            continue
+        if name.endswith(ARCHIVE_SUFFIX) or name.endswith(ARCHIVE_SUFFIX + '.part'):
+            path.unlink()
+            removed.append(name)
+    return removed
+
+
+def _write_month(rows, start: datetime, stamp: str, chunk_size: int) -> Optional[dict]:
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    name = f"{ARCHIVE_PREFIX}{start:%Y-%m}-{stamp}{ARCHIVE_SUFFIX}"
+    part = directory / (name + '.part')
+
+    summary = {'registros': 0, 'fecha_min': None, 'fecha_max': None,
+               'id_min': None, 'id_max': None}
+    with gzip.open(part, 'wt', encoding='utf-8') as fh:
+        for row in rows.iterator(chunk_size=chunk_size):
+            fh.write(json.dumps(_record(row), ensure_ascii=False) + '\n')
+            summary['registros'] += 1
+            summary['fecha_min'] = summary['fecha_min'] or row['fecha']
+            summary['fecha_max'] = row['fecha']
+            summary['id_min'] = min(summary['id_min'] or row['id'], row['id'])
+            summary['id_max'] = max(summary['id_max'] or row['id'], row['id'])
+        fh.flush()
+        os.fsync(fh.fileno())
+
+    if not summary['registros']:
+        part.unlink()
+        return None
+    final = directory / name
+    os.replace(part, final)
+    summary.update(archivo=name, tamano_bytes=final.stat().st_size, sha256=_sha256(final))
+    return summary
+
+
+def _delete_archived(month_rows, chunk_size: int) -> int:
+    deleted = 0
+    while True:
+        ids = list(month_rows.values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            return deleted
+        Acceso.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+
+
+def archive_accesses(days: Optional[int] = None, chunk_size: int = 2000,
+                     dry_run: bool = False) -> List[dict]:
+    """Mueve los accesos más viejos que ``days`` a archivos JSONL comprimidos por mes.
+
+    Cada mes se lee con ``iterator()`` en bloques de ``chunk_size``, se escribe a
+    un archivo ``.part`` que se renombra al terminar y, en una sola transacción,
+    se registra en ``AccesoArchivo`` y se borran las filas archivadas.
+    """
+    days = retention_days() if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    max_id = Acceso.objects.aggregate(max_id=Max('id'))['max_id']
+    if max_id is None:
+        return []
+
+    # Las filas insertadas durante la corrida tienen id > max_id y no se tocan.
+    expired = Acceso.objects.filter(fecha__lt=cutoff, id__lte=max_id)
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    if not dry_run:
+        remove_orphans()
+
+    results = []
+    for start in list(expired.datetimes('fecha', 'month')):
+        month = expired.filter(fecha__gte=start, fecha__lt=_next_month(start))
+        periodo = start.date()
+        if dry_run:
+            results.append({'periodo': periodo, 'registros': month.count(), 'archivo': None})
+            continue
+
+        rows = month.order_by('fecha', 'id').values(*_FIELDS)
+        summary = _write_month(rows, start, stamp, chunk_size)
+        if summary is None:
+            continue
+        with transaction.atomic():
+            AccesoArchivo.objects.create(periodo=periodo, **summary)
+            _delete_archived(month, chunk_size)
+        results.append(dict(summary, periodo=periodo))
+    return results
+
+
+def iter_archived_accesses(desde: Optional[datetime] = None,
+                           hasta: Optional[datetime] = None) -> Iterator[dict]:
+    """Lee los accesos archivados en ``[desde, hasta)`` usando el manifiesto."""
+    manifest = AccesoArchivo.objects.order_by('fecha_min', 'id')
+    if desde is not None:
+        manifest = manifest.filter(fecha_max__gte=desde)
+    if hasta is not None:
+        manifest = manifest.filter(fecha_min__lt=hasta)
+
+    for entry in manifest:
+        with gzip.open(archive_dir() / entry.archivo, 'rt', encoding='utf-8') as fh:
+            for line in fh:
+                record = json.loads(line)
+                record['fecha'] = parse_datetime(record['fecha'])
+                if desde is not None and record['fecha'] < desde:
+                    continue
+                if hasta is not None and record['fecha'] >= hasta:
+                    break
+                yield record
+
+
+def iter_access_history(desde: Optional[datetime] = None,
+                        hasta: Optional[datetime] = None,
+                        chunk_size: int = 2000) -> Iterator[dict]:
+    """Historial completo en un solo formato: primero el archivo, luego la tabla activa."""
+    yield from iter_archived_accesses(desde, hasta)
+
+    hot = Acceso.objects.all()
+    if desde is not None:
+        hot = hot.filter(fecha__gte=desde)
+    if hasta is not None:
+        hot = hot.filter(fecha__lt=hasta)
+    for row in hot.order_by('fecha', 'id').values(*_FIELDS).iterator(chunk_size=chunk_size):
+        record = _record(row)
+        record['fecha'] = row['fecha']
+        yield record
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from app.models import Acceso
+
+
+class IdempotencyConflict(Exception):
+    """La misma Idempotency-Key se reutilizó con otra placa o tipo."""
+
+
+class _InFlight:
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+
+
+class AccessDedup:
+    """LRU de accesos recientes por Idempotency-Key y por ventana (tipo, vehículo).
+
+    La ventana usa el vehículo ya resuelto y no el texto leído, para que dos lecturas
+    distintas del mismo auto (``ABC123``/``A8C123``) cuenten como el mismo acceso.
+    """
+
+    def __init__(
+        self,
+        window: Optional[float] = None,
+        key_ttl: Optional[float] = None,
+        max_size: Optional[int] = None,
+    ) -> None:
+        self.window = window if window is not None else float(
+            os.getenv('ACCESS_DEDUP_SECONDS', '10'))
+        self.key_ttl = key_ttl if key_ttl is not None else float(
+            os.getenv('ACCESS_IDEMPOTENCY_SECONDS', '3600'))
+        self.max_size = max_size or int(os.getenv('ACCESS_DEDUP_SIZE', '2048'))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, Tuple[float, tuple, dict]]" = OrderedDict()
+        self._inflight = {}
+        self._stats = {
+            'requests': 0,
+            'key_hits': 0,
+            'window_hits': 0,
+            'coalesced': 0,
+            'conflicts': 0,
+            'evictions': 0,
+        }
+
+    def _keys(self, tipo: str, idempotency_key: Optional[str],
+              vehiculo_id: Optional[int]) -> list:
+        keys = []
+        if idempotency_key:
+            keys.append(('key', idempotency_key))
+        if self.window > 0 and vehiculo_id is not None:
+            keys.append(('vehiculo', tipo, vehiculo_id))
+        return keys
+
+    def _lookup(self, keys: list, fingerprint: tuple, now: float):
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            expires, stored_fingerprint, result = entry
+            if expires <= now:
+                del self._entries[key]
+                continue
+            if key[0] == 'key' and stored_fingerprint != fingerprint:
+                self._stats['conflicts'] += 1
+                raise IdempotencyConflict(key[1])
+            self._entries.move_to_end(key)
+            return key, result
+        return None, None
+
+    def _store(self, keys: list, fingerprint: tuple, result: dict, now: float) -> None:
+        for key in keys:
+            if key[0] == 'vehiculo':
+                for other in Acceso.Tipo.values:
+                    if other != key[1]:
+                        self._entries.pop(('vehiculo', other, key[2]), None)
+        for key in keys:
+            ttl = self.key_ttl if key[0] == 'key' else self.window
+            self._entries[key] = (now + ttl, fingerprint, result)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def run(self, placa: str, tipo: str, record: Callable[[], Optional[dict]],
+            idempotency_key: Optional[str] = None,
+            vehiculo_id: Optional[int] = None) -> Tuple[Optional[dict], bool]:
+        """Ejecuta ``record`` una sola vez por clave; devuelve (resultado, duplicado).
+
+        ``placa`` es el texto recibido y solo se compara contra la Idempotency-Key.
+        """
+        fingerprint = (placa, tipo)
+        keys = self._keys(tipo, idempotency_key, vehiculo_id)
+        if not keys:
+            return record(), False
+
+        waited = False
+        while True:
+            with self._lock:
+                if not waited:
+                    self._stats['requests'] += 1
+                key, result = self._lookup(keys, fingerprint, time.monotonic())
+                if result is not None:
+                    if waited:
+                        self._stats['coalesced'] += 1
+                    else:
+                        self._stats['key_hits' if key[0] == 'key' else 'window_hits'] += 1
+                    return result, True
+
+                pending = next((self._inflight[k] for k in keys if k in self._inflight), None)
+                if pending is None:
+                    pending = _InFlight()
+                    for k in keys:
+                        self._inflight[k] = pending
+                    break
+            # Otra petición con la misma clave está registrando el acceso: se espera
+            # su resultado en lugar de crear un segundo Acceso.
+            pending.done.wait()
+            waited = True
+
+        result = None
+        try:
+            result = record()
+        finally:
+            with self._lock:
+                for k in keys:
+                    if self._inflight.get(k) is pending:
+                        del self._inflight[k]
+                if result is not None:
+                    self._store(keys, fingerprint, result, time.monotonic())
+                pending.done.set()
+        return result, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_size'] = self.max_size
+        stats['window_seconds'] = self.window
+        hits = stats['key_hits'] + stats['window_hits'] + stats['coalesced']
+        stats['hits'] = hits
+        stats['hit_rate'] = round(hits / stats['requests'], 3) if stats['requests'] else 0.0
+        return stats
+
+
+access_dedup = AccessDedup()
@@ -0,0 +1,227 @@
+import os
+import queue
+import threading
+import time
+from typing import List, Optional
+
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from app.models import Acceso, Espacio, Notificacion, Vehiculo
+from app.notification.notification_broker import broadcast
+from app.services.presence import apply_accesses
+
+
+class AccessQueueFull(Exception):
+    """La cola del escritor de accesos está llena; la petición debe reintentarse."""
+
+
+class _PendingAccess:
+
+    def __init__(self, vehiculo: Vehiculo, tipo: str, espacio: Optional[Espacio]) -> None:
+        self.vehiculo = vehiculo
+        self.tipo = tipo
+        self.espacio = espacio
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.error: Optional[Exception] = None
+        self.started = False
+        self.cancelled = False
+
+
+def _notification_payload(notif: Notificacion) -> dict:
+    return {
+        'id': notif.id,
+        'usuario_id': notif.usuario_id,
+        'tipo': notif.tipo,
+        'cuerpo': notif.cuerpo,
+        'descripcion': notif.descripcion,
+        'leido': notif.leido,
+        'fecha_creacion': notif.fecha_creacion.isoformat(),
+    }
+
+
+def _broadcast_all(notifications: List[dict]) -> None:
+    for payload in notifications:
+        broadcast({'event': 'notificacion', 'data': payload},
+                  target_user_id=payload['usuario_id'])
+
+
+def write_accesses(items: List[_PendingAccess]) -> List[dict]:
+    now = timezone.now()
+    with transaction.atomic():
+        accesos = Acceso.objects.bulk_create([
+            Acceso(fecha=now, tipo=item.tipo, usuario=item.vehiculo.usuario,
+                   vehiculo=item.vehiculo)
+            for item in items
+        ])
+        apply_accesses(accesos, {
+            acceso.id: item.espacio for item, acceso in zip(items, accesos) if item.espacio})
+
+        notif_items = [item for item in items if item.vehiculo.usuario]
+        notifs = Notificacion.objects.bulk_create([
+            Notificacion(
+                usuario=item.vehiculo.usuario,
+                tipo=Notificacion.Tipo.ACCESO_AUTORIZADO,
+                cuerpo=f"Acceso autorizado: {item.vehiculo.placa}",
+                descripcion=f"Vehículo {item.vehiculo.marca} {item.vehiculo.modelo} ({item.vehiculo.placa})" + (
+                    f" | Cajón: {item.espacio.clave}" if item.espacio else "")
+            )
+            for item in notif_items
+        ])
+        payloads = {id(item): _notification_payload(notif)
+                    for item, notif in zip(notif_items, notifs)}
+        transaction.on_commit(
+            lambda notifications=list(payloads.values()): _broadcast_all(notifications))
+
+    return [
+        {'acceso_id': acceso.id, 'notification': payloads.get(id(item))}
+        for item, acceso in zip(items, accesos)
+    ]
+
+
+class AccessIngestor:
+
+    def __init__(
+        self,
+        window_ms: Optional[float] = None,
+        batch_size: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        queue_size: Optional[int] = None,
+    ) -> None:
+        self.window = (window_ms if window_ms is not None else float(
+            os.getenv('ACCESS_BATCH_WINDOW_MS', '5'))) / 1000
+        self.batch_size = max(1, batch_size or int(os.getenv('ACCESS_BATCH_SIZE', '64')))
+        self.enabled = enabled if enabled is not None else \
+            os.getenv('ACCESS_GROUP_COMMIT', '1') != '0'
+
+        self._queue = queue.Queue(maxsize=queue_size or int(
+            os.getenv('ACCESS_INGEST_QUEUE_SIZE', '256')))
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stats = {
+            'writes': 0,
+            'batches': 0,
+            'inline': 0,
+            'max_batch': 0,
+            'errors': 0,
+            'retried_batches': 0,
+            'cancelled': 0,
+            'rejected': 0,
+            'commit_ms_total': 0.0,
+        }
+
+    def write(self, vehiculo: Vehiculo, tipo: str, espacio: Optional[Espacio] = None,
+              timeout: float = 10.0) -> dict:
+        item = _PendingAccess(vehiculo, tipo, espacio)
+        if not self.enabled or connection.in_atomic_block:
+            result = write_accesses([item])[0]
+            with self._lock:
+                self._stats['writes'] += 1
+                self._stats['inline'] += 1
+            return result
+
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Con la cola llena se rechaza de inmediato: esperar aquí solo acumula
+            # hilos del servidor detrás de un escritor que ya no da abasto.
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise AccessQueueFull("La cola de registro de accesos está llena")
+        if not item.done.wait(timeout):
+            with self._lock:
+                if not item.started:
+                    # Aún en cola: el escritor lo descarta y el acceso nunca se guarda.
+                    item.cancelled = True
+                    self._stats['cancelled'] += 1
+                    raise TimeoutError("El registro de acceso no se confirmó a tiempo")
+            # Ya está en una transacción: se espera su resultado en lugar de
+            # responder error por un acceso que sí se guardará.
+            item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name='access-ingest', daemon=True)
+                self._thread.start()
+
+    def _take_batch(self) -> List[_PendingAccess]:
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            batch = [item for item in batch if not item.cancelled]
+            for item in batch:
+                item.started = True
+        return batch
+
+    def _write_batch(self, batch: List[_PendingAccess]) -> bool:
+        started = time.perf_counter()
+        try:
+            results = write_accesses(batch)
+        except Exception as exc:
+            with self._lock:
+                self._stats['errors'] += 1
+            if len(batch) == 1:
+                batch[0].error = exc
+                batch[0].done.set()
+                return False
+            # Un solo acceso inválido (p. ej. vehículo borrado) no debe tumbar a
+            # los demás: se reintenta cada uno en su propia transacción.
+            with self._lock:
+                self._stats['retried_batches'] += 1
+            for item in batch:
+                self._write_batch([item])
+            return False
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._stats['writes'] += len(batch)
+            self._stats['batches'] += 1
+            self._stats['max_batch'] = max(self._stats['max_batch'], len(batch))
+            self._stats['commit_ms_total'] += elapsed_ms
+        for item, result in zip(batch, results):
+            item.result = result
+            item.done.set()
+        return True
+
+    def _worker(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                close_old_connections()
+                continue
+            if not self._write_batch(batch):
+                close_old_connections()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        commit_ms = stats.pop('commit_ms_total')
+        batches = stats['batches']
+        stats['avg_batch'] = round((stats['writes'] - stats['inline']) / batches, 2) \
+            if batches else None
+        stats['commit_ms_avg'] = round(commit_ms / batches, 2) if batches else None
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_size'] = self._queue.maxsize
+        stats['enabled'] = self.enabled
+        stats['window_ms'] = self.window * 1000
+        return stats
+
+
+access_ingestor = AccessIngestor()
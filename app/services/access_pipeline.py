@@ -0,0 +1,245 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from app.models import Acceso, Espacio, Vehiculo
+from app.notification.notification_broker import broadcast_staff
+from app.services.access_dedup import access_dedup
+from app.services.access_ingest import access_ingestor
+from app.services.plate_cache import plate_cache
+from app.services.plate_index import MAX_INDEX_DISTANCE, plate_index
+from app.services.sanction_watchlist import sanction_watchlist
+from app.services.space_reservation import claim_space, release_space
+
+
+def serialize_espacio(espacio: Optional[Espacio]) -> Optional[dict]:
+    if not espacio:
+        return None
+    return {
+        'id': espacio.id,
+        'clave': espacio.clave,
+        'area_id': espacio.area_id,
+        'area_nombre': espacio.area.nombre if espacio.area else None,
+    }
+
+
+def alert_sanctions(vehiculo: Vehiculo, tipo: str, sanciones: list) -> None:
+    """Avisa a guardias y personal (no a los usuarios) cuando se confirme el acceso."""
+    if sanciones:
+        transaction.on_commit(lambda: broadcast_staff({
+            'event': 'alerta_sancion',
+            'priority': 'high',
+            'data': {
+                'placa': vehiculo.placa,
+                'tipo': tipo,
+                'vehiculo_id': vehiculo.id,
+                'usuario_id': vehiculo.usuario_id,
+                'sanciones': sanciones,
+                'fecha': timezone.now().isoformat(),
+            },
+        }))
+
+
+def record_access(vehiculo: Vehiculo, tipo: str) -> dict:
+    sanciones = sanction_watchlist.check(vehiculo.id, vehiculo.usuario_id)
+    espacio = None
+    if tipo == Acceso.Tipo.SALIDA:
+        release_space(vehiculo)
+    elif vehiculo.usuario:
+        espacio = claim_space(vehiculo.usuario, vehiculo)
+
+    try:
+        written = access_ingestor.write(vehiculo, tipo, espacio)
+    except Exception:
+        # El acceso no se guardó: el cajón apartado para esta entrada se libera.
+        if espacio is not None:
+            release_space(vehiculo, [espacio.id])
+        raise
+    alert_sanctions(vehiculo, tipo, sanciones)
+    return {
+        'logged': True,
+        'acceso_id': written['acceso_id'],
+        'placa': vehiculo.placa,
+        'tipo': tipo,
+        'espacio': serialize_espacio(espacio),
+        'notification': written['notification'],
+        'sanciones': sanciones,
+    }
+
+
+def _percentile(samples, pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 1)
+
+
+class AccessPipeline:
+
+    def __init__(
+        self,
+        cooldown: Optional[float] = None,
+        queue_size: Optional[int] = None,
+        max_distance: Optional[int] = None,
+        fuzzy_min_confidence: Optional[float] = None,
+    ) -> None:
+        self.cooldown = cooldown if cooldown is not None else float(
+            os.getenv('ACCESS_COOLDOWN_SECONDS', '60'))
+        # Sin nadie en el ciclo, una lectura mal hecha registraría el acceso de otro
+        # vehículo: la búsqueda tolerante es opcional y exige una lectura confiable.
+        if max_distance is None:
+            max_distance = int(os.getenv('ACCESS_FUZZY_DISTANCE', '0'))
+        self.max_distance = min(max(max_distance, 0), MAX_INDEX_DISTANCE)
+        self.fuzzy_min_confidence = fuzzy_min_confidence if fuzzy_min_confidence is not None \
+            else float(os.getenv('ACCESS_FUZZY_MIN_CONFIDENCE', '0.8'))
+
+        self._queue = queue.Queue(maxsize=queue_size or int(
+            os.getenv('ACCESS_QUEUE_SIZE', '64')))
+        self._thread = None
+        self._running = False
+        self._last_logged = {}
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self._stats = {
+            'submitted': 0,
+            'suppressed': 0,
+            'dropped': 0,
+            'logged': 0,
+            'deduplicated': 0,
+            'unknown': 0,
+            'fuzzy': 0,
+            'sanctioned': 0,
+            'errors': 0,
+        }
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def start(self) -> None:
+        sanction_watchlist.ensure_loaded()
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._worker, name='access-pipeline', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def submit(self, event: dict) -> bool:
+        placa = event.get('placa')
+        if not placa:
+            return False
+
+        tipo = event.get('tipo') or Acceso.Tipo.ENTRADA
+        key = (tipo, placa)
+        now = time.monotonic()
+        with self._lock:
+            self._stats['submitted'] += 1
+            last = self._last_logged.get(key)
+            if last is not None and now - last < self.cooldown:
+                self._stats['suppressed'] += 1
+                return False
+            self._last_logged[key] = now
+            if len(self._last_logged) > 1024:
+                self._last_logged = {
+                    k: t for k, t in self._last_logged.items() if now - t < self.cooldown}
+
+        event = dict(event, tipo=tipo, queued_at=now)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self._count('dropped')
+            with self._lock:
+                self._last_logged.pop(key, None)
+            return False
+        return True
+
+    def _resolve(self, placa: str, confidence: Optional[float] = None) -> Optional[Vehiculo]:
+        vehiculo = plate_cache.get(placa)
+        if vehiculo is not None or self.max_distance <= 0:
+            return vehiculo
+        if (confidence or 0.0) < self.fuzzy_min_confidence:
+            return None
+        best, _ = plate_index.best_match(placa, self.max_distance)
+        if best is None:
+            return None
+        self._count('fuzzy')
+        return plate_cache.get(best['placa'])
+
+    def process(self, event: dict) -> Optional[dict]:
+        started = time.monotonic()
+        vehiculo = self._resolve(event['placa'], event.get('confidence'))
+        if vehiculo is None:
+            self._count('unknown')
+            return None
+
+        result, duplicate = access_dedup.run(
+            event['placa'], event['tipo'], lambda: record_access(vehiculo, event['tipo']),
+            vehiculo_id=vehiculo.id)
+        if duplicate:
+            self._count('deduplicated')
+            return result
+        done = time.monotonic()
+        self._count('logged')
+        if result['sanciones']:
+            self._count('sanctioned')
+
+        first_seen = event.get('first_seen')
+        with self._lock:
+            self._latencies.append({
+                'queue_ms': (started - event.get('queued_at', started)) * 1000,
+                'db_ms': (done - started) * 1000,
+                'total_ms': (time.time() - first_seen) * 1000 if first_seen else None,
+            })
+        return result
+
+    def _worker(self) -> None:
+        while self._running:
+            try:
+                event = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self.process(event)
+            except Exception as exc:
+                self._count('errors')
+                print(f"Error registrando acceso de {event.get('placa')}: {exc}")
+            finally:
+                close_old_connections()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            samples = list(self._latencies)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['cooldown'] = self.cooldown
+        for field in ('queue_ms', 'db_ms', 'total_ms'):
+            values = [s[field] for s in samples if s[field] is not None]
+            stats[field.replace('_ms', '_p50_ms')] = _percentile(values, 0.5)
+            stats[field.replace('_ms', '_p95_ms')] = _percentile(values, 0.95)
+        return stats
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_access_pipeline() -> AccessPipeline:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = AccessPipeline()
+        return _pipeline
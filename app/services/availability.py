@@ -1,46 +1,40 @@
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
-from django.db.models import Count, Q
 from django.utils import timezone
 
 import re
-from app.models import Area, Espacio
+from app.models import Area
+from app.services.occupancy import areas_with_counters
 
 
-def _annotated_areas(area_id: Optional[int] = None):
-    qs = Area.objects.all()
-    if area_id is not None:
-        qs = qs.filter(id=area_id)
-    return qs.annotate(
-        libres=Count('espacios', filter=Q(
-            espacios__estado=Espacio.Estado.LIBRE)),
-        ocupados=Count('espacios', filter=Q(
-            espacios__estado=Espacio.Estado.OCUPADO)),
-        total=Count('espacios'),
-    )
-
-
-def get_area_status(area_id: Optional[int] = None) -> List[Dict]:
-    areas = _annotated_areas(area_id)
+def serialize_area_status(areas) -> List[Dict]:
+    """Convierte áreas con ``ocupacion`` cargada al formato de la API."""
+    fecha = timezone.now().isoformat()
     results = []
     for area in areas:
-        libres = area.libres or 0
-        total = area.total or 0
-        ocupados = area.ocupados or 0
+        ocupacion = area.ocupacion
         results.append(
             {
                 "area_id": area.id,
                 "area": area.nombre,
-                "libres": libres,
-                "ocupados": ocupados,
-                "total": total,
-                "fecha": timezone.now().isoformat(),
+                "libres": ocupacion.libres,
+                "ocupados": ocupacion.ocupados,
+                "reservados": ocupacion.reservados,
+                "total": ocupacion.total,
+                "fecha": fecha,
             }
         )
     return results
 
 
+def get_area_status(area_id: Optional[int] = None) -> List[Dict]:
+    areas = Area.objects.all()
+    if area_id is not None:
+        areas = areas.filter(id=area_id)
+    return serialize_area_status(areas_with_counters(areas))
+
+
 def predict_area_status(area_id: int, target_dt: Optional[datetime] = None) -> Dict:
     target = target_dt or timezone.now() + timedelta(hours=1)
     current = get_area_status(area_id=area_id)
@@ -0,0 +1,105 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from django.utils import timezone
+
+from app.services import occupancy
+from app.services.availability import serialize_area_status
+
+
+def _etag(body: bytes) -> str:
+    return '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def _render(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class AvailabilitySnapshot:
+    """Resultado de ``get_area_status()`` serializado una vez por cambio de ocupación.
+
+    La versión sube cuando se confirma una transición de ``Espacio`` (ver
+    ``occupancy.version``); mientras no cambie, las consultas devuelven los mismos
+    bytes y el mismo ETag. ``max_age`` acota cuánto puede tardar en verse un
+    cambio hecho por otro proceso.
+    """
+
+    def __init__(self, max_age: Optional[float] = None) -> None:
+        self.max_age = max_age if max_age is not None else float(
+            os.getenv('AVAILABILITY_SNAPSHOT_MAX_AGE', '30'))
+        self._lock = threading.Lock()
+        self._snapshot: Optional[dict] = None
+        self._built_version = -1
+        self._built_at = 0.0
+        self._stats = {'hits': 0, 'rebuilds': 0, 'unchanged': 0}
+
+    def _stale(self) -> bool:
+        snapshot = self._snapshot
+        if snapshot is None or self._built_version != occupancy.version():
+            return True
+        if self.max_age > 0 and time.monotonic() - self._built_at > self.max_age:
+            return True
+        expira = snapshot['expira']
+        return expira is not None and timezone.now() >= expira
+
+    def _build(self, version: int) -> dict:
+        areas = occupancy.areas_with_counters()
+        expiraciones = [a.ocupacion.proxima_expiracion for a in areas
+                        if a.ocupacion.proxima_expiracion is not None]
+        data = serialize_area_status(areas)
+
+        previous = self._snapshot
+        counts = [{k: v for k, v in item.items() if k != 'fecha'} for item in data]
+        if previous is not None and previous['counts'] == counts:
+            # Sin cambios visibles: se conservan los mismos bytes y ETags.
+            self._stats['unchanged'] += 1
+            return dict(previous, version=version,
+                        expira=min(expiraciones) if expiraciones else None)
+
+        body = _render(data)
+        by_area: Dict[int, dict] = {}
+        for item in data:
+            area_body = _render(item)
+            by_area[item['area_id']] = {'body': area_body, 'etag': _etag(area_body)}
+        self._stats['rebuilds'] += 1
+        return {
+            'version': version,
+            'counts': counts,
+            'body': body,
+            'etag': _etag(body),
+            'by_area': by_area,
+            'expira': min(expiraciones) if expiraciones else None,
+        }
+
+    def current(self) -> dict:
+        if not self._stale():
+            self._stats['hits'] += 1
+            return self._snapshot
+        with self._lock:
+            if self._stale():
+                version = occupancy.version()
+                self._snapshot = self._build(version)
+                self._built_version = version
+                self._built_at = time.monotonic()
+            else:
+                self._stats['hits'] += 1
+            return self._snapshot
+
+    def area(self, area_id: int) -> Optional[dict]:
+        return self.current()['by_area'].get(area_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
+    def stats(self) -> dict:
+        snapshot = self._snapshot
+        return dict(self._stats, version=snapshot['version'] if snapshot else None,
+                    etag=snapshot['etag'] if snapshot else None)
+
+
+availability_snapshot = AvailabilitySnapshot()
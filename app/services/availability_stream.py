@@ -0,0 +1,209 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from django.db import close_old_connections
+
+from app.services import occupancy
+from app.services.availability_snapshot import availability_snapshot
+
+
+def _message(event_id: str, event: str, data: bytes) -> bytes:
+    return b''.join([
+        b'id: ', event_id.encode(), b'\nevent: ', event.encode(),
+        b'\ndata: ', data, b'\n\n',
+    ])
+
+
+class _Subscriber:
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.resync = False
+
+
+class AvailabilityStream:
+    """Difunde por SSE los cambios de disponibilidad por área.
+
+    Un hilo publicador despierta con cada cambio confirmado de ocupación, compara
+    la instantánea de ``availability_snapshot`` contra lo ya enviado y emite un
+    ``delta`` por área modificada, como máximo uno por área cada ``interval``
+    segundos (los cambios intermedios se fusionan). Los últimos eventos se guardan
+    para reanudar con ``Last-Event-ID``.
+    """
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        backlog: Optional[int] = None,
+        queue_size: int = 256,
+        idle_timeout: float = 60.0,
+    ) -> None:
+        self.interval = interval if interval is not None else float(
+            os.getenv('AVAILABILITY_STREAM_INTERVAL', '1'))
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        self.epoch = uuid.uuid4().hex[:8]
+
+        self._backlog = deque(maxlen=backlog or int(
+            os.getenv('AVAILABILITY_STREAM_BACKLOG', '1000')))
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._subscribers = set()
+        self._thread = None
+        self._seq = 0
+        self._etag = None
+        self._published: Dict[int, str] = {}
+        self._pending: Dict[int, Tuple[Optional[str], bytes]] = {}
+        self._last_sent: Dict[int, float] = {}
+        self._stats = {'events': 0, 'coalesced': 0, 'resyncs': 0, 'resumes': 0}
+        occupancy.add_listener(self._on_change)
+
+    def _on_change(self, version: int) -> None:
+        self._changed.set()
+
+    def _event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def _snapshot_message(self) -> bytes:
+        snapshot = availability_snapshot.current()
+        return _message(self._event_id(self._seq), 'snapshot',
+                        b'{"areas":' + snapshot['body'] + b'}')
+
+    def _replay(self, last_event_id: Optional[str]) -> Optional[List[bytes]]:
+        if not last_event_id:
+            return None
+        epoch, _, seq = last_event_id.rpartition('-')
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        if seq < self._seq and (not self._backlog or self._backlog[0][0] > seq + 1):
+            return None
+        return [msg for event_seq, msg in self._backlog if event_seq > seq]
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        snapshot = availability_snapshot.current()
+        if self._etag != snapshot['etag']:
+            # Hubo cambios sin publicador activo: el historial ya no sirve para reanudar
+            # y una nueva época hace que los ids viejos reciban una instantánea.
+            self.epoch = uuid.uuid4().hex[:8]
+            self._backlog.clear()
+            self._pending.clear()
+            self._etag = snapshot['etag']
+            self._published = {area_id: area['etag']
+                               for area_id, area in snapshot['by_area'].items()}
+        self._thread = threading.Thread(
+            target=self._run, name='availability-stream', daemon=True)
+        self._thread.start()
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[_Subscriber, List[bytes]]:
+        """Registra un cliente y devuelve los mensajes iniciales (instantánea o pendientes)."""
+        with self._lock:
+            self._ensure_started()
+            subscriber = _Subscriber(self.queue_size)
+            self._subscribers.add(subscriber)
+            replay = self._replay(last_event_id)
+            if replay is not None:
+                self._stats['resumes'] += 1
+                return subscriber, replay
+            return subscriber, [self._snapshot_message()]
+
+    def unsubscribe(self, subscriber: _Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def resync(self, subscriber: _Subscriber) -> bytes:
+        """Vacía la cola de un cliente atrasado y le entrega una instantánea nueva."""
+        with self._lock:
+            subscriber.resync = False
+            while True:
+                try:
+                    subscriber.queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._stats['resyncs'] += 1
+            return self._snapshot_message()
+
+    def _fanout(self, msg: bytes) -> None:
+        for subscriber in self._subscribers:
+            if subscriber.resync:
+                continue
+            try:
+                subscriber.queue.put_nowait(msg)
+            except queue.Full:
+                subscriber.resync = True
+
+    def _collect(self) -> None:
+        snapshot = availability_snapshot.current()
+        if snapshot['etag'] == self._etag:
+            return
+        self._etag = snapshot['etag']
+        for area_id, area in snapshot['by_area'].items():
+            if self._published.get(area_id) == area['etag']:
+                self._pending.pop(area_id, None)
+                continue
+            if area_id in self._pending:
+                self._stats['coalesced'] += 1
+            self._pending[area_id] = (area['etag'], area['body'])
+        for area_id in set(self._published) - set(snapshot['by_area']):
+            body = json.dumps({'area_id': area_id, 'eliminada': True}).encode()
+            self._pending[area_id] = (None, body)
+
+    def _publish(self) -> None:
+        self._collect()
+        now = time.monotonic()
+        with self._lock:
+            for area_id, (etag, body) in list(self._pending.items()):
+                if now - self._last_sent.get(area_id, float('-inf')) < self.interval:
+                    continue
+                del self._pending[area_id]
+                self._last_sent[area_id] = now
+                if etag is None:
+                    self._published.pop(area_id, None)
+                else:
+                    self._published[area_id] = etag
+                self._seq += 1
+                msg = _message(self._event_id(self._seq), 'delta', body)
+                self._backlog.append((self._seq, msg))
+                self._stats['events'] += 1
+                self._fanout(msg)
+
+    def _run(self) -> None:
+        idle_since = None
+        while True:
+            self._changed.wait(timeout=self.interval)
+            self._changed.clear()
+            with self._lock:
+                if self._subscribers:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since > self.idle_timeout:
+                    self._thread = None
+                    return
+            try:
+                self._publish()
+            except Exception as exc:
+                print(f"Error publicando disponibilidad: {exc}")
+            finally:
+                close_old_connections()
+
+    def close(self) -> None:
+        """Deja de escuchar los cambios de ocupación; el hilo termina al quedar inactivo."""
+        occupancy.remove_listener(self._on_change)
+        self._changed.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats, subscribers=len(self._subscribers),
+                        last_event_id=self._event_id(self._seq), pending=len(self._pending))
+
+
+availability_stream = AvailabilityStream()
@@ -0,0 +1,237 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Min, Q, Value
+from django.db.models.functions import Coalesce, Least
+from django.utils import timezone
+
+from app.models import Area, Espacio, OcupacionArea
+from app.services.space_allocator import space_allocator
+
+ESTADO_FIELD = {
+    Espacio.Estado.LIBRE: 'libres',
+    Espacio.Estado.OCUPADO: 'ocupados',
+    Espacio.Estado.RESERVADO: 'reservados',
+}
+COUNTER_FIELDS = ('total', 'libres', 'ocupados', 'reservados', 'proxima_expiracion')
+
+_version = 0
+_version_lock = threading.Lock()
+_listeners: List[Callable[[int], None]] = []
+
+
+def _bump_version() -> None:
+    global _version
+    with _version_lock:
+        _version += 1
+        current = _version
+    for listener in list(_listeners):
+        listener(current)
+
+
+def add_listener(listener: Callable[[int], None]) -> None:
+    """Registra una función que recibe la nueva versión tras cada cambio confirmado."""
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[int], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def version() -> int:
+    """Número que aumenta cada vez que se confirma un cambio de ocupación."""
+    return _version
+
+
+def mark_changed() -> None:
+    transaction.on_commit(_bump_version)
+
+
+def adjust(area_id: Optional[int], deltas: Dict[str, int], total: int = 0,
+           expira=None) -> None:
+    """Aplica ``deltas`` ({estado: n}) a los contadores del área con ``F()``.
+
+    Debe llamarse en la misma transacción que el cambio de ``Espacio.estado``. Si
+    el área aún no tiene fila de contadores se recalcula desde ``Espacio``.
+    """
+    if area_id is None:
+        return
+    updates = {}
+    for estado, n in deltas.items():
+        if n:
+            field = ESTADO_FIELD[estado]
+            updates[field] = F(field) + n
+    if total:
+        updates['total'] = F('total') + total
+    if expira is not None:
+        value = Value(expira, output_field=DateTimeField())
+        updates['proxima_expiracion'] = Least(Coalesce('proxima_expiracion', value), value)
+    if not updates:
+        return
+    if not OcupacionArea.objects.filter(area_id=area_id).update(
+            fecha_modificacion=timezone.now(), **updates):
+        reconcile([area_id])
+    mark_changed()
+
+
+def transition(espacio_ids: Iterable[int], nuevo_estado: str, previos: Dict[str, Optional[Q]],
+               **fields) -> int:
+    """Cambia el estado de ``espacio_ids`` y ajusta los contadores en una transacción.
+
+    ``previos`` indica desde qué estados se permite el cambio y una condición
+    adicional opcional para cada uno. Cada UPDATE condicional devuelve cuántas
+    filas cambiaron realmente, así los contadores no dependen de lecturas previas.
+    """
+    espacio_ids = list(espacio_ids)
+    if not espacio_ids:
+        return 0
+    fields.setdefault('fecha_modificacion', timezone.now())
+    changed = 0
+    with transaction.atomic():
+        by_area = defaultdict(list)
+        for espacio_id, area_id in Espacio.objects.filter(
+                id__in=espacio_ids).values_list('id', 'area_id'):
+            by_area[area_id].append(espacio_id)
+
+        for area_id, ids in by_area.items():
+            deltas = defaultdict(int)
+            for previo, condicion in previos.items():
+                qs = Espacio.objects.filter(id__in=ids, estado=previo)
+                if condicion is not None:
+                    qs = qs.filter(condicion)
+                n = qs.update(estado=nuevo_estado, **fields)
+                deltas[previo] -= n
+                deltas[nuevo_estado] += n
+                changed += n
+            adjust(area_id, deltas)
+    return changed
+
+
+def _count(area_ids: Optional[List[int]] = None) -> Dict[int, dict]:
+    """Cuenta los espacios de cada área por estado, tal como están en ``Espacio``."""
+    espacios = Espacio.objects.filter(area__isnull=False)
+    if area_ids is not None:
+        espacios = espacios.filter(area_id__in=area_ids)
+    counts = {}
+    for row in espacios.values('area_id').annotate(
+            total=Count('id'),
+            libres=Count('id', filter=Q(estado=Espacio.Estado.LIBRE)),
+            ocupados=Count('id', filter=Q(estado=Espacio.Estado.OCUPADO)),
+            reservados=Count('id', filter=Q(estado=Espacio.Estado.RESERVADO)),
+            proxima_expiracion=Min('reservado_hasta', filter=Q(
+                estado=Espacio.Estado.RESERVADO)),
+    ).order_by():
+        counts[row.pop('area_id')] = row
+    return counts
+
+
+def _counter_values(real: dict) -> dict:
+    values = {field: real.get(field) or 0 for field in COUNTER_FIELDS[:-1]}
+    values['proxima_expiracion'] = real.get('proxima_expiracion')
+    return values
+
+
+def create_counters(area_id: int) -> None:
+    """Crea la fila de contadores de un área nueva (sin espacios todavía)."""
+    OcupacionArea.objects.get_or_create(area_id=area_id)
+
+
+def reconcile(area_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """Recalcula los contadores desde ``Espacio``; devuelve las diferencias corregidas.
+
+    Las áreas sin fila de contadores se crean sin contarse como diferencia.
+    """
+    areas = Area.objects.all()
+    if area_ids is not None:
+        area_ids = list(area_ids)
+        areas = areas.filter(id__in=area_ids)
+
+    with transaction.atomic():
+        counts = _count(area_ids)
+        current = {
+            row['area_id']: row
+            for row in OcupacionArea.objects.filter(
+                area_id__in=areas.values('id')).values('area_id', *COUNTER_FIELDS)
+        }
+
+        rows = []
+        drift = []
+        now = timezone.now()
+        for area_id in areas.values_list('id', flat=True):
+            values = _counter_values(counts.get(area_id, {}))
+            stored = current.get(area_id)
+            if stored is not None and any(stored[f] != values[f] for f in COUNTER_FIELDS[:-1]):
+                drift.append({
+                    'area_id': area_id,
+                    'antes': {f: stored[f] for f in COUNTER_FIELDS[:-1]},
+                    'despues': {f: values[f] for f in COUNTER_FIELDS[:-1]},
+                })
+            rows.append(OcupacionArea(area_id=area_id, fecha_modificacion=now, **values))
+
+        if rows:
+            OcupacionArea.objects.bulk_create(
+                rows, update_conflicts=True, unique_fields=['area'],
+                update_fields=list(COUNTER_FIELDS) + ['fecha_modificacion'])
+            mark_changed()
+    return drift
+
+
+def expire_due(area_ids: Iterable[int], now=None) -> List[int]:
+    """Libera las reservas vencidas de ``area_ids`` y recalcula su próxima expiración."""
+    now = now or timezone.now()
+    expired = []
+    with transaction.atomic():
+        for area_id in area_ids:
+            ids = list(Espacio.objects.filter(
+                area_id=area_id, estado=Espacio.Estado.RESERVADO,
+                reservado_hasta__lt=now).values_list('id', flat=True))
+            transition(ids, Espacio.Estado.LIBRE,
+                       {Espacio.Estado.RESERVADO: Q(reservado_hasta__lt=now)},
+                       reservado_hasta=None, reservado_para=None, reserva_token=None)
+            proxima = Espacio.objects.filter(
+                area_id=area_id, estado=Espacio.Estado.RESERVADO,
+            ).aggregate(proxima=Min('reservado_hasta'))['proxima']
+            OcupacionArea.objects.filter(area_id=area_id).update(proxima_expiracion=proxima)
+            expired.extend(ids)
+        mark_changed()
+    space_allocator.sync(expired)
+    return expired
+
+
+def _ocupacion(area: Area) -> Optional[OcupacionArea]:
+    try:
+        return area.ocupacion
+    except OcupacionArea.DoesNotExist:
+        return None
+
+
+def areas_with_counters(areas=None) -> List[Area]:
+    """Áreas con ``area.ocupacion`` cargada en una sola consulta.
+
+    Antes de responder vence las reservas caducadas de las áreas afectadas. Un área
+    sin fila de contadores (creada fuera del ORM) se cuenta desde ``Espacio`` sin
+    guardar nada; ``reconcile_occupancy`` crea la fila.
+    """
+    qs = (areas if areas is not None else Area.objects.all()).select_related('ocupacion')
+    result = list(qs)
+    now = timezone.now()
+    due = []
+    for area in result:
+        ocupacion = _ocupacion(area)
+        if ocupacion and ocupacion.proxima_expiracion and ocupacion.proxima_expiracion <= now:
+            due.append(area.id)
+    if due:
+        expire_due(due, now)
+        result = list(qs.all())
+
+    missing = [area for area in result if _ocupacion(area) is None]
+    if missing:
+        counts = _count([area.id for area in missing])
+        for area in missing:
+            area.ocupacion = OcupacionArea(
+                area=area, **_counter_values(counts.get(area.id, {})))
+    return result
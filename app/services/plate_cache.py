@@ -0,0 +1,98 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from app.models import Vehiculo
+
+_MISSING = object()
+
+
+class PlateCache:
+
+    def __init__(self, max_size: Optional[int] = None) -> None:
+        self.max_size = max_size or int(os.getenv('PLATE_CACHE_SIZE', '1024'))
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Optional[Vehiculo]]" = OrderedDict()
+        self._by_usuario: Dict[int, Set[str]] = {}
+        # Aumenta con cada invalidación; una lectura de BD que empezó antes no se guarda.
+        self._generation = 0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'invalidations': 0,
+            'evictions': 0,
+            'stale_reads': 0,
+        }
+
+    def get(self, placa: str) -> Optional[Vehiculo]:
+        with self._lock:
+            vehiculo = self._entries.get(placa, _MISSING)
+            if vehiculo is not _MISSING:
+                self._entries.move_to_end(placa)
+                self._stats['hits'] += 1
+                return vehiculo
+            self._stats['misses'] += 1
+            generation = self._generation
+
+        vehiculo = Vehiculo.objects.select_related(
+            'usuario__area').filter(placa=placa).first()
+
+        with self._lock:
+            if generation != self._generation:
+                self._stats['stale_reads'] += 1
+                return vehiculo
+            self._entries[placa] = vehiculo
+            self._entries.move_to_end(placa)
+            if vehiculo is not None and vehiculo.usuario_id:
+                self._by_usuario.setdefault(vehiculo.usuario_id, set()).add(placa)
+            while len(self._entries) > self.max_size:
+                self._evict(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+        return vehiculo
+
+    def _evict(self, placa: str) -> None:
+        vehiculo = self._entries.pop(placa, None)
+        if vehiculo is not None and vehiculo.usuario_id:
+            placas = self._by_usuario.get(vehiculo.usuario_id)
+            if placas is not None:
+                placas.discard(placa)
+                if not placas:
+                    del self._by_usuario[vehiculo.usuario_id]
+
+    def invalidate_placa(self, *placas: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for placa in placas:
+                if placa in self._entries:
+                    self._evict(placa)
+                    self._stats['invalidations'] += 1
+
+    def invalidate_vehiculo(self, vehiculo_id: int) -> None:
+        with self._lock:
+            stale = [placa for placa, veh in self._entries.items()
+                     if veh is not None and veh.id == vehiculo_id]
+        self.invalidate_placa(*stale)
+
+    def invalidate_usuario(self, usuario_id: int) -> None:
+        with self._lock:
+            stale = list(self._by_usuario.get(usuario_id, ()))
+        self.invalidate_placa(*stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_usuario.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+            stats['max_size'] = self.max_size
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+plate_cache = PlateCache()
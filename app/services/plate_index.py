@@ -0,0 +1,171 @@
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.models import Vehiculo
+
+CONFUSABLE_CHARS = str.maketrans({
+    'O': '0', 'Q': '0', 'D': '0',
+    'I': '1', 'L': '1',
+    'B': '8',
+    'S': '5',
+    'Z': '2',
+    'G': '6',
+})
+
+MAX_INDEX_DISTANCE = 2
+
+
+def normalize_plate(text: str) -> str:
+    return ''.join(ch for ch in (text or '') if ch.isalnum()).upper()
+
+
+def canonical_plate(text: str) -> str:
+    return normalize_plate(text).translate(CONFUSABLE_CHARS)
+
+
+def edit_distance(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    if a == b:
+        return 0
+    if max_distance is not None and abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def _deletes(key: str, depth: int) -> set:
+    variants = {key}
+    frontier = {key}
+    for _ in range(depth):
+        frontier = {v[:i] + v[i + 1:] for v in frontier for i in range(len(v))}
+        variants |= frontier
+    return variants
+
+
+class PlateIndex:
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._variants: Dict[str, Set[str]] = {}
+        self._by_canonical: Dict[str, Dict[int, str]] = {}
+        self._by_vehicle: Dict[int, str] = {}
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._variants = {}
+            self._by_canonical = {}
+            self._by_vehicle = {}
+            for vehiculo_id, placa in Vehiculo.objects.values_list('id', 'placa').iterator():
+                self._add(vehiculo_id, placa)
+            self._loaded = True
+
+    def _add(self, vehiculo_id: int, placa: str) -> None:
+        canonical = canonical_plate(placa)
+        if not canonical:
+            return
+        self._by_vehicle[vehiculo_id] = placa
+        bucket = self._by_canonical.setdefault(canonical, {})
+        if not bucket:
+            for variant in _deletes(canonical, MAX_INDEX_DISTANCE):
+                self._variants.setdefault(variant, set()).add(canonical)
+        bucket[vehiculo_id] = placa
+
+    def _remove(self, vehiculo_id: int) -> None:
+        placa = self._by_vehicle.pop(vehiculo_id, None)
+        if placa is None:
+            return
+        canonical = canonical_plate(placa)
+        bucket = self._by_canonical.get(canonical)
+        if bucket is None:
+            return
+        bucket.pop(vehiculo_id, None)
+        if not bucket:
+            del self._by_canonical[canonical]
+            for variant in _deletes(canonical, MAX_INDEX_DISTANCE):
+                keys = self._variants.get(variant)
+                if keys is not None:
+                    keys.discard(canonical)
+                    if not keys:
+                        del self._variants[variant]
+
+    def upsert(self, vehiculo_id: int, placa: str) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(vehiculo_id)
+            self._add(vehiculo_id, placa)
+
+    def remove(self, vehiculo_id: int) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(vehiculo_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def search(self, placa: str, max_distance: int = 1, limit: int = 5) -> List[dict]:
+        self._ensure_loaded()
+        query = normalize_plate(placa)
+        canonical = query.translate(CONFUSABLE_CHARS)
+        if not canonical:
+            return []
+
+        max_distance = min(max_distance, MAX_INDEX_DISTANCE)
+        with self._lock:
+            keys = set()
+            for variant in _deletes(canonical, max_distance):
+                keys |= self._variants.get(variant, set())
+
+            candidates = []
+            for key in keys:
+                distance = edit_distance(canonical, key, max_distance)
+                if distance > max_distance:
+                    continue
+                for vehiculo_id, real in self._by_canonical[key].items():
+                    candidates.append({
+                        'vehiculo_id': vehiculo_id,
+                        'placa': real,
+                        'distance': distance,
+                        'raw_distance': edit_distance(query, real),
+                    })
+
+        candidates.sort(key=lambda c: (c['distance'], c['raw_distance'], c['placa']))
+        return candidates[:limit]
+
+    def best_match(self, placa: str, max_distance: int = 1) -> Tuple[Optional[dict], List[dict]]:
+        candidates = self.search(placa, max_distance)
+        if not candidates:
+            return None, candidates
+        best = candidates[0]
+        if len(candidates) > 1 and (
+                candidates[1]['distance'], candidates[1]['raw_distance']) == (
+                best['distance'], best['raw_distance']):
+            return None, candidates
+        return best, candidates
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'vehicles': len(self._by_vehicle),
+                'plates': len(self._by_canonical),
+                'variants': len(self._variants),
+            }
+
+
+plate_index = PlateIndex()
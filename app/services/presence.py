@@ -0,0 +1,107 @@
+from typing import Iterable, Optional
+
+from django.db.models import Count
+
+from app.models import Acceso, Espacio, Presencia
+
+_UPDATE_FIELDS = ['usuario', 'area', 'espacio', 'acceso', 'fecha_entrada']
+
+
+def _presence_row(vehiculo_id: int, usuario_id: Optional[int], area_id: Optional[int],
+                  espacio_id: Optional[int], acceso_id: Optional[int], fecha) -> Presencia:
+    return Presencia(
+        vehiculo_id=vehiculo_id,
+        usuario_id=usuario_id,
+        area_id=area_id,
+        espacio_id=espacio_id,
+        acceso_id=acceso_id,
+        fecha_entrada=fecha,
+    )
+
+
+def _upsert(rows: list) -> None:
+    if rows:
+        Presencia.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['vehiculo'],
+            update_fields=_UPDATE_FIELDS)
+
+
+def apply_accesses(accesos: Iterable[Acceso], espacios: dict) -> None:
+    """Actualiza Presencia con un lote de accesos ya guardados (en orden).
+
+    Debe llamarse dentro de la transacción que guarda los accesos. ``espacios``
+    relaciona el id del acceso con el cajón asignado en la entrada.
+    """
+    last = {}
+    for acceso in accesos:
+        if acceso.vehiculo_id:
+            last[acceso.vehiculo_id] = acceso
+
+    salidas = [vid for vid, acceso in last.items() if acceso.tipo == Acceso.Tipo.SALIDA]
+    if salidas:
+        Presencia.objects.filter(vehiculo_id__in=salidas).delete()
+
+    rows = []
+    for vehiculo_id, acceso in last.items():
+        if acceso.tipo != Acceso.Tipo.ENTRADA:
+            continue
+        espacio = espacios.get(acceso.id)
+        usuario = acceso.usuario
+        area_id = espacio.area_id if espacio else (usuario.area_id if usuario else None)
+        rows.append(_presence_row(
+            vehiculo_id, acceso.usuario_id, area_id,
+            espacio.id if espacio else None, acceso.id, acceso.fecha))
+    _upsert(rows)
+
+
+def presence_by_area() -> dict:
+    """Vehículos dentro por área con un solo recorrido del índice de ``area``."""
+    rows = list(Presencia.objects.values('area_id')
+                .annotate(dentro=Count('id')).order_by('area_id'))
+    return {
+        'total': sum(row['dentro'] for row in rows),
+        'areas': rows,
+    }
+
+
+def rebuild_presence(batch_size: int = 1000) -> int:
+    """Recalcula Presencia desde el historial de Acceso en una sola pasada.
+
+    Recorre los accesos ordenados por (vehículo, fecha) con un iterador, por lo
+    que solo mantiene en memoria el último evento del vehículo en curso. Debe
+    ejecutarse dentro de una transacción.
+    """
+    reservas = {
+        row['reservado_para_id']: (row['id'], row['area_id'])
+        for row in Espacio.objects.filter(
+            estado=Espacio.Estado.RESERVADO, reservado_para__isnull=False,
+        ).values('id', 'area_id', 'reservado_para_id')
+    }
+
+    Presencia.objects.all().delete()
+    rows = []
+    total = 0
+
+    def flush_vehicle(row):
+        if row is None or row['tipo'] != Acceso.Tipo.ENTRADA:
+            return
+        espacio_id, area_id = reservas.get(row['vehiculo_id'], (None, row['usuario__area_id']))
+        rows.append(_presence_row(
+            row['vehiculo_id'], row['usuario_id'], area_id, espacio_id, row['id'], row['fecha']))
+
+    history = (Acceso.objects.filter(vehiculo__isnull=False)
+               .order_by('vehiculo_id', 'fecha', 'id')
+               .values('id', 'vehiculo_id', 'usuario_id', 'usuario__area_id', 'tipo', 'fecha'))
+    current = None
+    for row in history.iterator(chunk_size=batch_size):
+        if current is not None and row['vehiculo_id'] != current['vehiculo_id']:
+            flush_vehicle(current)
+            if len(rows) >= batch_size:
+                total += len(rows)
+                _upsert(rows)
+                rows = []
+        current = row
+    flush_vehicle(current)
+    total += len(rows)
+    _upsert(rows)
+    return total
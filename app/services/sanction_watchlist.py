@@ -0,0 +1,100 @@
+import threading
+from typing import Dict, List, Optional
+
+from app.models import Sancion
+
+WATCHED_GRAVEDADES = (Sancion.Gravedad.GRAVE, Sancion.Gravedad.CRITICA)
+
+
+class SanctionWatchlist:
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._by_vehiculo: Dict[int, Dict[int, dict]] = {}
+        self._by_usuario: Dict[int, Dict[int, dict]] = {}
+        self._sanciones: Dict[int, dict] = {}
+        self._loaded = False
+        self.matches = 0
+
+    def ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            self._by_vehiculo = {}
+            self._by_usuario = {}
+            self._sanciones = {}
+            for sancion in Sancion.objects.filter(gravedad__in=WATCHED_GRAVEDADES).iterator():
+                self._add(sancion)
+            self._loaded = True
+
+    def _add(self, sancion: Sancion) -> None:
+        entry = {
+            'id': sancion.id,
+            'gravedad': sancion.gravedad,
+            'motivo': sancion.motivo,
+            'fecha': sancion.fecha.isoformat() if sancion.fecha else None,
+            'vehiculo_id': sancion.vehiculo_id,
+            'usuario_id': sancion.usuario_id,
+        }
+        self._sanciones[sancion.id] = entry
+        if sancion.vehiculo_id:
+            self._by_vehiculo.setdefault(sancion.vehiculo_id, {})[sancion.id] = entry
+        if sancion.usuario_id:
+            self._by_usuario.setdefault(sancion.usuario_id, {})[sancion.id] = entry
+
+    def _remove(self, sancion_id: int) -> None:
+        entry = self._sanciones.pop(sancion_id, None)
+        if entry is None:
+            return
+        for index, key in ((self._by_vehiculo, entry['vehiculo_id']),
+                           (self._by_usuario, entry['usuario_id'])):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.pop(sancion_id, None)
+                if not bucket:
+                    del index[key]
+
+    def upsert(self, sancion: Sancion) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(sancion.id)
+            if sancion.gravedad in WATCHED_GRAVEDADES:
+                self._add(sancion)
+
+    def remove(self, sancion_id: int) -> None:
+        if not self._loaded:
+            return
+        with self._lock:
+            self._remove(sancion_id)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def check(self, vehiculo_id: Optional[int], usuario_id: Optional[int] = None) -> List[dict]:
+        self.ensure_loaded()
+        found = {}
+        with self._lock:
+            if vehiculo_id:
+                found.update(self._by_vehiculo.get(vehiculo_id, {}))
+            if usuario_id:
+                found.update(self._by_usuario.get(usuario_id, {}))
+            if found:
+                self.matches += 1
+        return sorted(found.values(), key=lambda e: e['id'])
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'sanciones': len(self._sanciones),
+                'vehiculos': len(self._by_vehiculo),
+                'usuarios': len(self._by_usuario),
+                'matches': self.matches,
+            }
+
+
+sanction_watchlist = SanctionWatchlist()
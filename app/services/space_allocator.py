@@ -0,0 +1,190 @@
+import heapq
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from django.utils import timezone
+
+from app.models import Espacio
+
+GENERAL = 'general'
+ACCESIBLE = 'accesible'
+
+
+def _priority(meta: dict, mode: str) -> tuple:
+    if mode == 'distancia':
+        distancia = meta['distancia']
+        return (distancia is None, distancia or 0.0, meta['clave'])
+    return (meta['clave'],)
+
+
+class SpaceAllocator:
+
+    def __init__(self, priority: Optional[str] = None) -> None:
+        self.priority = (priority or os.getenv('SPACE_PRIORITY', 'clave')).lower()
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._meta: Dict[int, dict] = {}
+        self._free: Dict[int, bool] = {}
+        self._reserved_until: Dict[int, float] = {}
+        self._heaps: Dict[int, Dict[str, list]] = {}
+        self._expiring: list = []
+        self._areas: List[int] = []
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self._rebuild()
+
+    def _rebuild(self) -> None:
+        self._meta = {}
+        self._free = {}
+        self._reserved_until = {}
+        self._heaps = {}
+        self._expiring = []
+
+        rows = Espacio.objects.values(
+            'id', 'clave', 'estado', 'discapacitado', 'distancia_entrada',
+            'reservado_hasta', 'area_id', 'area__nombre')
+        for row in rows.iterator():
+            self._store(row)
+        self._areas = sorted(self._heaps)
+        self._loaded = True
+
+    def _store(self, row: dict) -> None:
+        espacio_id = row['id']
+        meta = {
+            'id': espacio_id,
+            'clave': row['clave'],
+            'area_id': row['area_id'],
+            'area_nombre': row['area__nombre'],
+            'distancia': row['distancia_entrada'],
+            'pool': ACCESIBLE if row['discapacitado'] else GENERAL,
+        }
+        meta['key'] = _priority(meta, self.priority)
+        self._meta[espacio_id] = meta
+        if meta['area_id'] is not None and meta['area_id'] not in self._heaps:
+            self._heaps[meta['area_id']] = {GENERAL: [], ACCESIBLE: []}
+            self._areas = sorted(self._heaps)
+
+        reservado_hasta = row['reservado_hasta']
+        if row['estado'] == Espacio.Estado.RESERVADO and reservado_hasta:
+            self._mark_reserved(espacio_id, reservado_hasta.timestamp())
+        elif row['estado'] == Espacio.Estado.OCUPADO:
+            self._mark_taken(espacio_id)
+        else:
+            self._mark_free(espacio_id)
+
+    def _mark_free(self, espacio_id: int) -> None:
+        meta = self._meta.get(espacio_id)
+        self._reserved_until.pop(espacio_id, None)
+        if meta is None or meta['area_id'] is None or self._free.get(espacio_id):
+            return
+        self._free[espacio_id] = True
+        heap = self._heaps[meta['area_id']][meta['pool']]
+        heapq.heappush(heap, (meta['key'], espacio_id))
+        if len(heap) > 4 * len(self._meta) + 64:
+            heap[:] = [(k, i) for k, i in heap if self._free.get(i)]
+            heapq.heapify(heap)
+
+    def _mark_taken(self, espacio_id: int) -> None:
+        self._free[espacio_id] = False
+        self._reserved_until.pop(espacio_id, None)
+
+    def _mark_reserved(self, espacio_id: int, until: float) -> None:
+        self._free[espacio_id] = False
+        self._reserved_until[espacio_id] = until
+        heapq.heappush(self._expiring, (until, espacio_id))
+
+    def _expire_reservations(self) -> None:
+        now = timezone.now().timestamp()
+        while self._expiring and self._expiring[0][0] < now:
+            until, espacio_id = heapq.heappop(self._expiring)
+            if self._reserved_until.get(espacio_id) == until:
+                self._mark_free(espacio_id)
+
+    def _area_order(self, usuario) -> List[int]:
+        area_id = getattr(usuario, 'area_id', None)
+        if area_id in self._heaps:
+            return [area_id] + [a for a in self._areas if a != area_id]
+        return list(self._areas)
+
+    def _pools(self, usuario) -> tuple:
+        if getattr(usuario, 'discapacitado', False):
+            return (ACCESIBLE, GENERAL)
+        return (GENERAL,)
+
+    def _first_free(self, usuario, pop: bool) -> Optional[dict]:
+        self._ensure_loaded()
+        with self._lock:
+            self._expire_reservations()
+            for area_id in self._area_order(usuario):
+                for pool in self._pools(usuario):
+                    heap = self._heaps[area_id][pool]
+                    while heap:
+                        key, espacio_id = heap[0]
+                        meta = self._meta.get(espacio_id)
+                        if (not self._free.get(espacio_id) or meta is None or meta['key'] != key
+                                or meta['area_id'] != area_id or meta['pool'] != pool):
+                            heapq.heappop(heap)
+                            continue
+                        if pop:
+                            heapq.heappop(heap)
+                            self._free[espacio_id] = False
+                        return meta
+        return None
+
+    def peek(self, usuario=None) -> Optional[dict]:
+        return self._first_free(usuario, pop=False)
+
+    def take(self, usuario=None) -> Optional[dict]:
+        return self._first_free(usuario, pop=True)
+
+    def reserved(self, espacio_id: int, until) -> None:
+        with self._lock:
+            if self._loaded:
+                self._mark_reserved(espacio_id, until.timestamp())
+
+    def sync(self, espacio_ids: Iterable[int]) -> None:
+        espacio_ids = list(espacio_ids)
+        if not self._loaded or not espacio_ids:
+            return
+        rows = list(Espacio.objects.filter(id__in=espacio_ids).values(
+            'id', 'clave', 'estado', 'discapacitado', 'distancia_entrada',
+            'reservado_hasta', 'area_id', 'area__nombre'))
+        with self._lock:
+            found = set()
+            for row in rows:
+                found.add(row['id'])
+                self._free.pop(row['id'], None)
+                self._store(row)
+            for espacio_id in set(espacio_ids) - found:
+                self._meta.pop(espacio_id, None)
+                self._free.pop(espacio_id, None)
+                self._reserved_until.pop(espacio_id, None)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded = False
+
+    def stats(self) -> dict:
+        self._ensure_loaded()
+        with self._lock:
+            self._expire_reservations()
+            libres = {}
+            for espacio_id, free in self._free.items():
+                meta = self._meta.get(espacio_id)
+                if free and meta and meta['area_id'] is not None:
+                    libres[meta['area_id']] = libres.get(meta['area_id'], 0) + 1
+            return {
+                'priority': self.priority,
+                'spaces': len(self._meta),
+                'free': sum(libres.values()),
+                'reserved': len(self._reserved_until),
+                'free_by_area': libres,
+            }
+
+
+space_allocator = SpaceAllocator()
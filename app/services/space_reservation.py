@@ -0,0 +1,149 @@
+import os
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+from django.db import transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.utils import timezone
+
+from app.models import Espacio
+from app.services import occupancy
+from app.services.space_allocator import space_allocator
+
+
+def reservation_ttl() -> timedelta:
+    return timedelta(seconds=float(os.getenv('SPACE_RESERVATION_SECONDS', '900')))
+
+
+def free_space_q(now=None, prefix: str = '') -> Q:
+    now = now or timezone.now()
+    return Q(**{f'{prefix}estado': Espacio.Estado.LIBRE}) | Q(**{
+        f'{prefix}estado': Espacio.Estado.RESERVADO,
+        f'{prefix}reservado_hasta__lt': now,
+    })
+
+
+def _candidates(usuario, now):
+    qs = Espacio.objects.filter(free_space_q(now))
+    if not getattr(usuario, 'discapacitado', False):
+        qs = qs.filter(discapacitado=False)
+    area_id = getattr(usuario, 'area_id', None)
+    if area_id:
+        return qs.annotate(fuera_de_area=Case(
+            When(area_id=area_id, then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )).order_by('fuera_de_area', '-discapacitado', 'clave')
+    return qs.order_by('-discapacitado', 'clave')
+
+
+def suggest_space(usuario) -> Optional[dict]:
+    if not usuario:
+        return None
+    meta = space_allocator.peek(usuario)
+    if meta is None:
+        return None
+    return {
+        'id': meta['id'],
+        'clave': meta['clave'],
+        'area_id': meta['area_id'],
+        'area_nombre': meta['area_nombre'],
+    }
+
+
+def _reserve(espacio_id: int, vehiculo, until, token: str, now) -> Optional[str]:
+    """UPDATE condicional sobre un cajón libre; devuelve su estado previo si se ganó."""
+    previos = (
+        (Espacio.Estado.LIBRE, Q()),
+        (Espacio.Estado.RESERVADO, Q(reservado_hasta__lt=now)),
+    )
+    for previo, condicion in previos:
+        claimed = Espacio.objects.filter(condicion, id=espacio_id, estado=previo).update(
+            estado=Espacio.Estado.RESERVADO,
+            reservado_hasta=until,
+            reservado_para=vehiculo,
+            reserva_token=token,
+            fecha_modificacion=now,
+        )
+        if claimed:
+            return previo
+    return None
+
+
+def _reserve_and_count(espacio_id: int, area_id, vehiculo, until, token, now) -> bool:
+    with transaction.atomic():
+        previo = _reserve(espacio_id, vehiculo, until, token, now)
+        if previo is None:
+            return False
+        occupancy.adjust(area_id, {previo: -1, Espacio.Estado.RESERVADO: 1}, expira=until)
+    space_allocator.reserved(espacio_id, until)
+    return True
+
+
+def _claim_from_db(usuario, vehiculo, ttl, token, retries) -> Optional[Espacio]:
+    for _ in range(retries):
+        now = timezone.now()
+        candidate = _candidates(usuario, now).values('id', 'area_id').first()
+        if candidate is None:
+            return None
+        if _reserve_and_count(candidate['id'], candidate['area_id'], vehiculo, now + ttl,
+                              token, now):
+            return Espacio.objects.select_related('area').get(id=candidate['id'])
+    return None
+
+
+def _current_reservation(vehiculo) -> Optional[Espacio]:
+    return Espacio.objects.select_related('area').filter(
+        estado=Espacio.Estado.RESERVADO, reservado_para=vehiculo,
+        reservado_hasta__gte=timezone.now()).order_by('id').first()
+
+
+def claim_space(usuario=None, vehiculo=None, ttl: Optional[timedelta] = None,
+                retries: int = 50) -> Optional[Espacio]:
+    # Una ENTRADA repetida del mismo vehículo conserva su reserva vigente en lugar
+    # de apartar un cajón más.
+    if vehiculo is not None:
+        current = _current_reservation(vehiculo)
+        if current is not None:
+            return current
+
+    ttl = ttl or reservation_ttl()
+    token = uuid.uuid4().hex
+    for _ in range(retries):
+        meta = space_allocator.take(usuario)
+        if meta is None:
+            break
+
+        now = timezone.now()
+        try:
+            reserved = _reserve_and_count(
+                meta['id'], meta['area_id'], vehiculo, now + ttl, token, now)
+        except Exception:
+            # take() ya lo sacó de la memoria: si el UPDATE falla (p. ej. BD bloqueada)
+            # se devuelve al asignador o, si tampoco se puede leer, se recarga todo.
+            try:
+                space_allocator.sync([meta['id']])
+            except Exception:
+                space_allocator.invalidate()
+            raise
+        if reserved:
+            return Espacio.objects.select_related('area').get(id=meta['id'])
+        space_allocator.sync([meta['id']])
+
+    return _claim_from_db(usuario, vehiculo, ttl, token, retries)
+
+
+def release_space(vehiculo, espacio_ids: Optional[list] = None) -> int:
+    qs = Espacio.objects.filter(estado=Espacio.Estado.RESERVADO, reservado_para=vehiculo)
+    if espacio_ids is not None:
+        qs = qs.filter(id__in=espacio_ids)
+    ids = list(qs.values_list('id', flat=True))
+    if not ids:
+        return 0
+    released = occupancy.transition(
+        ids, Espacio.Estado.LIBRE,
+        {Espacio.Estado.RESERVADO: Q(reservado_para=vehiculo)},
+        reservado_hasta=None, reservado_para=None, reserva_token=None)
+    space_allocator.sync(ids)
+    return released
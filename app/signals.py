@@ -0,0 +1,80 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from app.models import Area, Espacio, Sancion, Usuario, Vehiculo
+from app.services import occupancy
+from app.services.plate_cache import plate_cache
+from app.services.plate_index import plate_index
+from app.services.sanction_watchlist import sanction_watchlist
+from app.services.space_allocator import space_allocator
+
+
+@receiver(post_save, sender=Vehiculo)
+def vehiculo_saved(sender, instance, **kwargs):
+    plate_index.upsert(instance.id, instance.placa)
+    plate_cache.invalidate_vehiculo(instance.id)
+    plate_cache.invalidate_placa(instance.placa)
+
+
+@receiver(post_delete, sender=Vehiculo)
+def vehiculo_deleted(sender, instance, **kwargs):
+    plate_index.remove(instance.id)
+    plate_cache.invalidate_placa(instance.placa)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def usuario_changed(sender, instance, **kwargs):
+    plate_cache.invalidate_usuario(instance.id)
+
+
+@receiver(post_save, sender=Area)
+@receiver(post_delete, sender=Area)
+def area_changed(sender, instance, **kwargs):
+    if kwargs.get('created'):
+        occupancy.create_counters(instance.id)
+    plate_cache.clear()
+    space_allocator.invalidate()
+    occupancy.mark_changed()
+
+
+@receiver(pre_save, sender=Espacio)
+def espacio_before_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'estado', 'area'} & set(update_fields):
+        instance._ocupacion_previa = (instance.area_id, instance.estado)
+        return
+    # Corre dentro de la transacción de Espacio.save(): la fila queda bloqueada
+    # hasta que los contadores se ajustan en espacio_saved.
+    instance._ocupacion_previa = Espacio.objects.select_for_update().filter(
+        pk=instance.pk).values_list('area_id', 'estado').first() if instance.pk else None
+
+
+@receiver(post_save, sender=Espacio)
+def espacio_saved(sender, instance, created, **kwargs):
+    previa = getattr(instance, '_ocupacion_previa', None)
+    actual = (instance.area_id, instance.estado)
+    expira = instance.reservado_hasta if instance.estado == Espacio.Estado.RESERVADO else None
+    if previa is None:
+        occupancy.adjust(instance.area_id, {instance.estado: 1}, total=1, expira=expira)
+    elif previa != actual:
+        mover = previa[0] != actual[0]
+        occupancy.adjust(previa[0], {previa[1]: -1}, total=-1 if mover else 0)
+        occupancy.adjust(instance.area_id, {instance.estado: 1},
+                         total=1 if mover else 0, expira=expira)
+    space_allocator.sync([instance.id])
+
+
+@receiver(post_delete, sender=Espacio)
+def espacio_deleted(sender, instance, **kwargs):
+    occupancy.adjust(instance.area_id, {instance.estado: -1}, total=-1)
+    space_allocator.sync([instance.id])
+
+
+@receiver(post_save, sender=Sancion)
+def sancion_saved(sender, instance, **kwargs):
+    sanction_watchlist.upsert(instance)
+
+
+@receiver(post_delete, sender=Sancion)
+def sancion_deleted(sender, instance, **kwargs):
+    sanction_watchlist.remove(instance.id)
@@ -1,5 +1,19 @@
+import json
+import os
+import re
+import tempfile
+import threading
+import time
 from datetime import timedelta
-from django.test import TestCase, Client
+from io import StringIO
+from unittest import mock
+import cv2
+import numpy as np
+import torch
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from app.models import (
@@ -9,8 +23,38 @@ from app.models import (
     Vehiculo,
     Acceso,
     Notificacion,
+    Sancion,
+    ChatMessage,
+    Evento,
+    Presencia,
+    AccesoArchivo,
+    OcupacionArea,
 )
-from app.services import availability
+from app.services import availability, occupancy
+from app.detection.camera_connection import CameraConnection, CameraState
+from app.detection.change_detector import FrameChangeDetector
+from app.detection import ocr_engine
+from app.detection.occupancy_smoother import OccupancySmoother
+from app.detection.ocr_worker import OcrWorkerPool
+from app.detection.spot_classifier import SpotClassifier
+from app.detection.gate_region import GateRegion
+from app.detection.plate_detector_service import PlateDetector
+from app.detection.plate_tracker import PlateTrackManager, vote_plate
+from app.detection.resource_scheduler import ResourceScheduler
+from app.detection import thread_limits
+from app.services.access_archive import archive_accesses, iter_access_history
+from app.services.access_dedup import access_dedup
+from app.services.availability_snapshot import availability_snapshot
+from app.services.availability_stream import AvailabilityStream
+from app.services.access_ingest import AccessIngestor, AccessQueueFull, _PendingAccess
+from app.services.access_pipeline import AccessPipeline, record_access
+from app.services.plate_cache import plate_cache
+from app.services.presence import presence_by_area, rebuild_presence
+from app.services.plate_index import plate_index
+from app.services.sanction_watchlist import sanction_watchlist
+from app.services.space_allocator import SpaceAllocator, space_allocator
+from app.services.space_reservation import claim_space
+from app.notification import notification_broker
 
 class AvailabilityUnitTests(TestCase):
     """Pruebas unitarias sobre heurística de disponibilidad y búsqueda de áreas."""
@@ -46,6 +90,65 @@ class AvailabilityUnitTests(TestCase):
         self.assertEqual(info["ocupados"], 1)
         self.assertEqual(info["total"], 2)
 
+    def test_area_counters_follow_state_changes_without_aggregation(self):
+        """Los contadores por área siguen reservas, ediciones y expiraciones."""
+        space_allocator.invalidate()
+        espacios = [Espacio.objects.create(clave=f"N{idx}", area=self.area_norte)
+                    for idx in range(3)]
+        availability.get_area_status()
+        with self.assertNumQueries(1):
+            info = availability.get_area_status(area_id=self.area_norte.id)[0]
+        self.assertEqual((info["libres"], info["ocupados"], info["total"]), (3, 0, 3))
+
+        claim_space()
+        espacios[2].estado = Espacio.Estado.OCUPADO
+        espacios[2].save()
+        info = availability.get_area_status(area_id=self.area_norte.id)[0]
+        self.assertEqual((info["libres"], info["ocupados"], info["reservados"]), (1, 1, 1))
+
+        Espacio.objects.filter(estado=Espacio.Estado.RESERVADO).update(
+            reservado_hasta=timezone.now() - timedelta(seconds=1))
+        OcupacionArea.objects.filter(area=self.area_norte).update(
+            proxima_expiracion=timezone.now() - timedelta(seconds=1))
+        espacios[1].delete()
+        info = availability.get_area_status(area_id=self.area_norte.id)[0]
+        self.assertEqual((info["libres"], info["reservados"], info["total"]), (1, 0, 2))
+        self.assertEqual(occupancy.reconcile(), [])
+
+    def test_reconcile_corrects_counter_drift(self):
+        """La reconciliación detecta y corrige contadores desviados."""
+        Espacio.objects.create(clave="S1", area=self.area_sur)
+        OcupacionArea.objects.filter(area=self.area_sur).update(libres=7)
+
+        drift = occupancy.reconcile()
+        self.assertEqual([row["area_id"] for row in drift], [self.area_sur.id])
+        self.assertEqual(OcupacionArea.objects.get(area=self.area_sur).libres, 1)
+        self.assertEqual(occupancy.reconcile(), [])
+
+    def test_missing_counters_are_counted_without_writing(self):
+        """Sin fila de contadores la lectura cuenta desde Espacio y no crea nada."""
+        Espacio.objects.create(clave="S1", area=self.area_sur)
+        Espacio.objects.create(clave="S2", area=self.area_sur, estado=Espacio.Estado.OCUPADO)
+        OcupacionArea.objects.filter(area=self.area_sur).delete()
+
+        info = availability.get_area_status(area_id=self.area_sur.id)[0]
+        self.assertEqual((info["libres"], info["ocupados"], info["total"]), (1, 1, 2))
+        self.assertFalse(OcupacionArea.objects.filter(area=self.area_sur).exists())
+
+        occupancy.reconcile()
+        self.assertEqual(OcupacionArea.objects.get(area=self.area_sur).total, 2)
+
+    def test_espacio_save_rolls_back_when_counters_fail(self):
+        """Si el ajuste de contadores falla, el cambio de estado tampoco se guarda."""
+        espacio = Espacio.objects.create(clave="S1", area=self.area_sur)
+        espacio.estado = Espacio.Estado.OCUPADO
+        with mock.patch("app.signals.occupancy.adjust", side_effect=RuntimeError("sin contadores")):
+            with self.assertRaises(RuntimeError):
+                espacio.save()
+        espacio.refresh_from_db()
+        self.assertEqual(espacio.estado, Espacio.Estado.LIBRE)
+        self.assertEqual(OcupacionArea.objects.get(area=self.area_sur).libres, 1)
+
     def test_predict_area_status_applies_decay(self):
         """Aplica decaimiento temporal a la probabilidad base calculada."""
         for idx in range(4):
@@ -69,6 +172,12 @@ class ApiIntegrationTests(TestCase):
     """Pruebas de integración sobre endpoints públicos esenciales."""
 
     def setUp(self):
+        plate_index.invalidate()
+        plate_cache.clear()
+        sanction_watchlist.invalidate()
+        space_allocator.invalidate()
+        access_dedup.clear()
+        availability_snapshot.invalidate()
         self.client = Client()
         self.area = Area.objects.create(nombre="Central")
         self.space = Espacio.objects.create(
@@ -99,6 +208,31 @@ class ApiIntegrationTests(TestCase):
         payload = response.json()
         self.assertTrue(any(item["area"] == "Central" for item in payload))
 
+    def test_availability_snapshot_etag_and_invalidation(self):
+        """Las consultas repetidas responden 304 sin consultas hasta que cambia un cajón."""
+        url = reverse("availability_list")
+        detail_url = reverse("availability_detail", args=[self.area.id])
+        first = self.client.get(url)
+        detail = self.client.get(detail_url)
+        etag = first["ETag"]
+        self.assertEqual(detail.json()["libres"], 1)
+
+        with self.assertNumQueries(0):
+            again = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            cached_detail = self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], etag)
+        self.assertEqual(cached_detail.status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=f"W/{etag}").status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("plates_log_access"), {"placa": "ABC123"},
+                             content_type="application/json")
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+        self.assertEqual(changed.json()[0]["reservados"], 1)
+
     def test_plate_lookup_returns_vehicle_and_space(self):
         """El lookup de placas devuelve datos del vehículo y su cajón sugerido."""
         url = reverse("plates_lookup")
@@ -126,3 +260,1062 @@ class ApiIntegrationTests(TestCase):
         notif = Notificacion.objects.first()
         self.assertEqual(notif.usuario_id, self.user.id)
         self.assertIn("Acceso autorizado", notif.cuerpo)
+
+    def test_log_access_alerts_on_sanctioned_vehicle_without_queries(self):
+        """Una sanción grave se detecta en memoria y emite una alerta prioritaria."""
+        sanction_watchlist.ensure_loaded()
+        sancion = Sancion.objects.create(
+            motivo="Estacionado en lugar reservado",
+            fecha=timezone.now().date(),
+            gravedad=Sancion.Gravedad.GRAVE,
+            vehiculo=self.vehicle,
+        )
+        with self.assertNumQueries(0):
+            matches = sanction_watchlist.check(self.vehicle.id, self.user.id)
+        self.assertEqual([m["id"] for m in matches], [sancion.id])
+
+        stream = notification_broker.subscribe(staff=True)
+        public = notification_broker.subscribe()
+        try:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                response = self.client.post(
+                    reverse("plates_log_access"),
+                    {"placa": "ABC123"},
+                    content_type="application/json",
+                )
+                self.assertTrue(stream.empty())
+            self.assertTrue(callbacks)
+            alert = json.loads(stream.get_nowait())
+            self.assertTrue(public.empty())
+        finally:
+            notification_broker.unsubscribe(stream)
+            notification_broker.unsubscribe(public)
+        self.assertEqual(response.json()["sanciones"][0]["gravedad"], "GRAVE")
+        self.assertEqual(alert["event"], "alerta_sancion")
+        self.assertEqual(alert["priority"], "high")
+
+        sancion.gravedad = Sancion.Gravedad.MODERADA
+        sancion.save()
+        self.assertEqual(sanction_watchlist.check(self.vehicle.id), [])
+
+    def test_log_access_replays_duplicates_without_queries(self):
+        """Los POST repetidos de la misma placa se responden desde memoria sin otro Acceso."""
+        url = reverse("plates_log_access")
+        first = self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+        self.assertEqual(first.status_code, 201)
+
+        with self.assertNumQueries(0):
+            again = self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+        self.assertEqual(again.status_code, 200)
+        self.assertTrue(again.json()["duplicate"])
+        self.assertEqual(again.json()["acceso_id"], first.json()["acceso_id"])
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(Acceso.objects.count(), 1)
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+        salida = self.client.post(
+            url, {"placa": "ABC123", "tipo": "SALIDA"}, content_type="application/json")
+        entrada = self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+        self.assertEqual(salida.status_code, 201)
+        self.assertEqual(entrada.status_code, 201)
+        self.assertEqual(Acceso.objects.count(), 3)
+        self.assertGreater(access_dedup.stats()["hit_rate"], 0)
+
+    def test_log_access_window_is_keyed_on_resolved_vehicle(self):
+        """Dos lecturas distintas del mismo auto cuentan como un solo acceso."""
+        url = reverse("plates_log_access")
+        first = self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+        misread = self.client.post(
+            url, {"placa": "A8C123", "fuzzy": True}, content_type="application/json")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(misread.status_code, 200)
+        self.assertEqual(misread.json()["acceso_id"], first.json()["acceso_id"])
+        self.assertEqual(Acceso.objects.count(), 1)
+
+    def test_log_access_idempotency_key(self):
+        """La Idempotency-Key devuelve el mismo resultado y rechaza otra placa."""
+        self.addCleanup(setattr, access_dedup, "window", access_dedup.window)
+        access_dedup.window = 0
+        Vehiculo.objects.create(placa="XYZ789", usuario=self.user)
+        url = reverse("plates_log_access")
+        headers = {"HTTP_IDEMPOTENCY_KEY": "cam-1-0001"}
+
+        first = self.client.post(url, {"placa": "ABC123"}, content_type="application/json", **headers)
+        retry = self.client.post(url, {"placa": "ABC123"}, content_type="application/json", **headers)
+        other = self.client.post(url, {"placa": "XYZ789"}, content_type="application/json", **headers)
+        fresh = self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(retry.json()["acceso_id"], first.json()["acceso_id"])
+        self.assertEqual(other.status_code, 422)
+        self.assertEqual(fresh.status_code, 201)
+        self.assertEqual(Acceso.objects.count(), 2)
+
+    def test_presence_follows_entries_and_exits(self):
+        """ENTRADA agrega el vehículo a Presencia con su cajón y SALIDA lo quita."""
+        url = reverse("plates_log_access")
+        self.client.post(url, {"placa": "ABC123"}, content_type="application/json")
+        presencia = Presencia.objects.get(vehiculo=self.vehicle)
+        self.assertEqual(presencia.espacio_id, self.space.id)
+        self.assertEqual(presencia.area_id, self.area.id)
+
+        data = self.client.get(reverse("presence")).json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["areas"], [{"area_id": self.area.id, "dentro": 1}])
+
+        self.client.post(url, {"placa": "ABC123", "tipo": "SALIDA"}, content_type="application/json")
+        self.assertFalse(Presencia.objects.exists())
+
+    def test_rebuild_presence_from_history(self):
+        """El recálculo desde Acceso deja dentro solo vehículos cuyo último evento es ENTRADA."""
+        otro = Vehiculo.objects.create(placa="XYZ789", usuario=self.user)
+        now = timezone.now()
+        Acceso.objects.bulk_create([
+            Acceso(fecha=now - timedelta(hours=3), tipo="ENTRADA", vehiculo=self.vehicle, usuario=self.user),
+            Acceso(fecha=now - timedelta(hours=2), tipo="SALIDA", vehiculo=self.vehicle, usuario=self.user),
+            Acceso(fecha=now - timedelta(hours=1), tipo="ENTRADA", vehiculo=self.vehicle, usuario=self.user),
+            Acceso(fecha=now - timedelta(hours=2), tipo="ENTRADA", vehiculo=otro, usuario=self.user),
+            Acceso(fecha=now - timedelta(minutes=5), tipo="SALIDA", vehiculo=otro, usuario=self.user),
+        ])
+        self.assertEqual(rebuild_presence(batch_size=1), 1)
+        presencia = Presencia.objects.get()
+        self.assertEqual(presencia.vehiculo_id, self.vehicle.id)
+        self.assertEqual(presencia.fecha_entrada, now - timedelta(hours=1))
+        self.assertEqual(presence_by_area()["areas"][0]["area_id"], self.area.id)
+
+    def test_access_pipeline_logs_settled_plate_once_per_cooldown(self):
+        """Un vehículo detenido en la pluma genera un solo Acceso dentro del cooldown."""
+        pipeline = AccessPipeline(cooldown=60)
+        event = {"placa": "ABC123", "tipo": "ENTRADA", "first_seen": timezone.now().timestamp()}
+        self.assertTrue(pipeline.submit(event))
+        self.assertFalse(pipeline.submit(event))
+
+        result = pipeline.process(pipeline._queue.get_nowait())
+        self.assertTrue(result["logged"])
+        self.assertEqual(result["espacio"]["id"], self.space.id)
+        self.assertEqual(Acceso.objects.count(), 1)
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+        stats = pipeline.stats()
+        self.assertEqual(stats["suppressed"], 1)
+        self.assertIsNotNone(stats["total_p50_ms"])
+
+    def test_access_pipeline_fuzzy_match_is_opt_in(self):
+        """Por defecto una lectura con un carácter distinto no registra el acceso."""
+        event = {"placa": "A8C123", "tipo": "ENTRADA", "confidence": 0.9}
+        self.assertIsNone(AccessPipeline(cooldown=0).process(dict(event)))
+        self.assertFalse(Acceso.objects.exists())
+
+        fuzzy = AccessPipeline(cooldown=0, max_distance=1, fuzzy_min_confidence=0.8)
+        self.assertIsNone(fuzzy.process(dict(event, confidence=0.5)))
+        result = fuzzy.process(dict(event))
+        self.assertEqual(result["placa"], "ABC123")
+        self.assertEqual(fuzzy.stats()["fuzzy"], 1)
+
+    def test_repeated_entry_keeps_existing_reservation(self):
+        """Una segunda ENTRADA del mismo vehículo no aparta otro cajón."""
+        Espacio.objects.create(clave="C2", estado=Espacio.Estado.LIBRE, area=self.area)
+        first = claim_space(self.user, self.vehicle)
+        second = claim_space(self.user, self.vehicle)
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(Espacio.objects.filter(
+            estado=Espacio.Estado.RESERVADO, reservado_para=self.vehicle).count(), 1)
+
+    def test_failed_access_write_releases_claimed_space(self):
+        """Si el Acceso no se guarda, el cajón apartado para la entrada vuelve a estar libre."""
+        with mock.patch("app.services.access_pipeline.access_ingestor.write",
+                        side_effect=TimeoutError("sin confirmar")):
+            with self.assertRaises(TimeoutError):
+                record_access(self.vehicle, Acceso.Tipo.ENTRADA)
+        self.space.refresh_from_db()
+        self.assertEqual(self.space.estado, Espacio.Estado.LIBRE)
+        self.assertIsNone(self.space.reservado_para_id)
+
+    def test_log_access_returns_503_when_writer_is_saturated(self):
+        """Con el escritor saturado se responde 503 con Retry-After y el reintento registra."""
+        url = reverse("plates_log_access")
+        for error in (AccessQueueFull("llena"), TimeoutError("sin confirmar")):
+            with mock.patch("app.services.access_pipeline.access_ingestor.write",
+                            side_effect=error):
+                response = self.client.post(url, {"placa": "ABC123"},
+                                            content_type="application/json",
+                                            HTTP_IDEMPOTENCY_KEY="puerta-1")
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response["Retry-After"], "1")
+        self.space.refresh_from_db()
+        self.assertEqual(self.space.estado, Espacio.Estado.LIBRE)
+        self.assertFalse(Acceso.objects.exists())
+
+        retry = self.client.post(url, {"placa": "ABC123"}, content_type="application/json",
+                                 HTTP_IDEMPOTENCY_KEY="puerta-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(Acceso.objects.count(), 1)
+
+    def test_plate_lookup_uses_cache_and_invalidates_on_save(self):
+        """Las consultas repetidas usan la caché y se invalidan al editar el vehículo."""
+        url = reverse("plates_lookup")
+        hits = plate_cache.stats()["hits"]
+        self.client.get(url, {"placa": "ABC123"})
+        with self.assertNumQueries(0):
+            data = self.client.get(url, {"placa": "ABC123"}).json()
+        self.assertEqual(data["espacio"]["area_nombre"], "Central")
+
+        self.vehicle.color = "Azul"
+        self.vehicle.save()
+        data = self.client.get(url, {"placa": "ABC123"}).json()
+        self.assertEqual(data["color"], "Azul")
+        self.assertEqual(plate_cache.stats()["hits"], hits + 1)
+
+    def test_plate_cache_skips_store_when_invalidated_during_read(self):
+        """Una edición que llega mientras se lee la BD no queda tapada por la fila vieja."""
+        read = Vehiculo.objects.select_related
+
+        def read_then_edit(*args, **kwargs):
+            qs = read(*args, **kwargs)
+            stale = list(qs.filter(placa="ABC123"))
+            Vehiculo.objects.filter(pk=self.vehicle.pk).update(color="Verde")
+            plate_cache.invalidate_vehiculo(self.vehicle.pk)
+            return mock.Mock(filter=lambda **kw: mock.Mock(first=lambda: stale[0]))
+
+        with mock.patch.object(Vehiculo.objects, "select_related", side_effect=read_then_edit):
+            self.assertEqual(plate_cache.get("ABC123").color, "Rojo")
+        self.assertEqual(plate_cache.stats()["stale_reads"], 1)
+        self.assertEqual(plate_cache.get("ABC123").color, "Verde")
+
+    def test_plate_lookup_fuzzy_tolerates_ocr_confusions(self):
+        """El modo difuso resuelve confusiones O/0 y B/8 y devuelve candidatos."""
+        url = reverse("plates_lookup")
+        response = self.client.get(url, {"placa": "A8CI23"})
+        self.assertFalse(response.json()["found"])
+
+        response = self.client.get(url, {"placa": "A8CI23", "fuzzy": "1"})
+        data = response.json()
+        self.assertTrue(data["found"])
+        self.assertEqual(data["placa"], "ABC123")
+        self.assertEqual(data["distance"], 0)
+
+        Vehiculo.objects.create(placa="XYZ789", usuario=self.user)
+        Vehiculo.objects.create(placa="XYZ788", usuario=self.user)
+        response = self.client.get(url, {"placa": "XY278", "fuzzy": "1"})
+        data = response.json()
+        self.assertFalse(data["found"])
+        self.assertEqual({c["placa"] for c in data["candidates"]},
+                         {"XYZ789", "XYZ788"})
+
+
+class OccupancySmootherTests(SimpleTestCase):
+    """Pruebas de la histéresis vectorizada de ocupación por cajón."""
+
+    def test_enter_and_exit_thresholds_report_changed_indices(self):
+        """Sólo reporta los cajones que cruzan los umbrales de entrada o salida."""
+        smoother = OccupancySmoother(
+            size=3, enter_threshold=3, exit_threshold=1)
+
+        self.assertEqual(smoother.update([0]).tolist(), [])
+        self.assertEqual(smoother.update([0]).tolist(), [0])
+        self.assertEqual(smoother.occupied().tolist(), [0])
+
+        self.assertEqual(smoother.update([]).tolist(), [])
+        self.assertEqual(smoother.update([]).tolist(), [])
+        self.assertEqual(smoother.update([]).tolist(), [0])
+        self.assertFalse(smoother.state.any())
+
+    def test_resize_keeps_existing_state(self):
+        """Agregar cajones conserva contadores y estado de los existentes."""
+        smoother = OccupancySmoother(size=2)
+        smoother.update(np.array([1]))
+        smoother.update(np.array([1]))
+        smoother.resize(4)
+        self.assertEqual(len(smoother), 4)
+        self.assertEqual(smoother.occupied().tolist(), [1])
+
+
+class SpotClassifierTests(SimpleTestCase):
+    """Pruebas del clasificador ligero por cajón (sin YOLO)."""
+
+    def test_classifies_only_spot_that_differs_from_reference(self):
+        """Un cajón con un objeto distinto a la referencia vacía se marca ocupado."""
+        empty = np.full((200, 300, 3), 90, dtype=np.uint8)
+        spots = [
+            {'polygon': [(x, 20), (x + 90, 20), (x + 90, 180), (x, 180)]}
+            for x in (10, 105, 200)
+        ]
+        classifier = SpotClassifier()
+        classifier.set_spots(spots, empty.shape)
+        classifier.seed_reference(empty)
+
+        frame = empty.copy()
+        frame[40:160, 115:185] = (20, 20, 200)
+        frame[60:100, 125:175] = (230, 230, 230)
+
+        self.assertEqual(classifier.classify(frame).tolist(), [1])
+        self.assertEqual(classifier.classify(empty.copy()).tolist(), [])
+
+
+class PlateVotingTests(SimpleTestCase):
+    """Pruebas de la votación de lecturas OCR por vehículo."""
+
+    def test_vote_plate_corrects_single_character_misreads(self):
+        """La votación por carácter ponderada por confianza corrige errores aislados."""
+        plate, agreement = vote_plate([
+            ("ABC123", 0.9),
+            ("A8C123", 0.4),
+            ("ABC12", 0.5),
+            ("ABC723", 0.3),
+        ])
+        self.assertEqual(plate, "ABC123")
+        self.assertGreater(agreement, 0.6)
+
+    def test_track_settles_once_and_stops_requesting_reads(self):
+        """Un vehículo quieto se confirma una sola vez y deja de pedir OCR."""
+        events = []
+        manager = PlateTrackManager(on_settled=events.append, min_reads=3)
+        bbox = (100, 100, 300, 250)
+
+        for text in ("ABC123", "ABC123", "A8C123"):
+            (track, _), = manager.update([bbox], now=1.0)
+            self.assertTrue(manager.needs_read(track))
+            manager.add_read(track.id, text, 0.8)
+
+        (track, _), = manager.update([(102, 101, 301, 252)], now=2.0)
+        self.assertFalse(manager.needs_read(track))
+        manager.add_read(track.id, "ABC123", 0.8)
+        self.assertEqual([t.plate_text for t in events], ["ABC123"])
+
+    def test_new_vehicle_in_same_bbox_gets_a_new_track(self):
+        """Si el vehículo se va, el siguiente en la misma posición se vuelve a leer."""
+        events = []
+        manager = PlateTrackManager(on_settled=events.append, min_reads=3, max_missed=2)
+        bbox = (100, 100, 300, 250)
+
+        for text in ("ABC123", "ABC123", "ABC123"):
+            (track, _), = manager.update([bbox], now=1.0)
+            manager.add_read(track.id, text, 0.9)
+        first = track
+
+        (track, _), = manager.update([bbox], now=1.5)
+        self.assertIs(track, first)
+        self.assertEqual(manager.update([], now=1.6), [])
+        (track, _), = manager.update([bbox], now=1.7)
+        self.assertIs(track, first)
+
+        for now in (2.0, 2.1, 2.2):
+            manager.update([], now=now)
+        (track, _), = manager.update([bbox], now=2.3)
+        self.assertIsNot(track, first)
+        self.assertTrue(manager.needs_read(track))
+        for text in ("XYZ987", "XYZ987", "XYZ987"):
+            manager.add_read(track.id, text, 0.9)
+        self.assertEqual([t.plate_text for t in events], ["ABC123", "XYZ987"])
+
+
+class GateRegionTests(SimpleTestCase):
+    """Pruebas de la zona de acceso configurada por dispositivo."""
+
+    def test_line_region_filters_vehicles_and_crops_frame(self):
+        """Solo los vehículos que tocan la línea de la pluma pasan a la etapa de placas."""
+        region = GateRegion.from_config(
+            {"puntos": [[0.4, 0.5], [0.6, 0.5]], "margen": 0.02})
+        region.bind((720, 1280, 3))
+
+        self.assertTrue(region.crosses((500, 300, 700, 420)))
+        self.assertFalse(region.crosses((0, 0, 200, 150)))
+        x1, y1, x2, y2 = region.crop
+        self.assertLess((x2 - x1) * (y2 - y1), 1280 * 720 / 2)
+
+
+class OcrEngineTests(SimpleTestCase):
+    """Pruebas de la selección de motor OCR."""
+
+    def test_base_engine_is_abstract(self):
+        """OcrEngine no se instancia sin implementar recognize_batch."""
+        with self.assertRaises(TypeError):
+            ocr_engine.OcrEngine()
+
+    def test_falls_back_to_pytesseract_without_tesserocr(self):
+        """Sin tesserocr, auto y tesserocr usan pytesseract; un nombre desconocido falla."""
+        with mock.patch.object(ocr_engine, "tesserocr", None):
+            self.assertEqual(ocr_engine.available_ocr_engines(), ["pytesseract"])
+            self.assertIsInstance(
+                ocr_engine.get_ocr_engine("auto"), ocr_engine.PytesseractEngine)
+            self.assertIsInstance(
+                ocr_engine.get_ocr_engine("tesserocr"), ocr_engine.PytesseractEngine)
+            with mock.patch.dict(os.environ, {"OCR_BACKEND": "TESSEROCR"}):
+                self.assertIsInstance(ocr_engine.get_ocr_engine(), ocr_engine.PytesseractEngine)
+            with self.assertRaises(ValueError):
+                ocr_engine.get_ocr_engine("easyocr")
+
+        with mock.patch.object(ocr_engine, "tesserocr", mock.Mock()):
+            self.assertEqual(
+                ocr_engine.available_ocr_engines(), ["tesserocr", "pytesseract"])
+            self.assertIsInstance(
+                ocr_engine.get_ocr_engine("auto"), ocr_engine.TesserocrEngine)
+
+
+class QueryPlanTests(TestCase):
+    """Verifica que las consultas frecuentes usen índices (SQLite EXPLAIN QUERY PLAN)."""
+
+    FULL_SCAN = re.compile(r"\bSCAN (app_\w+)\b(?! USING)")
+
+    def test_hot_queries_use_indexes(self):
+        """Ninguna consulta caliente debe recorrer la tabla completa."""
+        today = timezone.now().date()
+        hot_queries = {
+            "espacios_libres_area": Espacio.objects.filter(
+                area_id=1, estado=Espacio.Estado.LIBRE).order_by("clave"),
+            "accesos_recientes": Acceso.objects.order_by("-fecha")[:50],
+            "notificaciones_usuario": Notificacion.objects.filter(
+                usuario_id=1).order_by("-fecha_creacion")[:100],
+            "notificaciones_recientes": Notificacion.objects.order_by(
+                "-fecha_creacion")[:100],
+            "historial_chat": ChatMessage.objects.filter(
+                conversation_id=1).order_by("-fecha")[:8],
+            "eventos_vigentes": Evento.objects.filter(
+                fecha_fin__gte=today).order_by("fecha_inicio")[:5],
+            "presencia_por_area": Presencia.objects.values("area_id").annotate(
+                n=Count("id")).order_by("area_id"),
+            "ultimo_acceso_vehiculo": Acceso.objects.filter(
+                vehiculo_id=1).order_by("-fecha")[:1],
+        }
+        for name, qs in hot_queries.items():
+            with self.subTest(query=name):
+                plan = qs.explain()
+                self.assertIsNone(self.FULL_SCAN.search(plan), plan)
+
+
+class SpaceAllocatorTests(TestCase):
+    """Pruebas del asignador de cajones en memoria."""
+
+    def test_allocator_prioritizes_and_falls_back_without_queries(self):
+        """Ordena por distancia, respeta cajones accesibles y cae a otras áreas."""
+        propia = Area.objects.create(nombre="Propia")
+        otra = Area.objects.create(nombre="Otra")
+        lejos = Espacio.objects.create(clave="P1", area=propia, distancia_entrada=80)
+        cerca = Espacio.objects.create(clave="P2", area=propia, distancia_entrada=10)
+        accesible = Espacio.objects.create(
+            clave="P3", area=propia, distancia_entrada=5, discapacitado=True)
+        externo = Espacio.objects.create(clave="O1", area=otra, distancia_entrada=1)
+        usuario = Usuario(area=propia)
+
+        allocator = SpaceAllocator(priority="distancia")
+        allocator.peek()
+        with self.assertNumQueries(0):
+            self.assertEqual(allocator.take(usuario)["id"], cerca.id)
+            self.assertEqual(allocator.take(usuario)["id"], lejos.id)
+            self.assertEqual(allocator.take(usuario)["id"], externo.id)
+            self.assertIsNone(allocator.take(usuario))
+            usuario.discapacitado = True
+            self.assertEqual(allocator.peek(usuario)["id"], accesible.id)
+
+    def test_failed_reserve_returns_space_to_allocator(self):
+        """Si el UPDATE de la reserva falla, el cajón vuelve a estar disponible en memoria."""
+        area = Area.objects.create(nombre="Bloqueo")
+        espacio = Espacio.objects.create(clave="B1", area=area)
+        space_allocator.invalidate()
+
+        with mock.patch("app.services.space_reservation._reserve_and_count",
+                        side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                claim_space()
+        self.assertEqual(space_allocator.peek()["id"], espacio.id)
+        self.assertEqual(claim_space().id, espacio.id)
+
+
+class SpaceReservationConcurrencyTests(TransactionTestCase):
+    """Pruebas de reservas de cajones bajo entradas concurrentes."""
+
+    def test_parallel_claims_get_distinct_spaces(self):
+        """Cientos de entradas simultáneas nunca reciben el mismo cajón."""
+        area = Area.objects.create(nombre="Concurrencia")
+        for idx in range(150):
+            Espacio.objects.create(clave=f"R{idx:03d}", area=area)
+        space_allocator.invalidate()
+
+        claimed = []
+        errors = []
+        start = threading.Barrier(200)
+
+        def enter():
+            try:
+                start.wait()
+                espacio = claim_space()
+                claimed.append(espacio.id if espacio else None)
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=enter) for _ in range(200)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        granted = [espacio_id for espacio_id in claimed if espacio_id]
+        self.assertEqual(len(granted), 150)
+        self.assertEqual(len(set(granted)), 150)
+        self.assertEqual(claimed.count(None), 50)
+        self.assertFalse(Espacio.objects.filter(estado=Espacio.Estado.LIBRE).exists())
+        ocupacion = OcupacionArea.objects.get(area=area)
+        self.assertEqual((ocupacion.libres, ocupacion.reservados), (0, 150))
+        self.assertEqual(occupancy.reconcile(), [])
+
+
+class AccessIngestTests(TransactionTestCase):
+    """Pruebas del registro de accesos por lotes (group commit)."""
+
+    def test_concurrent_writes_share_batches_and_return_ids(self):
+        """Las escrituras simultáneas se confirman juntas y cada llamada recibe su id."""
+        usuario = Usuario.objects.create(
+            nombre="Lote", apellidos="Prueba", matricula="L001",
+            correo="lote@example.com", contraseña="secret123")
+        vehiculo = Vehiculo.objects.create(
+            placa="LOT001", marca="Nissan", modelo="March", color="Gris", usuario=usuario)
+        ingestor = AccessIngestor(window_ms=20, batch_size=64, enabled=True)
+
+        results = []
+        start = threading.Barrier(40)
+
+        def write():
+            try:
+                start.wait()
+                results.append(ingestor.write(vehiculo, Acceso.Tipo.ENTRADA))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=write) for _ in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({r["acceso_id"] for r in results}), 40)
+        self.assertEqual(Acceso.objects.count(), 40)
+        self.assertEqual(Notificacion.objects.count(), 40)
+        self.assertTrue(all(r["notification"]["id"] for r in results))
+        self.assertLess(ingestor.stats()["batches"], 40)
+
+    def test_failed_item_does_not_fail_its_batch(self):
+        """Si un acceso del lote falla al confirmar, solo esa llamada recibe el error."""
+        usuario = Usuario.objects.create(
+            nombre="Lote", apellidos="Prueba", matricula="L002",
+            correo="lote2@example.com", contraseña="secret123")
+        vehiculo = Vehiculo.objects.create(
+            placa="LOT002", marca="Nissan", modelo="March", color="Gris", usuario=usuario)
+        borrado = Vehiculo.objects.create(placa="LOT003", marca="Kia", modelo="Rio", color="Azul")
+        Vehiculo.objects.filter(pk=borrado.pk).delete()
+
+        ingestor = AccessIngestor(window_ms=20, batch_size=8, enabled=True)
+        batch = [_PendingAccess(v, Acceso.Tipo.ENTRADA, None) for v in (vehiculo, borrado, vehiculo)]
+        self.assertFalse(ingestor._write_batch(batch))
+
+        self.assertIsNotNone(batch[1].error)
+        self.assertEqual([item.error for item in (batch[0], batch[2])], [None, None])
+        self.assertEqual(Acceso.objects.count(), 2)
+        self.assertEqual(ingestor.stats()["retried_batches"], 1)
+
+    def test_timed_out_write_is_cancelled(self):
+        """Un acceso que vence en cola no se escribe después de responder error."""
+        vehiculo = Vehiculo.objects.create(
+            placa="LOT004", marca="Kia", modelo="Rio", color="Azul")
+        ingestor = AccessIngestor(window_ms=0, batch_size=8, enabled=True)
+        with mock.patch.object(ingestor, "_ensure_started"):
+            with self.assertRaises(TimeoutError):
+                ingestor.write(vehiculo, Acceso.Tipo.ENTRADA, timeout=0.01)
+        self.assertEqual(ingestor._take_batch(), [])
+        self.assertFalse(Acceso.objects.exists())
+        self.assertEqual(ingestor.stats()["cancelled"], 1)
+
+    def test_full_queue_rejects_without_blocking(self):
+        """Con la cola llena el acceso se rechaza de inmediato y no se encola."""
+        vehiculo = Vehiculo.objects.create(
+            placa="LOT005", marca="Kia", modelo="Rio", color="Azul")
+        ingestor = AccessIngestor(window_ms=0, batch_size=8, enabled=True, queue_size=1)
+        ingestor._queue.put_nowait(_PendingAccess(vehiculo, Acceso.Tipo.ENTRADA, None))
+        with mock.patch.object(ingestor, "_ensure_started"):
+            with self.assertRaises(AccessQueueFull):
+                ingestor.write(vehiculo, Acceso.Tipo.SALIDA, timeout=5)
+        stats = ingestor.stats()
+        self.assertEqual((stats["rejected"], stats["queue_depth"], stats["queue_size"]), (1, 1, 1))
+
+
+class AccessArchiveTests(TestCase):
+    """Pruebas del archivo mensual de accesos."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        override = override_settings(ACCESS_ARCHIVE_DIR=tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.tmp = tmp.name
+
+    def test_archive_moves_old_rows_to_monthly_files(self):
+        """Los accesos viejos pasan a archivos por mes y el historial sigue completo."""
+        vehiculo = Vehiculo.objects.create(placa="ARC001")
+        now = timezone.now()
+        fechas = [now - timedelta(days=95), now - timedelta(days=94),
+                  now - timedelta(days=60), now - timedelta(days=1)]
+        Acceso.objects.bulk_create([
+            Acceso(fecha=fecha, tipo="ENTRADA", vehiculo=vehiculo) for fecha in fechas
+        ])
+
+        dry = archive_accesses(days=30, dry_run=True)
+        self.assertEqual(sum(row["registros"] for row in dry), 3)
+        self.assertEqual(Acceso.objects.count(), 4)
+
+        results = archive_accesses(days=30, chunk_size=1)
+        self.assertEqual(sum(row["registros"] for row in results), 3)
+        self.assertEqual(Acceso.objects.count(), 1)
+        self.assertEqual(AccesoArchivo.objects.count(), len(results))
+        self.assertGreaterEqual(len(results), 2)
+
+        history = list(iter_access_history())
+        self.assertEqual([r["fecha"] for r in history], fechas)
+        self.assertTrue(all(r["placa"] == "ARC001" for r in history))
+
+        recent = list(iter_access_history(desde=now - timedelta(days=61)))
+        self.assertEqual([r["fecha"] for r in recent], fechas[2:])
+        self.assertEqual(archive_accesses(days=30), [])
+
+
+class AvailabilityStreamTests(TransactionTestCase):
+    """Pruebas del stream SSE de disponibilidad por área."""
+
+    def _events(self, subscriber, seconds):
+        events = []
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            try:
+                raw = subscriber.queue.get(timeout=0.05).decode()
+            except Exception:
+                continue
+            fields = dict(line.split(": ", 1) for line in raw.strip().splitlines())
+            events.append((fields["id"], fields["event"], json.loads(fields["data"])))
+        return events
+
+    def test_snapshot_then_coalesced_deltas_and_resume(self):
+        """Envía instantánea al conectar, fusiona cambios por área y reanuda con Last-Event-ID."""
+        area = Area.objects.create(nombre="Stream")
+        espacios = [Espacio.objects.create(clave=f"S{idx}", area=area) for idx in range(3)]
+        availability_snapshot.invalidate()
+        stream = AvailabilityStream(interval=0.4, idle_timeout=0)
+        self.addCleanup(stream.close)
+
+        subscriber, initial = stream.subscribe()
+        snapshot = json.loads(initial[0].decode().split("data: ", 1)[1])
+        self.assertEqual(snapshot["areas"][0]["libres"], 3)
+
+        for espacio in espacios:
+            espacio.estado = Espacio.Estado.OCUPADO
+            espacio.save()
+        events = self._events(subscriber, 1.2)
+        self.assertTrue(events)
+        self.assertLessEqual(len(events), 2)
+        self.assertTrue(all(event == "delta" for _, event, _ in events))
+        self.assertEqual(events[-1][2]["ocupados"], 3)
+
+        resumed, replay = stream.subscribe(events[0][0])
+        self.assertEqual(len(replay), len(events) - 1)
+        other, stale = stream.subscribe("otro-1")
+        self.assertIn(b"event: snapshot", stale[0])
+        thread = stream._thread
+        for sub in (subscriber, resumed, other):
+            stream.unsubscribe(sub)
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+
+    def test_resume_after_idle_publisher_gets_snapshot(self):
+        """Los cambios ocurridos sin publicador activo no se pierden al reanudar."""
+        area = Area.objects.create(nombre="Inactivo")
+        espacio = Espacio.objects.create(clave="I1", area=area)
+        availability_snapshot.invalidate()
+        stream = AvailabilityStream(interval=0.1, idle_timeout=0)
+        self.addCleanup(stream.close)
+
+        subscriber, _ = stream.subscribe()
+        espacio.estado = Espacio.Estado.OCUPADO
+        espacio.save()
+        last_id = self._events(subscriber, 0.5)[-1][0]
+        thread = stream._thread
+        stream.unsubscribe(subscriber)
+        thread.join(timeout=2)
+        self.assertFalse(thread.is_alive())
+
+        espacio.estado = Espacio.Estado.LIBRE
+        espacio.save()
+        resumed, replay = stream.subscribe(last_id)
+        self.addCleanup(stream.unsubscribe, resumed)
+        self.assertEqual(len(replay), 1)
+        self.assertIn(b"event: snapshot", replay[0])
+        areas = json.loads(replay[0].decode().split("data: ", 1)[1])["areas"]
+        self.assertEqual(areas[0]["libres"], 1)
+
+
+class _FakeCapture:
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.released = False
+
+    def read(self):
+        frame = self.frames.pop(0) if self.frames else None
+        return frame is not None, frame
+
+    def release(self):
+        self.released = True
+
+
+class _FakeCameraConnection(CameraConnection):
+
+    def __init__(self, captures, **kwargs):
+        super().__init__("fake://gate", **kwargs)
+        self.captures = list(captures)
+        self.waits = []
+        self.states = []
+
+    def _open(self):
+        return self.captures.pop(0) if self.captures else None
+
+    def _wait(self, seconds):
+        self.waits.append(seconds)
+        return True
+
+    def _set_state(self, state):
+        super()._set_state(state)
+        if not self.states or self.states[-1] != state:
+            self.states.append(state)
+
+
+class CameraConnectionTests(SimpleTestCase):
+    """Pruebas de la máquina de estados de reconexión de cámaras."""
+
+    def test_backoff_grows_to_cap_and_resets_on_frames(self):
+        """Sin cámara el retardo se duplica hasta el tope; al recibir cuadros se reinicia."""
+        frame = np.zeros((4, 4, 3), dtype=np.uint8)
+        conn = _FakeCameraConnection(
+            [None] * 5 + [_FakeCapture([frame, None, None])],
+            backoff_base=1.0, backoff_max=8.0, max_read_failures=2)
+
+        with mock.patch("app.detection.camera_connection.random.uniform",
+                        side_effect=lambda low, high: high):
+            for _ in range(5):
+                self.assertIsNone(conn.read())
+            self.assertEqual(conn.waits, [1.0, 2.0, 4.0, 8.0, 8.0])
+            self.assertEqual(conn.states, [CameraState.CONNECTING, CameraState.OFFLINE])
+            self.assertIsNotNone(conn.status()["next_retry_in"])
+
+            self.assertIs(conn.read(), frame)
+            self.assertEqual(conn.state, CameraState.STREAMING)
+            self.assertEqual(conn.reconnect_attempts, 0)
+
+            conn.waits.clear()
+            self.assertIsNone(conn.read())
+            self.assertEqual(conn.state, CameraState.DEGRADED)
+            self.assertIsNone(conn.read())
+
+        self.assertEqual(conn.state, CameraState.OFFLINE)
+        self.assertIsNone(conn.cap)
+        self.assertEqual(conn.waits, [0.1, 1.0])
+        self.assertEqual(conn.states[-3:], [
+            CameraState.STREAMING, CameraState.DEGRADED, CameraState.OFFLINE])
+
+
+class ResourceSchedulerTests(SimpleTestCase):
+    """Pruebas del reparto de hilos entre detectores."""
+
+    def setUp(self):
+        for patcher in (mock.patch.dict(os.environ),
+                        mock.patch.object(thread_limits, "_user_defined", None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop("OMP_THREAD_LIMIT", None)
+
+    def _register(self, scheduler, keys):
+        for key in keys:
+            scheduler.register(key)
+        return [scheduler.budget(key)["threads"] for key in keys]
+
+    def test_even_split_applies_one_process_budget(self):
+        """El modo even reparte los núcleos y fija el pool global una sola vez."""
+        scheduler = ResourceScheduler(mode="even", cores=list(range(8)), pin_cores=False)
+        self.assertEqual(self._register(scheduler, "abc"), [3, 3, 2])
+        self.assertEqual(scheduler.process_threads, 3)
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "3")
+
+        with mock.patch("app.detection.resource_scheduler.torch.set_num_threads") as torch_threads, \
+                mock.patch("app.detection.resource_scheduler.cv2.setNumThreads") as cv2_threads:
+            for key in "abc":
+                scheduler.apply(key)
+        torch_threads.assert_called_once_with(3)
+        cv2_threads.assert_called_once_with(3)
+
+        scheduler.unregister("c")
+        self.assertEqual([scheduler.budget(k)["threads"] for k in "ab"], [4, 4])
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "4")
+
+    def test_fixed_and_off_modes(self):
+        """fixed usa DETECTOR_THREADS (o la división de núcleos) y off no toca nada."""
+        fixed = ResourceScheduler(mode="fixed", threads=2, cores=list(range(8)), pin_cores=False)
+        self.assertEqual(self._register(fixed, "abc"), [2, 2, 2])
+        self.assertEqual(fixed.process_threads, 2)
+
+        divided = ResourceScheduler(mode="fixed", cores=list(range(8)), pin_cores=False)
+        self.assertEqual(self._register(divided, "abc"), [2, 2, 2])
+
+        os.environ.pop("OMP_THREAD_LIMIT", None)
+        off = ResourceScheduler(mode="off", cores=list(range(8)), pin_cores=False)
+        self._register(off, "ab")
+        with mock.patch("app.detection.resource_scheduler.torch.set_num_threads") as torch_threads:
+            off.apply("a")
+        torch_threads.assert_not_called()
+        self.assertNotIn("OMP_THREAD_LIMIT", os.environ)
+
+    def test_explicit_omp_thread_limit_is_kept(self):
+        """Un OMP_THREAD_LIMIT definido por el usuario no se sobrescribe."""
+        os.environ["OMP_THREAD_LIMIT"] = "1"
+        scheduler = ResourceScheduler(mode="even", cores=list(range(4)), pin_cores=False)
+        self._register(scheduler, "a")
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "1")
+
+    def test_configure_sets_process_ceiling_once(self):
+        """configure fija el techo del proceso al arrancar y respeta el valor del usuario."""
+        os.environ.update({"DETECTOR_CORES": "0-5", "DETECTOR_THREAD_MODE": "even"})
+        self.assertEqual(thread_limits.configure(), 6)
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "6")
+        os.environ.update({"DETECTOR_THREAD_MODE": "fixed", "DETECTOR_THREADS": "2"})
+        self.assertEqual(thread_limits.configure(), 2)
+
+        scheduler = ResourceScheduler(mode="even", cores=list(range(4)), pin_cores=False)
+        self._register(scheduler, "ab")
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "2")
+
+        thread_limits._user_defined = None
+        os.environ["OMP_THREAD_LIMIT"] = "1"
+        self.assertIsNone(thread_limits.configure())
+        self.assertTrue(thread_limits.user_defined())
+        self.assertEqual(os.environ["OMP_THREAD_LIMIT"], "1")
+
+
+class FrameChangeDetectorTests(SimpleTestCase):
+    """Pruebas de la reutilización de resultados en escenas estáticas."""
+
+    def test_static_frames_reuse_result_until_scene_changes(self):
+        """Un cuadro igual devuelve el resultado guardado; uno distinto pide pasada completa."""
+        detector = FrameChangeDetector(threshold=4.0, force_every=60.0)
+        still = np.full((96, 128, 3), 80, dtype=np.uint8)
+        noisy = still.copy()
+        noisy[0, 0] = 90
+        moved = still.copy()
+        moved[:, :64] = 200
+
+        self.assertIsNone(detector.lookup(still))
+        self.assertIsNone(detector.lookup(still))
+        detector.store({"ocupados": 3})
+        self.assertEqual(detector.lookup(noisy), {"ocupados": 3})
+        self.assertIsNone(detector.lookup(moved))
+        self.assertGreater(detector.last_score, detector.threshold)
+
+        detector.store({"ocupados": 4})
+        self.assertEqual(detector.lookup(moved), {"ocupados": 4})
+        detector.reset()
+        self.assertIsNone(detector.lookup(moved))
+
+        stats = detector.stats()
+        self.assertEqual(stats["frames"], 6)
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["skipped"], 3)
+
+    def test_force_every_runs_full_pass_on_static_scene(self):
+        """Aunque la escena no cambie, se fuerza una pasada completa cada force_every."""
+        detector = FrameChangeDetector(threshold=4.0, force_every=0.0)
+        still = np.zeros((48, 64), dtype=np.uint8)
+        detector.lookup(still)
+        detector.store("resultado")
+        self.assertIsNone(detector.lookup(still))
+
+    def test_plate_detector_keeps_reading_while_tracks_are_pending(self):
+        """Un vehículo detenido sin placa confirmada sigue llegando al OCR en cada cuadro."""
+        detector = PlateDetector("prueba", "fake://gate")
+        detector.change_detector = FrameChangeDetector(threshold=4.0, force_every=60.0)
+        detector.ocr_pool = mock.Mock()
+        vehicle = (100, 200, 500, 400)
+        detector._detect_vehicles = mock.Mock(return_value=([vehicle], []))
+        detector._detect_plates = mock.Mock(return_value=[(vehicle, (250, 320, 350, 360))])
+        still = np.full((720, 1280, 3), 80, dtype=np.uint8)
+
+        for _ in range(3):
+            detector._process_frame(still)
+        self.assertEqual(detector.ocr_pool.submit.call_count, 3)
+
+        for track in detector.plate_tracks.tracks.values():
+            track.plate_text = "ABC123"
+        detector._process_frame(still)
+        detector._process_frame(still)
+        self.assertEqual(detector._detect_vehicles.call_count, 3)
+        self.assertEqual(detector.ocr_pool.submit.call_count, 3)
+
+
+class _FakePlateBoxes:
+
+    def __init__(self, xyxy, conf):
+        self.xyxy = torch.tensor(xyxy, dtype=torch.float32)
+        self.conf = torch.tensor(conf, dtype=torch.float32)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __getitem__(self, idx):
+        return _FakePlateBoxes(self.xyxy[idx:idx + 1].tolist(), self.conf[idx:idx + 1].tolist())
+
+
+class PlateLetterboxTests(SimpleTestCase):
+    """Pruebas del mapeo de cajas de placa desde el espacio letterbox al cuadro."""
+
+    def test_plate_boxes_map_back_to_frame_coordinates(self):
+        """Las cajas del modelo se devuelven en coordenadas del cuadro original."""
+        detector = PlateDetector("prueba", "fake://gate", plate_input_size=320)
+        frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+        ancho = (100, 200, 500, 400)
+        alto = (600, 100, 700, 500)
+
+        canvas, scale, left, top = detector._letterbox(
+            detector._safe_crop(frame, *ancho), 320)
+        self.assertEqual(canvas.shape, (320, 320, 3))
+        self.assertEqual((round(scale, 3), left, top), (0.8, 0, 80))
+        self.assertEqual(int(canvas[0, 0, 0]), 114)
+
+        # Placa en (150, 120)-(250, 160) del recorte ancho y (20, 300)-(80, 340) del alto,
+        # expresadas en el espacio letterbox de 320x320.
+        detector.plate_model = mock.Mock(return_value=[
+            mock.Mock(boxes=_FakePlateBoxes(
+                [[0, 0, 10, 10], [120, 176, 200, 208]], [0.2, 0.9])),
+            mock.Mock(boxes=_FakePlateBoxes([[136, 240, 184, 272]], [0.7])),
+        ])
+        plates = detector._detect_plates(frame, [ancho, alto])
+
+        self.assertEqual([vehicle for vehicle, _ in plates], [ancho, alto])
+        for (_, box), expected in zip(plates, [(250, 320, 350, 360), (620, 400, 680, 440)]):
+            for got, want in zip(box, expected):
+                self.assertAlmostEqual(got, want, delta=1)
+
+
+class OcrWorkerPoolTests(SimpleTestCase):
+    """Pruebas de la cola acotada de recortes para OCR."""
+
+    def _pool(self, **kwargs):
+        results = []
+        pool = OcrWorkerPool(
+            recognize=lambda crops: [(f"P{int(crop[0, 0])}", 0.9) for crop in crops],
+            on_result=lambda text, meta: results.append((text, meta["n"])),
+            **kwargs)
+        return pool, results
+
+    def _crop(self, n):
+        return np.full((2, 2), n, dtype=np.uint8)
+
+    def test_overflow_drops_oldest_and_stale_items_are_skipped(self):
+        """Con la cola llena se descartan los recortes más viejos y los vencidos no se leen."""
+        pool, _ = self._pool(queue_size=3, batch_size=8, max_age=2.0)
+        clock = "app.detection.ocr_worker.time.monotonic"
+        with mock.patch(clock, return_value=100.0):
+            for n in range(5):
+                pool.submit(self._crop(n), {"n": n})
+        self.assertEqual(pool.stats()["dropped_overflow"], 2)
+
+        with mock.patch(clock, return_value=101.0):
+            batch = pool._take_batch()
+        self.assertEqual([meta["n"] for _, meta in batch], [2, 3, 4])
+        self.assertAlmostEqual(batch[0][1]["queued_ms"], 1000.0)
+
+        with mock.patch(clock, return_value=100.0):
+            pool.submit(self._crop(7), {"n": 7})
+        with mock.patch(clock, return_value=103.0):
+            self.assertEqual(pool._take_batch(), [])
+        stats = pool.stats()
+        self.assertEqual(stats["dropped_stale"], 1)
+        self.assertEqual(stats["queue_depth"], 0)
+
+    def test_workers_recognize_in_batches(self):
+        """Los trabajadores leen los recortes en lote y entregan cada resultado."""
+        pool, results = self._pool(workers=1, queue_size=8, batch_size=4, max_age=5.0)
+        for n in range(3):
+            pool.submit(self._crop(n), {"n": n})
+        pool.start()
+        deadline = time.monotonic() + 5
+        while len(results) < 3 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pool.stop()
+        self.assertEqual(sorted(results), [("P0", 0), ("P1", 1), ("P2", 2)])
+        self.assertEqual(pool.stats()["processed"], 3)
+
+    def test_failing_callback_does_not_stop_worker(self):
+        """Un error en on_result se cuenta y el trabajador sigue con los recortes siguientes."""
+        results = []
+
+        def on_result(text, meta):
+            if meta["n"] == 0:
+                raise ValueError("fallo del callback")
+            results.append(meta["n"])
+
+        pool = OcrWorkerPool(
+            recognize=lambda crops: [("P", 0.9) for _ in crops],
+            on_result=on_result, workers=1, queue_size=8, batch_size=1, max_age=5.0)
+        pool.start()
+        for n in range(3):
+            pool.submit(self._crop(n), {"n": n})
+        deadline = time.monotonic() + 5
+        while len(results) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        pool.stop()
+        self.assertEqual(results, [1, 2])
+        self.assertEqual(pool.stats()["errors"], 1)
+
+
+class BenchmarkPlatesCommandTests(SimpleTestCase):
+    """Pruebas del comando benchmark_plates con modelos simulados."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.directory = tmp.name
+        cv2.imwrite(os.path.join(self.directory, "ABC123.png"),
+                    np.zeros((120, 160, 3), dtype=np.uint8))
+        self.default_engine = mock.Mock()
+        patcher = mock.patch("app.detection.plate_detector_service.get_ocr_engine",
+                             return_value=self.default_engine)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_invalid_model_file_raises_command_error(self):
+        """Un modelo faltante o inválido termina en CommandError y cierra el motor OCR."""
+        with mock.patch("app.detection.plate_detector_service.YOLO",
+                        side_effect=FileNotFoundError("models/placa.pt")):
+            with self.assertRaises(CommandError):
+                call_command("benchmark_plates", self.directory, "--backends", "pytesseract")
+        self.default_engine.close.assert_called_once()
+
+    def test_reports_accuracy_with_stubbed_models(self):
+        """Con modelos simulados reporta exactitud y cierra todos los motores."""
+        vehicle = (0, 0, 160, 120)
+        engine = mock.Mock()
+        engine.name = "pytesseract"
+        out = StringIO()
+        with mock.patch.object(PlateDetector, "_load_models"), \
+                mock.patch.object(PlateDetector, "_detect_vehicles", return_value=([vehicle], [])), \
+                mock.patch.object(PlateDetector, "_detect_plates",
+                                  return_value=[(vehicle, (20, 40, 120, 80))]), \
+                mock.patch.object(PlateDetector, "_extract_plate_texts",
+                                  return_value=[("ABC123", 0.9)]), \
+                mock.patch("app.management.commands.benchmark_plates.get_ocr_engine",
+                           return_value=engine):
+            call_command("benchmark_plates", self.directory, "--backends", "pytesseract",
+                         "--json", stdout=out)
+
+        report = json.loads(out.getvalue())
+        self.assertEqual([row["backend"] for row in report], ["pytesseract"])
+        self.assertEqual(report[0]["exact_accuracy"], 1.0)
+        self.assertEqual(report[0]["plates_read"], 1)
+        engine.close.assert_called_once()
+        self.default_engine.close.assert_called_once()
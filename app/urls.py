@@ -19,7 +19,7 @@ from app.detection.detection_views import (
 from app.detection.plate_views import (
     PlateStreamView, PlateControlView, PlateStatusView,
     PlateStreamByIpView, PlateControlByIpView, PlateStatusByIpView,
-    PlateLookupView, PlateLogAccessView
+    PlateLookupView, PlateLogAccessView, PlateMetricsView
 )
 
 urlpatterns = [
@@ -64,4 +64,6 @@ urlpatterns = [
          PlateLookupView.as_view(), name='plates_lookup'),
     path('plates/log_access/',
          PlateLogAccessView.as_view(), name='plates_log_access'),
+    path('plates/metrics/',
+         PlateMetricsView.as_view(), name='plates_metrics'),
 ]
@@ -84,10 +84,20 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
 
+# Archivo histórico de accesos (JSONL comprimido por mes, ver archive_accesses)
+ACCESS_ARCHIVE_DIR = Path(os.environ.get('ACCESS_ARCHIVE_DIR', BASE_DIR / 'archive'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 